@@ -2,15 +2,20 @@ import os
 from flask import Flask, jsonify, make_response
 from flask_cors import CORS
 from chessgpt.routes import (
+    batch_routes,
     board_routes,
+    get_analysis_routes,
     get_fen_routes,
     get_levels_routes,
+    get_metrics_routes,
     get_move_history_routes,
     make_move_routes,
     new_game_routes,
     static_routes,
 )
 from chessgpt.logging.logging import setup_logging
+from chessgpt.logging.profiling import setup_profiling
+from chessgpt.logging.timing import setup_timing
 from chessgpt.database.dynamodb import Database
 
 app = Flask(__name__)
@@ -18,13 +23,18 @@ CORS(app)
 
 
 setup_logging(app)
+setup_timing(app)
+setup_profiling(app)
 
 app.database = Database(app.logger)
 
 # register routes
+batch_routes(app)
 board_routes(app)
+get_analysis_routes(app)
 get_fen_routes(app)
 get_levels_routes(app)
+get_metrics_routes(app)
 get_move_history_routes(app)
 make_move_routes(app)
 new_game_routes(app)
@@ -0,0 +1,92 @@
+"""
+Wall time of reviewing a 100 move game (/api/analysis) against the size of the
+engine pool, with fake engines taking a fixed time for each search.
+
+The searches are independent, so the time should fall close to linearly with the
+number of engines until we run out of cores.
+
+    PYTHONPATH=. python benchmarks/bench_analysis.py
+"""
+import os
+import random
+import time
+from contextlib import ExitStack
+
+import chess
+from stockfish import Stockfish
+
+from chessgpt.stockfish.budgets import get_review_budget
+from chessgpt.stockfish.cache import AnalysisCache, MemoryStore
+from chessgpt.stockfish.pool import EnginePool
+from chessgpt.stockfish.review import review_game
+
+FAKE_ENGINE = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "fakes", "fake_uci_engine.py"
+)
+SEARCH_DELAY = 0.01
+POOL_SIZES = [1, 2, 4, 8]
+MOVES = 200
+
+
+def random_game(seed):
+    """A game of MOVES plies that doesn't end early"""
+    rng = random.Random(seed)
+    board = chess.Board()
+    moves = []
+    while len(moves) < MOVES:
+        legal_moves = [
+            move
+            for move in board.legal_moves
+            if not board.is_into_check(move) and not _ends_game(board, move)
+        ]
+        move = rng.choice(legal_moves)
+        moves.append(board.san(move))
+        board.push(move)
+    return moves
+
+
+def _ends_game(board, move):
+    board.push(move)
+    try:
+        return board.is_game_over()
+    finally:
+        board.pop()
+
+
+def review_time(move_history, size):
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=size, timeout=30)
+    try:
+        # start the engines first, a warm worker already has them
+        with ExitStack() as stack:
+            for _ in range(size):
+                stack.enter_context(pool.engine())
+        budget = get_review_budget(len(move_history) + 1)
+        cache = AnalysisCache(MemoryStore(1000))
+        start = time.perf_counter()
+        reviewed = list(review_game(move_history, budget, pool, cache))
+        elapsed = time.perf_counter() - start
+        assert len(reviewed) == len(move_history)
+        return elapsed
+    finally:
+        pool.close()
+
+
+def main():
+    os.environ["FAKE_UCI_SEARCH_DELAY"] = str(SEARCH_DELAY)
+    move_history = random_game(1)
+    print(
+        f"{len(move_history)} plies, {SEARCH_DELAY * 1000:.0f}ms per search, "
+        f"{os.cpu_count()} cores"
+    )
+    baseline = None
+    for size in POOL_SIZES:
+        elapsed = review_time(move_history, size)
+        baseline = baseline or elapsed
+        print(
+            f"{size} engines  {elapsed:6.2f}s  {baseline / elapsed:4.1f}x  "
+            f"({baseline / elapsed / size:4.0%} of linear)"
+        )
+
+
+if __name__ == "__main__":
+    main()
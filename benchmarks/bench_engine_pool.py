@@ -0,0 +1,79 @@
+"""
+Per-request engine latency with and without the engine pool.
+
+Uses the fake UCI engine so it runs without the real binary. The startup delay
+stands in for Stockfish loading its NNUE weights and allocating hash.
+
+    PYTHONPATH=. python benchmarks/bench_engine_pool.py
+"""
+import os
+import statistics
+import time
+
+import chess
+from stockfish import Stockfish
+
+from chessgpt.stockfish.pool import EnginePool
+
+FAKE_ENGINE = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "fakes", "fake_uci_engine.py"
+)
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "30"))
+os.environ.setdefault("FAKE_UCI_STARTUP_DELAY", "0.05")
+
+FEN = chess.Board(
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+).fen()
+
+
+def request_without_pool():
+    stockfish = Stockfish(FAKE_ENGINE)
+    stockfish.set_elo_rating(1500)
+    stockfish.set_fen_position(FEN)
+    stockfish.get_best_move()
+    stockfish.send_quit_command()
+
+
+def make_request_with_pool(pool):
+    def request_with_pool():
+        with pool.engine() as stockfish:
+            stockfish.set_elo_rating(1500)
+            stockfish.set_fen_position(FEN)
+            stockfish.get_best_move()
+
+    return request_with_pool
+
+
+def measure(request):
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<14} mean {statistics.mean(timings):7.2f}ms  "
+        f"p50 {statistics.median(timings):7.2f}ms  p95 {p95:7.2f}ms"
+    )
+
+
+def main():
+    print(
+        f"{REQUESTS} requests, engine startup delay "
+        f"{os.environ['FAKE_UCI_STARTUP_DELAY']}s"
+    )
+    report("without pool", measure(request_without_pool))
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=1)
+    try:
+        report("with pool", measure(make_request_with_pool(pool)))
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Encode and decode time of the board codec used in `b=` URLs, against the original
+string based implementation it replaced.
+
+get_markdown encodes and test-decodes a board for every response, and /board.svg
+decodes one for every hit.
+
+    PYTHONPATH=. python benchmarks/bench_huffman.py
+"""
+import base64
+import timeit
+
+import chess
+
+from chessgpt.compression.huffman import (
+    HUFFMAN_DICT,
+    REVERSE_HUFFMAN_DICT,
+    decode_board,
+    encode_board,
+)
+
+POSITIONS = {
+    "start": chess.STARTING_FEN,
+    "opening": "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "middlegame": "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "endgame": "8/5k2/8/3K4/8/8/4P3/8 w - - 0 1",
+}
+
+
+def reference_encode_board(board):
+    board_string = str(board).replace(" ", "").replace("\n", "")
+    binary_string = "".join(HUFFMAN_DICT[char] for char in board_string)
+    padded = binary_string.ljust((len(binary_string) + 7) // 8 * 8, "0")
+    b = int(padded, 2).to_bytes(len(padded) // 8, byteorder="big")
+    return base64.urlsafe_b64encode(b).decode().rstrip("=")
+
+
+def reference_decode_board(encoded_board):
+    code = ""
+    position = 0
+    board = chess.Board()
+    board.clear()
+    encoded_board += "=" * (-len(encoded_board) % 4)
+    decoded = base64.urlsafe_b64decode(encoded_board.encode())
+    bits = bin(int.from_bytes(decoded, byteorder="big"))[2:].zfill(len(decoded) * 8)
+    for bit in bits:
+        code += bit
+        if code in REVERSE_HUFFMAN_DICT:
+            piece = REVERSE_HUFFMAN_DICT[code]
+            if piece != ".":
+                x = position % 8
+                y = 7 - position // 8
+                board.set_piece_at(y * 8 + x, chess.Piece.from_symbol(piece))
+            position += 1
+            code = ""
+            if position == 64:
+                break
+    return board
+
+
+def measure(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number * 1_000_000
+
+
+def main():
+    for name, fen in POSITIONS.items():
+        board = chess.Board(fen)
+        encoded = encode_board(board)
+        assert encoded == reference_encode_board(board)
+        assert decode_board(encoded).board_fen() == board.board_fen()
+        encode = (measure(reference_encode_board, board), measure(encode_board, board))
+        decode = (
+            measure(reference_decode_board, encoded),
+            measure(decode_board, encoded),
+        )
+        print(
+            f"{name:<10}  encode {encode[0]:6.1f}us -> {encode[1]:5.1f}us "
+            f"({encode[0] / encode[1]:4.1f}x)  "
+            f"decode {decode[0]:6.1f}us -> {decode[1]:5.1f}us "
+            f"({decode[0] / decode[1]:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
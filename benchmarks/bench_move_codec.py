@@ -0,0 +1,62 @@
+"""
+Stored size and decode time of a game's move list, comma separated SAN text
+against the binary encoding.
+
+Games are random play, which is longer and has more captures and promotions than
+real games, so the sizes are a little pessimistic for both formats.
+
+    PYTHONPATH=. python benchmarks/bench_move_codec.py
+"""
+import os
+import random
+import statistics
+import timeit
+
+import chess
+
+from chessgpt.compression.moves import decode_san_moves, encode_san_moves
+
+GAMES = int(os.environ.get("BENCH_GAMES", "50"))
+PLIES = [40, 80, 160, 300]
+# decodes of each game, autorange would run for a fifth of a second per game
+NUMBER = int(os.environ.get("BENCH_NUMBER", "20"))
+
+
+def random_game(rng, plies):
+    board = chess.Board()
+    sans = []
+    legal_moves = list(board.legal_moves)
+    while legal_moves and len(sans) < plies:
+        move = rng.choice(legal_moves)
+        sans.append(board.san(move))
+        board.push(move)
+        legal_moves = list(board.legal_moves)
+    return sans
+
+
+def measure(decode, data):
+    return timeit.timeit(lambda: decode(data), number=NUMBER) / NUMBER * 1_000_000
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{GAMES} random games per length")
+    for plies in PLIES:
+        games = [random_game(rng, plies) for _ in range(GAMES)]
+        text = [",".join(sans).encode() for sans in games]
+        binary = [encode_san_moves(sans) for sans in games]
+        text_size = statistics.mean(len(data) for data in text)
+        binary_size = statistics.mean(len(data) for data in binary)
+        text_time = statistics.mean(
+            measure(lambda data: data.decode().split(","), data) for data in text
+        )
+        binary_time = statistics.mean(measure(decode_san_moves, data) for data in binary)
+        print(
+            f"{plies:>3} plies  text {text_size:6.0f}B {text_time:7.1f}us  "
+            f"binary {binary_size:6.0f}B {binary_time:7.1f}us  "
+            f"({binary_size / text_size:.0%} of the size)"
+        )
+
+
+if __name__ == "__main__":
+    main()
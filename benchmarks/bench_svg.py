@@ -0,0 +1,71 @@
+"""
+Render time and size of /board.svg boards from the template renderer, against
+chess.svg.board which it replaced.
+
+Boards that miss the render cache are drawn on the request, and the size is what
+gets sent to clients that don't accept gzip.
+
+    PYTHONPATH=. python benchmarks/bench_svg.py
+"""
+import gzip
+import timeit
+
+import chess
+import chess.svg
+
+from chessgpt.render.svg import render_svg
+
+POSITIONS = {
+    "start": (chess.STARTING_FEN, None),
+    "opening": (
+        "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+        "g1f3",
+    ),
+    "check": (
+        "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+        "d8h4",
+    ),
+    "endgame": ("8/5k2/8/3K4/8/8/4P3/8 w - - 0 1", "e6f7"),
+}
+
+
+def measure(function):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number * 1_000_000
+
+
+def main():
+    for name, (fen, lastmove) in POSITIONS.items():
+        board = chess.Board(fen)
+        lastmove = chess.Move.from_uci(lastmove) if lastmove else None
+        check = board.king(board.turn) if board.is_check() else None
+        for orientation in chess.COLORS:
+            before = chess.svg.board(
+                board, orientation=orientation, lastmove=lastmove, check=check, size=400
+            )
+            after = render_svg(board, orientation, lastmove, check, 400)
+            time = (
+                measure(
+                    lambda: chess.svg.board(
+                        board,
+                        orientation=orientation,
+                        lastmove=lastmove,
+                        check=check,
+                        size=400,
+                    )
+                ),
+                measure(lambda: render_svg(board, orientation, lastmove, check, 400)),
+            )
+            print(
+                f"{name:<8} {'white' if orientation else 'black'}  "
+                f"render {time[0]:7.1f}us -> {time[1]:5.1f}us "
+                f"({time[0] / time[1]:5.1f}x)  "
+                f"bytes {len(before):6d} -> {len(after):6d}  "
+                f"gzip {len(gzip.compress(before.encode())):5d} -> "
+                f"{len(gzip.compress(after.encode())):5d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Load test of the whole app with many conversations playing games at once, for
+capacity planning. Reports the throughput and the p50/p95/p99 latency of each
+route, and how much of each request was spent on the engine and the database.
+
+Runs offline, the database is the in-memory fake and the engine is the fake UCI
+engine, with latencies to stand in for the real ones:
+
+    PYTHONPATH=. python benchmarks/load_test.py --conversations 50 --concurrency 10 \\
+        --engine-latency 0.05 --db-latency 0.01 --pgn games.pgn
+
+Requests go straight to the WSGI app unless --http is given, which serves the app
+on a local port and makes real HTTP requests. --url points the load at a server
+that's already running, `sls wsgi serve` say, where only the client side
+latencies are known. Games come from the PGN files, or the simulated users play
+the engine's suggestions. STOCKFISH_POOL_SIZE and the other settings in the README
+apply as usual.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import chess.pgn
+import requests
+from werkzeug.serving import make_server
+
+FAKES = os.path.join(os.path.dirname(__file__), "..", "tests", "fakes")
+FAKE_ENGINE = os.path.join(FAKES, "fake_uci_engine.py")
+
+# the board image in the display markdown, which the chat fetches after every move
+BOARD_URL = re.compile(r"!\[Board\]\(([^)]+)\)")
+
+
+class Timings(threading.local):
+    """Time spent on the engine and the database by the request on this thread"""
+
+    def __init__(self):
+        self.engine = 0.0
+        self.database = 0.0
+
+
+timings = Timings()
+
+
+def timed_database(database):
+    """Wraps the database's methods to add their time to the request's timings"""
+
+    def wrap(method):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings.database += time.perf_counter() - start
+
+        return timed
+
+    for name in [
+        "load_game_state",
+        "load_version",
+        "create_game_state",
+        "save_game_state",
+    ]:
+        setattr(database, name, wrap(getattr(database, name)))
+    return database
+
+
+def timed_engine(engine):
+    """Wraps EnginePool.engine to add the wait for an engine and its use"""
+
+    @contextmanager
+    def timed(pool):
+        start = time.perf_counter()
+        try:
+            with engine(pool) as stockfish:
+                yield stockfish
+        finally:
+            timings.engine += time.perf_counter() - start
+
+    return timed
+
+
+class Recorder:
+    """Collects the latencies of every request by route"""
+
+    def __init__(self):
+        self.client = {}
+        self.server = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record_client(self, route, seconds, ok):
+        with self._lock:
+            self.client.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def record_server(self, route, seconds, engine, database):
+        with self._lock:
+            self.server.setdefault(route, []).append((seconds, engine, database))
+
+
+def timing_middleware(wsgi_app, recorder):
+    """
+    Records the time the app takes on each request and the engine and database share
+    of it. Only the request's own thread is counted, searches it hands to other
+    threads (pondering, game reviews) aren't.
+    """
+
+    def middleware(environ, start_response):
+        timings.engine = 0.0
+        timings.database = 0.0
+        start = time.perf_counter()
+        # read the whole response so the time includes building it
+        body = b"".join(wsgi_app(environ, start_response))
+        recorder.record_server(
+            environ["REQUEST_METHOD"] + " " + environ["PATH_INFO"],
+            time.perf_counter() - start,
+            timings.engine,
+            timings.database,
+        )
+        return [body]
+
+    return middleware
+
+
+class WsgiClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, headers=None):
+        response = self.client.open(path, method=method, json=json, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method, path, json=None, headers=None):
+        response = self.session.request(
+            method, self.url + path, json=json, headers=headers
+        )
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+class Conversation:
+    """A user and the assistant playing one game"""
+
+    def __init__(self, client, recorder, number, think_time):
+        self.client = client
+        self.recorder = recorder
+        self.headers = {"Openai-Conversation-Id": f"load-test-{number}"}
+        self.think_time = think_time
+
+    def request(self, method, path, json=None):
+        if self.think_time:
+            time.sleep(random.uniform(0, self.think_time * 2))
+        start = time.perf_counter()
+        try:
+            status, body = self.client.request(method, path, json, self.headers)
+        except requests.RequestException:
+            status, body = None, None
+        route = method + " " + path.split("?")[0]
+        self.recorder.record_client(
+            route, time.perf_counter() - start, status is not None and status < 400
+        )
+        return body
+
+    def show_board(self, board_state):
+        match = BOARD_URL.search((board_state or {}).get("display", ""))
+        if match:
+            url = urlsplit(match.group(1))
+            self.request("GET", url.path + "?" + url.query)
+
+    def play(self, elo, script, plies):
+        board_state = self.request(
+            "POST",
+            "/api/new_game",
+            {"assistant_color": random.choice(["white", "black"]), "elo": elo},
+        )
+        self.show_board(board_state)
+        moves = iter(script) if script is not None else None
+        for _ in range(plies):
+            if not board_state or board_state.get("game_over"):
+                break
+            if moves is not None:
+                move = next(moves, None)
+            else:
+                move = (board_state.get("best_moves") or "").split(", ")[0]
+            if not move:
+                break
+            board_state = self.request("POST", "/api/move", {"move": move})
+            self.show_board(board_state)
+        self.request("GET", "/api/move_history")
+        self.request("GET", "/api/fen")
+
+
+def read_scripts(paths):
+    """Returns the moves in SAN of the main line of every game in the PGN files"""
+    scripts = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            while True:
+                game = chess.pgn.read_game(handle)
+                if game is None:
+                    break
+                board = game.board()
+                if board.fen() != chess.STARTING_FEN:
+                    # new games always start from the start
+                    continue
+                moves = []
+                for move in game.mainline_moves():
+                    moves.append(board.san(move))
+                    board.push(move)
+                if moves:
+                    scripts.append(moves)
+    return scripts
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def summarise(recorder, elapsed):
+    """Returns the stats of each route, times in milliseconds"""
+    summary = {}
+    for route, latencies in sorted(recorder.client.items()):
+        stats = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(route, 0),
+            "throughput": len(latencies) / elapsed,
+            "p50": percentile(latencies, 0.5) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        }
+        server = recorder.server.get(route)
+        if server:
+            # the share of the app's time, the rest is waiting to be served
+            for name, times in zip(["app", "engine", "database"], zip(*server)):
+                stats[name] = sum(times) / len(times) * 1000
+        summary[route] = stats
+    return summary
+
+
+def report(summary, elapsed):
+    requests_made = sum(stats["requests"] for stats in summary.values())
+    print(
+        f"{requests_made} requests in {elapsed:.1f}s, "
+        f"{requests_made / elapsed:.1f} requests/s"
+    )
+    print(
+        f"{'route':<22} {'count':>6} {'errors':>6} {'req/s':>7} {'p50':>8} "
+        f"{'p95':>8} {'p99':>8} {'app':>8} {'engine':>8} {'db':>8}"
+    )
+    for route, stats in summary.items():
+        split = "".join(
+            f" {stats[name]:8.1f}" if name in stats else f" {'-':>8}"
+            for name in ["app", "engine", "database"]
+        )
+        print(
+            f"{route:<22} {stats['requests']:>6} {stats['errors']:>6} "
+            f"{stats['throughput']:7.1f} {stats['p50']:8.1f} {stats['p95']:8.1f} "
+            f"{stats['p99']:8.1f}" + split
+        )
+    print("times are in ms, app, engine and db are means measured inside the app")
+
+
+def load_app(recorder):
+    """Imports the app with the fake database and times the engine and database"""
+    sys.path.insert(0, FAKES)
+    from fake_database import FakeDatabase
+
+    from chessgpt.stockfish.pool import EnginePool
+
+    with patch("chessgpt.database.dynamodb.get_dynamodb_client"), patch.dict(
+        os.environ, {"GAMES_TABLE": os.environ.get("GAMES_TABLE", "games")}
+    ):
+        from app import app
+    # the request log would drown out the report
+    app.logger.setLevel(logging.WARNING)
+    app.database = timed_database(FakeDatabase(app.logger))
+    EnginePool.engine = timed_engine(EnginePool.engine)
+    app.wsgi_app = timing_middleware(app.wsgi_app, recorder)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument(
+        "--concurrency", type=int, default=5, help="conversations playing at once"
+    )
+    parser.add_argument(
+        "--plies", type=int, default=40, help="most moves played in each game"
+    )
+    parser.add_argument("--elo", type=int, default=1500)
+    parser.add_argument(
+        "--pgn", nargs="*", default=[], help="PGN files of games to play"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0,
+        help="mean seconds between a conversation's requests",
+    )
+    parser.add_argument(
+        "--engine-latency", type=float, default=0.0, help="seconds every search takes"
+    )
+    parser.add_argument(
+        "--db-latency",
+        type=float,
+        default=0.0,
+        help="seconds every database call takes",
+    )
+    parser.add_argument("--http", action="store_true", help="serve the app over HTTP")
+    parser.add_argument("--url", help="load test a server that's already running")
+    parser.add_argument("--output", help="JSON file to write the stats to")
+    args = parser.parse_args(argv)
+
+    scripts = read_scripts(args.pgn) if args.pgn else None
+    if scripts == []:
+        parser.error("No games in the PGN files")
+
+    recorder = Recorder()
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        # the engine processes inherit these when they're spawned
+        os.environ.setdefault("STOCKFISH_PATH", FAKE_ENGINE)
+        os.environ["FAKE_UCI_SEARCH_DELAY"] = str(args.engine_latency)
+        os.environ["FAKE_DYNAMODB_LATENCY"] = str(args.db_latency)
+        app = load_app(recorder)
+        if args.http:
+            server = make_server("127.0.0.1", 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_port}"
+
+    def play(number):
+        client = HttpClient(url) if args.url or args.http else WsgiClient(app)
+        script = scripts[number % len(scripts)] if scripts else None
+        Conversation(client, recorder, number, args.think_time).play(
+            args.elo, script, args.plies
+        )
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            # list() so errors in the conversations aren't swallowed
+            list(executor.map(play, range(args.conversations)))
+    finally:
+        if server is not None:
+            server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    summary = summarise(recorder, elapsed)
+    report(summary, elapsed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "elapsed": elapsed,
+                    "settings": {
+                        name: value
+                        for name, value in vars(args).items()
+                        if name != "pgn"
+                    },
+                    "routes": summary,
+                },
+                f,
+                indent=2,
+            )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Micro-benchmarks of the per-request hot paths - the board codecs, loading and
+replaying games, move parsing, move history formatting and SVG rendering - with
+a saved baseline to catch regressions.
+
+Runs offline, the database is an in-memory stand in and nothing needs an engine.
+
+    PYTHONPATH=. python benchmarks/run_benchmarks.py --save      # record a baseline
+    PYTHONPATH=. python benchmarks/run_benchmarks.py             # compare against it
+
+The comparison exits with status 1 if anything is slower than the baseline by more
+than the threshold (--threshold, 0.25 is 25%). Baselines depend on the machine, so
+record one before changing anything and compare on the same machine.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from functools import partial
+from logging import getLogger
+from unittest.mock import patch
+
+import chess
+
+from chessgpt.compression.huffman import decode_board, encode_board
+from chessgpt.compression.moves import (
+    decode_san_moves,
+    encode_san_moves,
+    encode_uci_moves,
+)
+from chessgpt.compression.position import decode_position, encode_position
+from chessgpt.database.dynamodb import Database, get_checkpoint
+from chessgpt.game_state.game_state import format_moves, get_legal_move_list
+from chessgpt.game_state.legal_moves import build_move_index, resolve_move
+from chessgpt.render.svg import render_svg
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+OPENING = ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "O-O", "Be7"]
+
+# pawns one step from promoting on both sides
+PROMOTIONS_FEN = "8/PPPPPPPP/k7/8/8/K7/pppppppp/8 w - - 0 1"
+
+
+def random_game(seed, plies, fen=chess.STARTING_FEN):
+    """A random game of up to `plies` moves in SAN that avoids ending the game"""
+    rng = random.Random(seed)
+    board = chess.Board(fen)
+    moves = []
+    while len(moves) < plies:
+        legal_moves = [
+            move for move in board.legal_moves if not ends_game(board, move)
+        ]
+        if not legal_moves:
+            break
+        move = rng.choice(legal_moves)
+        moves.append(board.san(move))
+        board.push(move)
+    return moves
+
+
+def ends_game(board, move):
+    board.push(move)
+    try:
+        return board.is_game_over()
+    finally:
+        board.pop()
+
+
+def play(moves, fen=chess.STARTING_FEN):
+    board = chess.Board(fen)
+    for move in moves:
+        board.push_san(move)
+    return board
+
+
+def get_fixtures():
+    """Returns (starting fen, moves in SAN) of each fixture"""
+    return {
+        "opening": (chess.STARTING_FEN, OPENING),
+        "60 plies": (chess.STARTING_FEN, random_game(60, 60)),
+        "200 plies": (chess.STARTING_FEN, random_game(200, 200)),
+        # random play promotes nearly every move until the pawns are gone
+        "promotions": (PROMOTIONS_FEN, random_game(1, 20, PROMOTIONS_FEN)),
+    }
+
+
+class StaticClient:
+    """A DynamoDB client that always has the same item"""
+
+    def __init__(self, item):
+        self.item = item
+
+    def get_item(self, **kwargs):
+        return {"Item": self.item}
+
+
+def make_database(item):
+    with patch("chessgpt.database.dynamodb.get_dynamodb_client"), patch.dict(
+        "os.environ", {"GAMES_TABLE": "games", "GAME_CACHE_SIZE": "0"}
+    ):
+        database = Database(getLogger("benchmarks"))
+    database.dynamodb_client = StaticClient(item)
+    return database
+
+
+def get_items(fen, moves):
+    """The items we'd have stored for the game, before and after checkpoints"""
+    board = play(moves, fen)
+    checkpoint, tail = get_checkpoint(board)
+    items = {
+        "checkpoint": {
+            "moves": encode_san_moves(moves),
+            "checkpoint": checkpoint,
+            "tail": encode_uci_moves(tail),
+            "assistant_color": "white",
+            "elo": "1500",
+            "created": "1",
+            "updated": "1",
+            "version": 2,
+        }
+    }
+    if fen == chess.STARTING_FEN:
+        # games saved before checkpoints are replayed from the start
+        items["legacy replay"] = {
+            "moves": ",".join(moves),
+            "assistant_color": "white",
+            "elo": "1500",
+            "created": "1",
+            "updated": "1",
+        }
+    return items
+
+
+def get_benchmarks():
+    """Returns the name and function of each benchmark"""
+    logger = getLogger("benchmarks")
+    benchmarks = {}
+    for name, (fen, moves) in get_fixtures().items():
+        board = play(moves, fen)
+        encoded_board = encode_board(board)
+        encoded_position = encode_position(board, chess.BLACK)
+        encoded_moves = encode_san_moves(moves)
+        lastmove = board.peek()
+        check = board.king(board.turn) if board.is_check() else None
+        # a legal move written the sloppy way, so the index is searched twice
+        sloppy = next(iter(board.legal_moves), chess.Move.null()).uci()
+        sloppy = sloppy[:2] + "-" + sloppy[2:]
+        benchmarks.update(
+            {
+                f"encode_board[{name}]": partial(encode_board, board),
+                f"decode_board[{name}]": partial(decode_board, encoded_board),
+                f"encode_position[{name}]": partial(encode_position, board),
+                f"decode_position[{name}]": partial(decode_position, encoded_position),
+                f"encode_san_moves[{name}]": partial(encode_san_moves, moves),
+                f"decode_san_moves[{name}]": partial(decode_san_moves, encoded_moves),
+                f"build_move_index[{name}]": partial(build_move_index, board),
+                f"get_legal_move_list[{name}]": partial(
+                    get_legal_move_list, logger, board
+                ),
+                f"resolve_move[{name}]": partial(resolve_move, board, sloppy),
+                f"format_moves[{name}]": partial(format_moves, logger, moves),
+                f"render_svg[{name}]": partial(
+                    render_svg, board, chess.BLACK, lastmove, check
+                ),
+            }
+        )
+        for kind, item in get_items(fen, moves).items():
+            database = make_database(item)
+            benchmarks[f"load_game_state[{name}, {kind}]"] = partial(
+                database.load_game_state, "game"
+            )
+    return benchmarks
+
+
+def measure(function):
+    """Returns the fastest time of a call in microseconds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number * 1_000_000
+
+
+def compare(results, baseline, threshold):
+    """Prints the results against the baseline and returns the names that regressed"""
+    regressions = []
+    for name, time in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<55} {time:10.2f}us")
+            continue
+        change = time / before - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<55} {time:10.2f}us  {before:10.2f}us  {change:+7.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument(
+        "--save", action="store_true", help="save the results as the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="slowdown that counts as a regression, 0.25 is 25%%",
+    )
+    parser.add_argument("--filter", default="", help="only run matching benchmarks")
+    args = parser.parse_args(argv)
+
+    results = {
+        name: measure(function)
+        for name, function in get_benchmarks().items()
+        if args.filter in name
+    }
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        compare(results, {}, args.threshold)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        print(f"No baseline at {args.baseline}, run with --save to record one")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
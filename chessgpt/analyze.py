@@ -0,0 +1,213 @@
+"""
+Scores every move of the games in PGN files with the engine settings we use in
+production, writing one JSON line per move, and fills the analysis cache on the way.
+
+    STOCKFISH_PATH=... ANALYSIS_CACHE_PATH=analysis.db \\
+        python -m chessgpt.analyze games.pgn --output scores.jsonl --levels 1500,2000
+
+Set ANALYSIS_CACHE_PATH to keep what the workers analyse, otherwise each worker's
+cache is lost when it exits. Interrupted runs carry on from the last checkpoint
+when run again with the same arguments.
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import chess
+import chess.pgn
+
+from chessgpt.routes.levels import LEVELS
+from chessgpt.stockfish.analysis import analyse_position
+from chessgpt.stockfish.budgets import HINT_BUDGET, get_review_budget, get_search_budget
+from chessgpt.stockfish.review import evaluate_position, review_moves
+
+logger = logging.getLogger("analyze")
+
+# games read and scored between checkpoints
+GAMES_PER_BATCH = 50
+
+
+def read_games(paths, skip=0):
+    """Yields the games in the PGN files one at a time, after skipping the first few"""
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            while skip:
+                if not chess.pgn.skip_game(handle):
+                    break
+                skip -= 1
+            else:
+                # skipped everything we needed to
+                while True:
+                    game = chess.pgn.read_game(handle)
+                    if game is None:
+                        break
+                    yield game
+
+
+def get_positions(game):
+    """Returns the positions of the game's main line and the moves between them"""
+    board = game.board()
+    positions = [board.copy(stack=False)]
+    moves = []
+    for move in game.mainline_moves():
+        moves.append(move)
+        board.push(move)
+        positions.append(board.copy(stack=False))
+    return positions, moves
+
+
+def init_worker():
+    # one engine per process, the processes are the pool
+    os.environ["STOCKFISH_POOL_SIZE"] = "1"
+
+
+def analyse_task(task):
+    """Runs in the worker processes, analyses one position"""
+    fen, budget, levels, hints = task
+    board = chess.Board(fen)
+    evaluation = evaluate_position(board, budget)
+    if board.is_game_over():
+        return evaluation, {}, []
+    # the same searches as a game in progress, so these land in the cache
+    level_moves = {
+        elo: [
+            move.uci()
+            for move in analyse_position(board, elo, get_search_budget(elo)).moves
+        ]
+        for elo in levels
+    }
+    hint_moves = []
+    if hints:
+        hint_moves = [
+            move.uci() for move in analyse_position(board, 2850, HINT_BUDGET).moves
+        ]
+    return evaluation, level_moves, hint_moves
+
+
+def analyse_games(pool, games, first_game, levels, hints):
+    """Yields the JSON lines of the moves of each game"""
+    games = [(game, *get_positions(game)) for game in games]
+    tasks = [
+        (position.fen(), get_review_budget(len(positions)), levels, hints)
+        for _, positions, _ in games
+        for position in positions
+    ]
+    results = iter(pool.imap(analyse_task, tasks, chunksize=4))
+    for number, (game, positions, moves) in enumerate(games, start=first_game):
+        game_results = list(itertools.islice(results, len(positions)))
+        evaluations = [evaluation for evaluation, _, _ in game_results]
+        for reviewed_move, (_, level_moves, hint_moves), position in zip(
+            review_moves(positions, moves, evaluations), game_results, positions
+        ):
+            line = {
+                "game": number,
+                "white": game.headers.get("White"),
+                "black": game.headers.get("Black"),
+                "fen": position.fen(),
+                **reviewed_move._asdict(),
+            }
+            if levels:
+                line["levels"] = {str(elo): level_moves[elo] for elo in levels}
+            if hints:
+                line["hints"] = hint_moves
+            yield line
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"games": 0, "moves": 0, "offset": 0}
+
+
+def write_checkpoint(path, checkpoint):
+    # write then rename so a crash never leaves half a checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def parse_levels(text):
+    elos = [level["elo"] for level in LEVELS]
+    levels = [int(elo) for elo in text.split(",")] if text else []
+    for elo in levels:
+        if elo not in elos:
+            raise argparse.ArgumentTypeError(
+                f"{elo} isn't a level, the levels are {', '.join(map(str, elos))}"
+            )
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m chessgpt.analyze", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("pgn", nargs="+", help="PGN files to analyse")
+    parser.add_argument("--output", required=True, help="JSONL file to write")
+    parser.add_argument(
+        "--levels",
+        type=parse_levels,
+        default=[],
+        help="comma separated level elos to find the assistant's moves at",
+    )
+    parser.add_argument(
+        "--hints", action="store_true", help="find the user's hints too"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="engine processes to run, defaults to the number of cores",
+    )
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.output + ".checkpoint"
+    checkpoint = read_checkpoint(checkpoint_path)
+    if checkpoint["offset"] > (
+        os.path.getsize(args.output) if os.path.exists(args.output) else 0
+    ):
+        parser.error(f"{args.output} is shorter than {checkpoint_path} says it is")
+    if checkpoint["games"]:
+        logger.info(f"Carrying on after game {checkpoint['games']}")
+    games = read_games(args.pgn, skip=checkpoint["games"])
+    start = time.monotonic()
+    positions = 0
+    with multiprocessing.Pool(args.processes, initializer=init_worker) as pool, open(
+        args.output, "a+"
+    ) as output:
+        # anything after the checkpoint is from a run that was interrupted
+        output.truncate(checkpoint["offset"])
+        while True:
+            batch = list(itertools.islice(games, GAMES_PER_BATCH))
+            if not batch:
+                break
+            moves = 0
+            for line in analyse_games(
+                pool, batch, checkpoint["games"] + 1, args.levels, args.hints
+            ):
+                output.write(json.dumps(line) + "\n")
+                moves += 1
+            output.flush()
+            checkpoint = {
+                "games": checkpoint["games"] + len(batch),
+                "moves": checkpoint["moves"] + moves,
+                "offset": output.tell(),
+            }
+            write_checkpoint(checkpoint_path, checkpoint)
+            # each game has a position before every move and one after the last
+            positions += moves + len(batch)
+            logger.info(
+                f"{checkpoint['games']} games, {checkpoint['moves']} moves, "
+                f"{positions / (time.monotonic() - start):.1f} positions/s"
+            )
+    return checkpoint
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    main()
@@ -4,6 +4,8 @@ from flask import jsonify, request, current_app as app
 from cachetools import cached, TTLCache
 import os
 
+from chessgpt.logging.timing import span
+
 cache = TTLCache(maxsize=10, ttl=86400)
 
 
@@ -24,13 +26,21 @@ def get_secret(secret_name, region_name):
     return get_secret_value_response["SecretString"]
 
 
+def get_auth_secret():
+    """Returns the secret requests must have, or None if there's no authentication"""
+    secret_name = os.environ.get("OPENAI_CHESS_SECRET")
+    if not secret_name:
+        return None
+    return get_secret(secret_name, "us-east-1")
+
+
 def check_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        secret_name = os.environ.get("OPENAI_CHESS_SECRET")
-        if secret_name:
+        if os.environ.get("OPENAI_CHESS_SECRET"):
             auth_header = request.headers.get("Authorization")
-            secret = get_secret(secret_name, "us-east-1")
+            with span("auth"):
+                secret = get_auth_secret()
             if secret:
                 expected_value = "Bearer " + secret
                 if not auth_header or auth_header != expected_value:
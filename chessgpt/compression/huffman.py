@@ -19,44 +19,148 @@ HUFFMAN_DICT = {
 
 REVERSE_HUFFMAN_DICT = {v: k for k, v in HUFFMAN_DICT.items()}
 
+# squares in the same order as str(board), a8 to h8 down to a1 to h1. Flipping a
+# square vertically turns it into its position in this order and back.
+SQUARE_ORDER = [chess.square_mirror(square) for square in chess.SQUARES]
 
-def string_to_bytes(s):
-    return int(s, 2).to_bytes((len(s) + 7) // 8, byteorder="big")
+# the bitboard of the square at each position, the zeros padding the last byte can
+# decode as a few pieces past the last square and those land on an empty mask
+POSITION_MASKS = [chess.BB_SQUARES[square] for square in SQUARE_ORDER] + [0] * 8
 
+# empty squares are a single 1 bit, so a run of them is a run of 1 bits
+assert HUFFMAN_DICT["."] == "1"
 
-def bytes_to_string(b):
-    return bin(int.from_bytes(b, byteorder="big"))[2:].zfill(len(b) * 8)
+# (code, length) of each piece, indexed by [color][piece type]
+PIECE_CODES = [
+    [None]
+    + [
+        (int(code, 2), len(code))
+        for code in (
+            HUFFMAN_DICT[chess.Piece(piece_type, color).symbol()]
+            for piece_type in chess.PIECE_TYPES
+        )
+    ]
+    for color in [chess.BLACK, chess.WHITE]
+]
+
+# the symbols are numbered in HUFFMAN_DICT order, 0 is an empty square
+SYMBOLS = list(HUFFMAN_DICT)
+SYMBOL_PIECES = [None] + [chess.Piece.from_symbol(symbol) for symbol in SYMBOLS[1:]]
+
+
+def build_decode_table():
+    """
+    Returns the decoder's state machine. The states are the partial codes left over
+    at the end of a byte. decode_table[state][byte] is the pieces completed by the
+    byte as (offset, symbol) pairs, where offset counts the squares completed before
+    the piece, then the number of squares completed and the state after the byte.
+    """
+    partial_codes = sorted(
+        {code[:i] for code in HUFFMAN_DICT.values() for i in range(len(code))},
+        key=lambda code: (len(code), code),
+    )
+    decode_table = []
+    for partial_code in partial_codes:
+        row = []
+        for byte in range(256):
+            code = partial_code
+            squares = 0
+            pieces = []
+            for bit in format(byte, "08b"):
+                code += bit
+                if code in REVERSE_HUFFMAN_DICT:
+                    symbol = SYMBOLS.index(REVERSE_HUFFMAN_DICT[code])
+                    if symbol:
+                        pieces.append((squares, symbol))
+                    squares += 1
+                    code = ""
+            row.append((tuple(pieces), squares, partial_codes.index(code)))
+        decode_table.append(row)
+    return decode_table
+
+
+DECODE_TABLE = build_decode_table()
+
+
+def pack_board(board) -> bytes:
+    """Returns the huffman coded piece placement, padded with zeros to whole bytes"""
+    # the code of each occupied square, by its position in SQUARE_ORDER
+    codes = {}
+    piece_masks = [
+        board.pawns,
+        board.knights,
+        board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+    ]
+    for color in chess.COLORS:
+        color_mask = board.occupied_co[color]
+        color_codes = PIECE_CODES[color]
+        for piece_type, piece_mask in zip(chess.PIECE_TYPES, piece_masks):
+            code = color_codes[piece_type]
+            for square in chess.scan_forward(piece_mask & color_mask):
+                codes[square ^ 56] = code
+    bits = 0
+    length = 0
+    previous = -1
+    for position in sorted(codes):
+        empty = position - previous - 1
+        code, code_length = codes[position]
+        bits = (bits << empty | (1 << empty) - 1) << code_length | code
+        length += empty + code_length
+        previous = position
+    empty = 63 - previous
+    bits = bits << empty | (1 << empty) - 1
+    length += empty
+    # pad with zeros to a whole number of bytes
+    padding = -length % 8
+    return (bits << padding).to_bytes((length + padding) // 8, byteorder="big")
+
+
+def unpack_board(data, start=0) -> chess.Board:
+    """Returns a board with the pieces packed into data from the start offset on"""
+    state = 0
+    position = 0
+    symbol_masks = [0] * len(SYMBOLS)
+    for byte in data[start:]:
+        if position >= 64:
+            # anything after the last square is ignored, like the old decoder did
+            break
+        pieces, squares, state = DECODE_TABLE[state][byte]
+        for offset, symbol in pieces:
+            symbol_masks[symbol] |= POSITION_MASKS[position + offset]
+        position += squares
+    if position < 64:
+        raise ValueError("Encoded board is too short")
+    board = chess.Board.empty()
+    for symbol, piece in enumerate(SYMBOL_PIECES):
+        if piece:
+            mask = symbol_masks[symbol]
+            board.occupied_co[piece.color] |= mask
+            if piece.piece_type == chess.PAWN:
+                board.pawns |= mask
+            elif piece.piece_type == chess.KNIGHT:
+                board.knights |= mask
+            elif piece.piece_type == chess.BISHOP:
+                board.bishops |= mask
+            elif piece.piece_type == chess.ROOK:
+                board.rooks |= mask
+            elif piece.piece_type == chess.QUEEN:
+                board.queens |= mask
+            else:
+                board.kings |= mask
+    board.occupied = board.occupied_co[chess.WHITE] | board.occupied_co[chess.BLACK]
+    return board
 
 
 def encode_board(board):
-    board_string = str(board).replace(" ", "").replace("\n", "")
-    binary_string = "".join(HUFFMAN_DICT[char] for char in board_string)
-    # Add padding to the end of the binary string
-    padded_binary_string = binary_string.ljust((len(binary_string) + 7) // 8 * 8, "0")
-    b = string_to_bytes(padded_binary_string)
-    b64 = base64.urlsafe_b64encode(b).decode()
+    b64 = base64.urlsafe_b64encode(pack_board(board)).decode()
     # strip off the padding
     return b64.rstrip("=")
 
 
 def decode_board(encoded_board):
-    code = ""
-    position = 0
-    board = chess.Board()
-    board.clear()
     # add on the padding
     encoded_board += "=" * (-len(encoded_board) % 4)
-    decoded = base64.urlsafe_b64decode(encoded_board.encode())
-    for bit in bytes_to_string(decoded):
-        code += bit
-        if code in REVERSE_HUFFMAN_DICT:
-            piece = REVERSE_HUFFMAN_DICT[code]
-            if piece != ".":
-                x = position % 8
-                y = 7 - position // 8
-                board.set_piece_at(y * 8 + x, chess.Piece.from_symbol(piece))
-            position += 1
-            code = ""
-            if position == 64:
-                break
-    return board
+    return unpack_board(base64.urlsafe_b64decode(encoded_board.encode()))
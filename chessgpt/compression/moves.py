@@ -0,0 +1,173 @@
+import re
+import sys
+from array import array
+
+import chess
+
+# Binary move lists for storing games. The first byte is the format version, then
+# one little endian 16 bit word per move.
+#
+# SAN moves (version 1) don't need a board to decode:
+#   bits 13-15  kind - pawn, N, B, R, Q, K, O-O, O-O-O
+#   bit  12     capture
+#   bits 6-11   destination square
+#   bits 4-5    suffix - none, + or #
+#   bits 0-3    pawns: promotion piece (bits 0-2) and capturing from the file to the
+#               right (bit 3); pieces: the file they move from if SAN needs it,
+#               or ESCAPE followed by a word with the file and rank
+#
+# UCI moves (version 2) are from square | to square << 6 | promotion piece << 12
+SAN_VERSION = 1
+UCI_VERSION = 2
+
+ESCAPE = 15
+
+KINDS = ["", "N", "B", "R", "Q", "K", "O-O", "O-O-O"]
+PROMOTIONS = ["", "=N", "=B", "=R", "=Q"]
+SUFFIXES = ["", "+", "#"]
+FILES = ["", "a", "b", "c", "d", "e", "f", "g", "h"]
+RANKS = ["", "1", "2", "3", "4", "5", "6", "7", "8"]
+
+SAN_PATTERN = re.compile(
+    r"^(?:(?P<castle>O-O(?:-O)?)"
+    r"|(?P<piece>[NBRQK])?(?P<file>[a-h])?(?P<rank>[1-8])?(?P<capture>x)?"
+    r"(?P<to>[a-h][1-8])(?:=(?P<promotion>[NBRQ]))?)(?P<suffix>[+#])?$"
+)
+
+# the text of every field value, indexed by the value, so decoding is all lookups
+_CAPTURES = ["", "x"]
+_DISAMBIGUATIONS = [file + rank for file in FILES for rank in RANKS]
+_PIECE_FILES = FILES + [None] * (ESCAPE + 1 - len(FILES))
+_PAWN_FROM_FILES = [
+    [
+        chess.FILE_NAMES[to_file + (1 if right else -1)]
+        if 0 <= to_file + (1 if right else -1) < 8
+        else None
+        for to_file in range(8)
+    ]
+    for right in (False, True)
+]
+
+
+def _to_bytes(version, words):
+    if sys.byteorder == "big":
+        words.byteswap()
+    return bytes([version]) + words.tobytes()
+
+
+def _from_bytes(data, version):
+    if not data or data[0] != version:
+        raise ValueError(f"Expected version {version} move list")
+    words = array("H")
+    words.frombytes(data[1:])
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+def encode_san_moves(moves) -> bytes:
+    words = array("H")
+    for move in moves:
+        match = SAN_PATTERN.match(move)
+        if not match:
+            raise ValueError(f"Can't encode move: {move}")
+        suffix = SUFFIXES.index(match["suffix"] or "")
+        if match["castle"]:
+            words.append(KINDS.index(match["castle"]) << 13 | suffix << 4)
+            continue
+        kind = KINDS.index(match["piece"] or "")
+        capture = 1 if match["capture"] else 0
+        to = chess.parse_square(match["to"])
+        file = FILES.index(match["file"] or "")
+        rank = RANKS.index(match["rank"] or "")
+        extra = 0
+        escaped = None
+        if kind == 0:
+            if rank or bool(file) != bool(capture):
+                raise ValueError(f"Can't encode move: {move}")
+            promotion = PROMOTIONS.index(
+                "=" + match["promotion"] if match["promotion"] else ""
+            )
+            right = capture and file - 1 == chess.square_file(to) + 1
+            if capture and not right and file - 1 != chess.square_file(to) - 1:
+                raise ValueError(f"Can't encode move: {move}")
+            extra = promotion | (8 if right else 0)
+        elif match["promotion"]:
+            raise ValueError(f"Can't encode move: {move}")
+        elif rank:
+            extra = ESCAPE
+            escaped = file * len(RANKS) + rank
+        else:
+            extra = file
+        words.append(kind << 13 | capture << 12 | to << 6 | suffix << 4 | extra)
+        if escaped is not None:
+            words.append(escaped)
+    return _to_bytes(SAN_VERSION, words)
+
+
+def _decode_san_word(word):
+    kind = word >> 13
+    suffix = SUFFIXES[word >> 4 & 3]
+    if kind >= 6:
+        return KINDS[kind] + suffix
+    to = word >> 6 & 63
+    capture = word >> 12 & 1
+    extra = word & 15
+    if kind == 0:
+        from_file = _PAWN_FROM_FILES[extra >> 3][to & 7] if capture else ""
+        return (
+            from_file
+            + _CAPTURES[capture]
+            + chess.SQUARE_NAMES[to]
+            + PROMOTIONS[extra & 7]
+            + suffix
+        )
+    return (
+        KINDS[kind]
+        + ("\0" if extra == ESCAPE else _PIECE_FILES[extra])
+        + _CAPTURES[capture]
+        + chess.SQUARE_NAMES[to]
+        + suffix
+    )
+
+
+# decoded words - games only use a few thousand distinct moves between them
+_san_words = {}
+
+
+def decode_san_moves(data) -> list:
+    words = _from_bytes(data, SAN_VERSION)
+    moves = []
+    escaped = False
+    for word in words:
+        if escaped:
+            # the file and rank of the previous move
+            moves[-1] = moves[-1].replace("\0", _DISAMBIGUATIONS[word], 1)
+            escaped = False
+            continue
+        move = _san_words.get(word)
+        if move is None:
+            move = _san_words[word] = _decode_san_word(word)
+        escaped = "\0" in move
+        moves.append(move)
+    if escaped:
+        raise ValueError("Truncated move list")
+    return moves
+
+
+def encode_uci_moves(moves) -> bytes:
+    words = array(
+        "H",
+        (
+            move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+            for move in moves
+        ),
+    )
+    return _to_bytes(UCI_VERSION, words)
+
+
+def decode_uci_moves(data) -> list:
+    return [
+        chess.Move(word & 63, word >> 6 & 63, word >> 12 or None)
+        for word in _from_bytes(data, UCI_VERSION)
+    ]
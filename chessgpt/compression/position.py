@@ -0,0 +1,90 @@
+import base64
+from collections import namedtuple
+
+import chess
+
+from .huffman import pack_board, unpack_board
+
+# Version 2 of the `b=` board encoding, everything needed to draw the board.
+# "2." followed by base64 of:
+#   flags byte   bit 0 white to move, bit 1 white at the bottom of the board,
+#                bits 2-5 castling rights K Q k q, bit 6 en passant, bit 7 last move
+#   en passant   one byte with the file, if the flag is set
+#   last move    two bytes, from square << 6 | to square, if the flag is set
+#   pieces       the huffman coded piece placement from version 1
+# Version 1 boards are plain base64, which never contains a "."
+VERSION_PREFIX = "2."
+
+TURN_FLAG = 1
+ORIENTATION_FLAG = 2
+EN_PASSANT_FLAG = 64
+LAST_MOVE_FLAG = 128
+CASTLING_FLAGS = [
+    (chess.BB_H1, 4),
+    (chess.BB_A1, 8),
+    (chess.BB_H8, 16),
+    (chess.BB_A8, 32),
+]
+
+# a decoded position, orientation is the color at the bottom of the board and
+# lastmove is None at the start of a game
+Position = namedtuple("Position", ["board", "orientation", "lastmove"])
+
+
+def is_position(encoded):
+    return encoded.startswith(VERSION_PREFIX)
+
+
+def encode_position(board, orientation=chess.WHITE):
+    flags = 0
+    header = bytearray()
+    if board.turn == chess.WHITE:
+        flags |= TURN_FLAG
+    if orientation == chess.WHITE:
+        flags |= ORIENTATION_FLAG
+    castling_rights = board.clean_castling_rights()
+    for rook, flag in CASTLING_FLAGS:
+        if castling_rights & rook:
+            flags |= flag
+    if board.ep_square is not None:
+        flags |= EN_PASSANT_FLAG
+        header.append(chess.square_file(board.ep_square))
+    if board.move_stack:
+        flags |= LAST_MOVE_FLAG
+        lastmove = board.peek()
+        header += (lastmove.from_square << 6 | lastmove.to_square).to_bytes(2, "big")
+    data = bytes([flags]) + header + pack_board(board)
+    return VERSION_PREFIX + base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_position(encoded) -> Position:
+    if not is_position(encoded):
+        raise ValueError("Not a version 2 board")
+    _, _, encoded = encoded.partition(".")
+    data = base64.urlsafe_b64decode((encoded + "=" * (-len(encoded) % 4)).encode())
+    try:
+        flags = data[0]
+        offset = 1
+        ep_file = None
+        lastmove = None
+        if flags & EN_PASSANT_FLAG:
+            ep_file = data[offset]
+            offset += 1
+        if flags & LAST_MOVE_FLAG:
+            move = data[offset] << 8 | data[offset + 1]
+            lastmove = chess.Move(move >> 6 & 63, move & 63)
+            offset += 2
+    except IndexError as e:
+        raise ValueError("Encoded board is too short") from e
+    board = unpack_board(data, offset)
+    board.turn = bool(flags & TURN_FLAG)
+    for rook, flag in CASTLING_FLAGS:
+        if flags & flag:
+            board.castling_rights |= rook
+    if ep_file is not None:
+        if ep_file > 7:
+            raise ValueError("Invalid en passant file")
+        # the square the pawn skipped over, behind it from the side to move's view
+        board.ep_square = chess.square(ep_file, 5 if board.turn == chess.WHITE else 2)
+    orientation = chess.WHITE if flags & ORIENTATION_FLAG else chess.BLACK
+    return Position(board, orientation, lastmove)
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# rough sizes in bytes of a cached game, a board with an empty stack and each move
+# on the board's stack plus its SAN in the move history
+GAME_STATE_SIZE = 2000
+MOVE_SIZE = 250
+
+CachedGameState = namedtuple("CachedGameState", ["game_state", "size", "stored"])
+
+
+def estimate_size(game_state):
+    return GAME_STATE_SIZE + MOVE_SIZE * (
+        len(game_state.board.move_stack) + len(game_state.move_history)
+    )
+
+
+def copy_game_state(game_state):
+    # requests push moves onto the board and history, so never share them
+    return game_state._replace(
+        board=game_state.board.copy(), move_history=list(game_state.move_history)
+    )
+
+
+class GameStateCache:
+    """
+    LRU cache of loaded games, capped by entry count and estimated size.
+
+    Games younger than `ttl` seconds are used as they are, older games are only
+    used once the caller has checked they're still the latest version.
+    """
+
+    def __init__(self, maxsize, max_bytes, ttl):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id_hash):
+        """
+        Returns a copy of the cached game and whether it's fresh, or (None, False)
+        """
+        with self._lock:
+            entry = self._entries.get(conversation_id_hash)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(conversation_id_hash)
+            fresh = time.monotonic() - entry.stored < self.ttl
+            if fresh:
+                self.hits += 1
+        return copy_game_state(entry.game_state), fresh
+
+    def revalidate(self, conversation_id_hash, version, created):
+        """Marks the cached game fresh again if it's still the stored version"""
+        with self._lock:
+            entry = self._entries.get(conversation_id_hash)
+            if entry is None or (
+                entry.game_state.version,
+                entry.game_state.created,
+            ) != (version, created):
+                self.misses += 1
+                return False
+            self.revalidated += 1
+            self._entries[conversation_id_hash] = entry._replace(
+                stored=time.monotonic()
+            )
+            return True
+
+    def set(self, conversation_id_hash, game_state):
+        entry = CachedGameState(
+            copy_game_state(game_state), estimate_size(game_state), time.monotonic()
+        )
+        with self._lock:
+            self._remove(conversation_id_hash)
+            if entry.size > self.max_bytes:
+                return
+            self._entries[conversation_id_hash] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, conversation_id_hash):
+        with self._lock:
+            self._remove(conversation_id_hash)
+
+    def _remove(self, conversation_id_hash):
+        entry = self._entries.pop(conversation_id_hash, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+def make_game_state_cache():
+    """Returns a game cache configured from the environment, or None if it's switched off"""
+    maxsize = int(os.environ.get("GAME_CACHE_SIZE", "1000"))
+    if maxsize <= 0:
+        return None
+    return GameStateCache(
+        maxsize,
+        int(os.environ.get("GAME_CACHE_BYTES", str(64 * 1024 * 1024))),
+        float(os.environ.get("GAME_CACHE_TTL", "5")),
+    )
@@ -2,8 +2,18 @@ from datetime import datetime
 import os
 import boto3
 import chess
+from botocore.exceptions import ClientError
 
+from chessgpt.compression.moves import (
+    decode_san_moves,
+    decode_uci_moves,
+    encode_san_moves,
+    encode_uci_moves,
+)
+from chessgpt.database.cache import make_game_state_cache
 from chessgpt.game_state.game_state import GameState
+from chessgpt.logging.timing import span
+from chessgpt.metrics.metrics import DYNAMODB_CONFLICTS, DYNAMODB_SECONDS
 
 
 def get_dynamodb_client():
@@ -17,52 +27,234 @@ def get_dynamodb_client():
             "dynamodb", region_name="localhost", endpoint_url="http://localhost:8000"
         ).meta.client
     else:
+        # the resource's client converts to and from plain python values for us
         session = boto3.Session()
         return session.resource("dynamodb").meta.client
 
 
+def get_checkpoint(board: chess.Board):
+    """
+    Returns the position before the last irreversible move (a capture, pawn move or
+    the start of the game) and the moves played since.
+
+    No earlier position can repeat, so replaying the tail rebuilds everything we need
+    for repetition and 75 move detection, and the tail is never longer than 151 plies.
+    """
+    plies = min(board.halfmove_clock + 1, len(board.move_stack))
+    checkpoint = board.copy()
+    tail = [checkpoint.pop() for _ in range(plies)]
+    return checkpoint.fen(), tail[::-1]
+
+
+def load_moves(item):
+    moves = item.get("moves")
+    if not moves:
+        return []
+    if isinstance(moves, str):
+        # saved before we stored moves in binary
+        return moves.split(",")
+    return decode_san_moves(bytes(moves))
+
+
+def load_tail(item):
+    tail = item.get("tail")
+    if not tail:
+        return []
+    if isinstance(tail, str):
+        return [chess.Move.from_uci(move) for move in tail.split(",")]
+    return decode_uci_moves(bytes(tail))
+
+
+def load_board(item, moves) -> chess.Board:
+    checkpoint = item.get("checkpoint")
+    if checkpoint is None:
+        # saved before we stored checkpoints, replay the whole game
+        board = chess.Board()
+        for move in moves:
+            board.push_san(move)
+        return board
+    board = chess.Board(checkpoint)
+    # the moves were legal when they were saved, so skip the legality checks
+    for move in load_tail(item):
+        board.push(move)
+    return board
+
+
+class GameStateConflictError(Exception):
+    """The game was saved by another request since we loaded it"""
+
+
 class Database:
     def __init__(self, logger):
         self.logger = logger
         self.table_name = os.environ["GAMES_TABLE"]
         self.dynamodb_client = get_dynamodb_client()
+        self.game_state_cache = make_game_state_cache()
 
     def load_game_state(self, conversation_id_hash) -> GameState:
+        cache = self.game_state_cache
+        if cache is not None:
+            # a fresh game was saved by this worker moments ago, an older one is
+            # still good if nobody else has saved the game since
+            game_state, fresh = cache.get(conversation_id_hash)
+            if game_state is not None:
+                if fresh:
+                    return game_state
+                version, created = self.load_version(conversation_id_hash)
+                if cache.revalidate(conversation_id_hash, version, created):
+                    return game_state
+        game_state = self.fetch_game_state(conversation_id_hash)
+        if cache is not None and game_state is not None:
+            cache.set(conversation_id_hash, game_state)
+        return game_state
+
+    def load_version(self, conversation_id_hash):
+        """Returns the version and created time of the stored game, without loading it"""
+        with span("db-load"), DYNAMODB_SECONDS.time("get_item"):
+            result = self.dynamodb_client.get_item(
+                TableName=self.table_name,
+                Key={"conversationId": conversation_id_hash},
+                ProjectionExpression="#version, #created",
+                ExpressionAttributeNames={"#version": "version", "#created": "created"},
+            )
+        item = result.get("Item")
+        if not item:
+            return None, None
+        return int(item.get("version", 0)), int(item.get("created", 0))
+
+    def fetch_game_state(self, conversation_id_hash) -> GameState:
         self.logger.debug("Loading board state from dynamoDB")
-        result = self.dynamodb_client.get_item(
-            TableName=self.table_name, Key={"conversationId": conversation_id_hash}
-        )
+        with span("db-load"), DYNAMODB_SECONDS.time("get_item"):
+            result = self.dynamodb_client.get_item(
+                TableName=self.table_name, Key={"conversationId": conversation_id_hash}
+            )
         item = result.get("Item")
         if not item:
             return None  # type: ignore
 
-        moves_string = item.get("moves")
-        if not moves_string:
-            moves = []
-        else:
-            moves = moves_string.split(",")
-        board = chess.Board()
-        for move in moves:
-            board.push_san(move)
+        with span("db-replay"):
+            moves = load_moves(item)
+            board = load_board(item, moves)
         assistant_color = item.get("assistant_color")
         elo = int(item.get("elo", "2000"))
         elo = max(1350, min(2850, elo))
         now = datetime.utcnow().timestamp()
         created = int(item.get("created", now))
         updated = int(item.get("updated", now))
-        return GameState(board, moves, assistant_color, elo, created, updated)
+        # games saved before we versioned them are version 0
+        version = int(item.get("version", 0))
+        return GameState(board, moves, assistant_color, elo, created, updated, version)
 
-    def save_game_state(self, conversation_id_hash, game_state: GameState):
-        # save the board state to dynamoDB - we'll just save the move history
-        self.logger.debug("Saving board state to dynamoDB")
-        self.dynamodb_client.put_item(
-            TableName=self.table_name,
-            Item={
+    def create_game_state(self, conversation_id_hash, game_state: GameState):
+        """Saves a new game, replacing any previous game in the conversation"""
+        self.logger.debug("Creating game in dynamoDB")
+        game_state = game_state._replace(version=1)
+        with span("db-encode"):
+            checkpoint, tail = get_checkpoint(game_state.board)
+            item = {
                 "conversationId": conversation_id_hash,
-                "moves": ",".join(game_state.move_history),
+                "moves": encode_san_moves(game_state.move_history),
+                "checkpoint": checkpoint,
+                "tail": encode_uci_moves(tail),
                 "assistant_color": game_state.assistant_color,
                 "elo": str(game_state.elo),
                 "created": str(game_state.created),
                 "updated": str(game_state.updated),
-            },
+                "version": game_state.version,
+            }
+        with span("db-save"), DYNAMODB_SECONDS.time("put_item"):
+            self.dynamodb_client.put_item(TableName=self.table_name, Item=item)
+        if self.game_state_cache is not None:
+            self.game_state_cache.set(conversation_id_hash, game_state)
+        return game_state
+
+    def save_game_state(self, conversation_id_hash, game_state: GameState):
+        """
+        Saves the moves made since the game was loaded and returns the saved game state.
+
+        Raises GameStateConflictError if the game has been saved or replaced by a new
+        game since it was loaded, the caller should load it again and retry.
+        """
+        # only the position changes once a game has started, so leave the rest alone
+        self.logger.debug("Saving board state to dynamoDB")
+        game_state = game_state._replace(
+            updated=int(datetime.utcnow().timestamp()), version=game_state.version + 1
         )
+        with span("db-encode"):
+            checkpoint, tail = get_checkpoint(game_state.board)
+            values = {
+                ":moves": encode_san_moves(game_state.move_history),
+                ":checkpoint": checkpoint,
+                ":tail": encode_uci_moves(tail),
+                ":updated": str(game_state.updated),
+                ":version": game_state.version,
+            }
+        # some of these are reserved words in DynamoDB expressions
+        names = {
+            f"#{name}": name
+            for name in ["moves", "fen", "checkpoint", "tail", "updated", "version"]
+        }
+        if game_state.version == 1:
+            # saved before we versioned games
+            condition = "attribute_not_exists(#version)"
+        else:
+            # created changes if a new game replaced this one
+            condition = "#version = :expected AND #created = :created"
+            names["#created"] = "created"
+            values[":expected"] = game_state.version - 1
+            values[":created"] = str(game_state.created)
+        try:
+            with span("db-save"), DYNAMODB_SECONDS.time("update_item"):
+                self.dynamodb_client.update_item(
+                    TableName=self.table_name,
+                    Key={"conversationId": conversation_id_hash},
+                    # loads rebuild the board from the checkpoint, so the fen older
+                    # versions stored is dead weight
+                    UpdateExpression=(
+                        "SET #moves = :moves, #checkpoint = :checkpoint, #tail = :tail,"
+                        " #updated = :updated, #version = :version REMOVE #fen"
+                    ),
+                    ConditionExpression=condition,
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
+                )
+        except ClientError as e:
+            if self.game_state_cache is not None:
+                # whatever we had cached is out of date or the save failed
+                self.game_state_cache.invalidate(conversation_id_hash)
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                DYNAMODB_CONFLICTS.inc()
+                raise GameStateConflictError(conversation_id_hash) from e
+            raise
+        if self.game_state_cache is not None:
+            self.game_state_cache.set(conversation_id_hash, game_state)
+        return game_state
+
+    def migrate_game_states(self):
+        """
+        Rewrites games saved before we stored position snapshots and binary move
+        lists. Returns the number of games migrated. Games that are loaded and saved
+        are migrated anyway, so this only needs to be run once to speed up the first
+        load of old games.
+        """
+        migrated = 0
+        scan_args = {
+            "TableName": self.table_name,
+            "FilterExpression": "attribute_not_exists(checkpoint)"
+            + " OR attribute_type(moves, :string)",
+            "ExpressionAttributeValues": {":string": "S"},
+        }
+        while True:
+            result = self.dynamodb_client.scan(**scan_args)
+            for item in result.get("Items", []):
+                conversation_id_hash = item["conversationId"]
+                game_state = self.fetch_game_state(conversation_id_hash)
+                try:
+                    self.save_game_state(conversation_id_hash, game_state)
+                except GameStateConflictError:
+                    # it's being played, so the move that was just made migrated it
+                    continue
+                migrated += 1
+            if "LastEvaluatedKey" not in result:
+                return migrated
+            scan_args["ExclusiveStartKey"] = result["LastEvaluatedKey"]
@@ -0,0 +1,11 @@
+import logging
+
+from chessgpt.database.dynamodb import Database
+
+# rewrites games saved before we stored position snapshots and binary move lists:
+#   GAMES_TABLE=games-table-prod python -m chessgpt.database.migrate
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger("migrate")
+    migrated = Database(logger).migrate_game_states()
+    logger.info(f"Migrated {migrated} games")
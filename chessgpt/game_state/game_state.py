@@ -1,29 +1,38 @@
 from collections import namedtuple
 
 import chess
-from chessgpt.compression.huffman import decode_board, encode_board
-from chessgpt.stockfish.stockfish import get_best_move, get_best_moves, get_stockfish
-
-# create a named tuple to hold the game state
+from chessgpt.compression.position import decode_position, encode_position
+from chessgpt.game_state.legal_moves import get_move_index
+from chessgpt.logging.timing import span
+from chessgpt.stockfish.analysis import analyse_position
+from chessgpt.stockfish.budgets import HINT_BUDGET, get_search_budget
+from chessgpt.stockfish.ponder import ponder_after_move
+
+# create a named tuple to hold the game state, version counts the saves and is 0
+# for a game that hasn't been saved yet
 GameState = namedtuple(
     "GameState",
-    ["board", "move_history", "assistant_color", "elo", "created", "updated"],
+    ["board", "move_history", "assistant_color", "elo", "created", "updated", "version"],
+    defaults=[0],
 )
 
 
 # get the list of legal moves in SAN format
 def get_legal_move_list(logger, board):
-    legal_moves = [board.san(move) for move in board.legal_moves]
+    legal_moves = list(get_move_index(board).san)
     logger.debug("Legal moves: " + str(legal_moves))
     return legal_moves
 
 
 def get_markdown(logger, conversation_id_hash, game_state: GameState, scheme, host):
-    # encode the board as a base64 string
-    encoded_board = encode_board(game_state.board)
+    # encode the position as a base64 string, the board is drawn from the user's side
+    orientation = chess.BLACK if game_state.assistant_color == "white" else chess.WHITE
+    with span("markdown-encode"):
+        encoded_board = encode_position(game_state.board, orientation)
     try:
         # check the results can be decoded
-        decode_board(encoded_board)
+        with span("markdown-verify"):
+            decode_position(encoded_board)
     except Exception as e:
         logger.error("Error decoding board: " + str(e))
         logger.error("Encoded board: " + encoded_board)
@@ -79,12 +88,15 @@ def get_game_over_reason(logger, game_state: GameState, isUsersTurn: bool):
 def get_board_state_for_assistant(
     logger, conversation_id_hash, game_state: GameState, turn, scheme, host
 ):
-    stockfish = get_stockfish(game_state.elo, game_state.board.fen())
-    best_moves = get_best_move(stockfish)
-    if best_moves:
-        best_moves_san = [game_state.board.san(chess.Move.from_uci(best_moves))]
-    else:
-        best_moves_san = []
+    analysis = analyse_position(
+        game_state.board, game_state.elo, get_search_budget(game_state.elo)
+    )
+    best_moves_san = [game_state.board.san(move) for move in analysis.moves]
+    if analysis.moves:
+        # the assistant will probably play the best move, so get the user's hints ready
+        ponder_after_move(
+            conversation_id_hash, game_state.board, analysis.moves[0], 2850, HINT_BUDGET
+        )
     logger.debug("Best moves for assistant: " + str(best_moves_san))
     instructions = (
         f"It's the assistant's turn. The assistant is playing {turn}. Pick a move from the following best moves for {turn}: {', '.join(best_moves_san)}. "  # noqa: E501
@@ -94,6 +106,7 @@ def get_board_state_for_assistant(
         "game_over": False,
         "display": get_markdown(logger, conversation_id_hash, game_state, scheme, host),
         "best_moves": ", ".join(best_moves_san),
+        "move_source": analysis.source,
         "EXTRA_INFORMATION_TO_ASSISTANT": instructions,
     }
 
@@ -101,11 +114,17 @@ def get_board_state_for_assistant(
 def get_board_state_for_user(
     logger, conversation_id_hash, game_state: GameState, turn, scheme, host
 ):
-    stockfish = get_stockfish(2850, game_state.board.fen())
-    best_moves = get_best_moves(stockfish)
-    best_moves_san = [
-        game_state.board.san(chess.Move.from_uci(move["Move"])) for move in best_moves
-    ]
+    analysis = analyse_position(game_state.board, 2850, HINT_BUDGET)
+    best_moves_san = [game_state.board.san(move) for move in analysis.moves]
+    if analysis.moves:
+        # start on the assistant's reply to the most likely user move
+        ponder_after_move(
+            conversation_id_hash,
+            game_state.board,
+            analysis.moves[0],
+            game_state.elo,
+            get_search_budget(game_state.elo),
+        )
     instructions = (
         f"It's the user's turn to move. The user is playing {turn}. Show the board to the user using the markdown from the display field. Prompt the user to make their move using SAN notation"  # noqa: E501
         + " (e.g. e4, Nf3, etc). Use the make move API to make the move for the user."
@@ -114,6 +133,7 @@ def get_board_state_for_user(
         "game_over": False,
         "display": get_markdown(logger, conversation_id_hash, game_state, scheme, host),
         "best_moves": ", ".join(best_moves_san),
+        "move_source": analysis.source,
         "EXTRA_INFORMATION_TO_ASSISTANT": instructions,
     }
 
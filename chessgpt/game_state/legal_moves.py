@@ -0,0 +1,87 @@
+import re
+import threading
+from collections import namedtuple
+
+import chess
+import chess.polyglot
+from cachetools import LRUCache
+
+# positions whose legal moves we keep, a game only needs the last couple
+MOVE_INDEX_CACHE_SIZE = 4096
+
+_move_indexes = LRUCache(maxsize=MOVE_INDEX_CACHE_SIZE)
+_move_indexes_lock = threading.Lock()
+
+# the legal moves of a position, san lists them in board.legal_moves order, moves
+# maps every way of writing a move we accept to the move and sans maps each move to
+# its SAN
+MoveIndex = namedtuple("MoveIndex", ["san", "moves", "sans"])
+
+# annotations people add to a move that don't change it
+ANNOTATIONS = re.compile(r"[+#!?\s]+$")
+CASTLING = {"O-O": "O-O", "O-O-O": "O-O-O", "0-0": "O-O", "0-0-0": "O-O-O"}
+
+
+def build_move_index(board) -> MoveIndex:
+    san = []
+    moves = {}
+    sans = {}
+    for move in board.legal_moves:
+        move_san = board.san(move)
+        san.append(move_san)
+        sans[move] = move_san
+        piece = board.piece_type_at(move.from_square)
+        promotion = (
+            "=" + chess.piece_symbol(move.promotion).upper() if move.promotion else ""
+        )
+        # LAN with the - left out, Ng1f3, Bf1xb5 and e7e8=Q
+        lan = (
+            ("" if piece == chess.PAWN else chess.piece_symbol(piece).upper())
+            + chess.square_name(move.from_square)
+            + ("x" if board.is_capture(move) else "")
+            + chess.square_name(move.to_square)
+            + promotion
+        )
+        for key in [move_san, move_san.rstrip("+#"), move.uci(), lan]:
+            moves.setdefault(key, move)
+    return MoveIndex(san, moves, sans)
+
+
+def get_move_index(board) -> MoveIndex:
+    """Returns the legal moves of the board, built once per position"""
+    # the zobrist hash covers everything that changes the legal moves
+    key = chess.polyglot.zobrist_hash(board)
+    with _move_indexes_lock:
+        move_index = _move_indexes.get(key)
+    if move_index is None:
+        move_index = build_move_index(board)
+        with _move_indexes_lock:
+            _move_indexes[key] = move_index
+    return move_index
+
+
+def normalise_move(text):
+    """Tidies up the ways people write moves into the forms in the index"""
+    text = ANNOTATIONS.sub("", text.strip())
+    castling = CASTLING.get(text.upper())
+    if castling:
+        return castling
+    # e2-e4 and Ng1-f3
+    return text.replace("-", "")
+
+
+def resolve_move(board, text):
+    """Returns the legal move written as text, or None if there isn't one"""
+    moves = get_move_index(board).moves
+    move = moves.get(text)
+    if move is not None:
+        return move
+    text = normalise_move(text)
+    move = moves.get(text)
+    if move is None and text:
+        # lowercase pieces, nf3 - bxc3 is a pawn capture if there is one
+        move = moves.get(text[0].upper() + text[1:])
+    if move is None and text[-2:-1] == "=":
+        # lowercase promotions, e8=q
+        move = moves.get(text[:-1] + text[-1].upper())
+    return move
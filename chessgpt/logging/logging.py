@@ -4,6 +4,8 @@ from logging.handlers import SysLogHandler
 
 from flask import request
 
+from .shipping import ship_logs
+
 
 def setup_logging(app):
     # setup logging
@@ -14,27 +16,28 @@ def setup_logging(app):
     papertrail_app_name = os.environ.get("PAPERTRAIL_APP_NAME")
     # set the name of the app for papertrail
     if papertrail_app_name:
-
-        class RequestFormatter(logging.Formatter):
-            def format(self, record):
-                if hasattr(record, "pathname"):
-                    # ensure we have a request context
-                    if request:
-                        record.pathname = request.path
-                return super().format(record)
-
         app.logger.name = papertrail_app_name
         syslog = SysLogHandler(address=("logs6.papertrailapp.com", 47875))
         syslog.setLevel(logging.INFO)
-        formatter = RequestFormatter(
-            f"{papertrail_app_name}: chess %(levelname)s %(pathname)s %(message)s"
+        formatter = logging.Formatter(
+            f"{papertrail_app_name}: chess %(levelname)s %(request_path)s %(message)s"
         )
         syslog.setFormatter(formatter)
-        app.logger.addHandler(syslog)
+        # sending to papertrail happens in the background, off the request
+        listener = ship_logs(app.logger, syslog)
+
+        if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+            # lambda freezes the background thread between invocations, so send
+            # everything before the response goes back
+            @app.teardown_request
+            def flush_logs(exception):
+                listener.flush()
 
     @app.before_request
     def log_request_info():
-        if not getattr(request.endpoint, "_exclude_from_log", False):
+        # the flag is on the view function, request.endpoint is only its name
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, "_exclude_from_log", False):
             # dump the query params and body
             app.logger.info("Request: %s", request.url)
             # app.logger.info("Body: %s", request.get_data())
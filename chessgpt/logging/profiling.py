@@ -0,0 +1,162 @@
+"""
+Profiles requests with cProfile and writes the profiles to a spool directory, so hot
+spots can be found in production without redeploying.
+
+Nothing is registered unless PROFILE_DIR is set along with a way to pick requests:
+
+    PROFILE_DIR         - directory to write the profiles to
+    PROFILE_TOKEN       - requests with an X-Profile header of this token are profiled
+    PROFILE_SAMPLE_RATE - share of all requests to profile, 0 to 1
+    PROFILE_MAX_FILES   - profiles to keep before we stop writing more, 500
+
+Each profile is a .prof file, readable by pstats and snakeviz, with a .json file of
+the route, conversation and timings beside it. Add them up with:
+
+    python -m chessgpt.logging.profiling /tmp/profiles --top 30
+"""
+import argparse
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+
+from flask import g, request
+
+from chessgpt.utils.openai import get_conversation_id_hash
+
+
+def should_profile(token, sample_rate):
+    header = request.headers.get("X-Profile")
+    if token and header and hmac.compare_digest(header, token):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def count_profiles(directory):
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries if entry.name.endswith(".prof"))
+
+
+def write_profile(directory, profile, metadata):
+    name = f"{int(metadata['start'])}-{uuid.uuid4().hex[:8]}"
+    profile.dump_stats(os.path.join(directory, name + ".prof"))
+    with open(os.path.join(directory, name + ".json"), "w") as f:
+        json.dump(metadata, f)
+
+
+def setup_profiling(app):
+    directory = os.environ.get("PROFILE_DIR")
+    token = os.environ.get("PROFILE_TOKEN")
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    max_files = int(os.environ.get("PROFILE_MAX_FILES", "500"))
+    if not directory or not (token or sample_rate > 0):
+        return
+    os.makedirs(directory, exist_ok=True)
+    # only paid for when profiling is switched on, it's not needed to start up
+    import cProfile
+
+    @app.before_request
+    def start_profile():
+        if not should_profile(token, sample_rate):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is already running on this thread
+            return
+        g.profile = profile
+        g.profile_start = time.time()
+
+    @app.after_request
+    def record_status(response):
+        if "profile" in g:
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(exception):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        if count_profiles(directory) >= max_files:
+            app.logger.warning(f"Not writing profile, {directory} is full")
+            return
+        conversation_id = request.headers.get("Openai-Conversation-Id")
+        write_profile(
+            directory,
+            profile,
+            {
+                "method": request.method,
+                "route": request.url_rule.rule if request.url_rule else request.path,
+                "conversation_id_hash": (
+                    get_conversation_id_hash(conversation_id)
+                    if conversation_id
+                    else None
+                ),
+                "status": g.pop("profile_status", None),
+                "start": g.profile_start,
+                "duration_ms": round((time.time() - g.profile_start) * 1000, 2),
+            },
+        )
+
+
+def read_profiles(directory, route=None):
+    """Returns the paths and metadata of the profiles, only of the route if given"""
+    profiles = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".prof"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path[: -len(".prof")] + ".json") as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {}
+        if route is None or metadata.get("route") == route:
+            profiles.append((path, metadata))
+    return profiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m chessgpt.logging.profiling",
+        description="Adds up the profiles in a spool directory",
+    )
+    parser.add_argument("directory", help="PROFILE_DIR the profiles were written to")
+    parser.add_argument("--top", type=int, default=20, help="functions to show")
+    parser.add_argument(
+        "--sort",
+        choices=["cumulative", "tottime", "ncalls"],
+        default="cumulative",
+        help="what to rank the functions by",
+    )
+    parser.add_argument("--route", help="only the profiles of this route")
+    args = parser.parse_args(argv)
+    import pstats
+
+    profiles = read_profiles(args.directory, args.route)
+    if not profiles:
+        parser.error(f"No profiles in {args.directory}")
+    routes = {}
+    for _, metadata in profiles:
+        key = f"{metadata.get('method', '?')} {metadata.get('route', '?')}"
+        routes.setdefault(key, []).append(metadata.get("duration_ms", 0))
+    print(f"{len(profiles)} profiles")
+    for key, durations in sorted(routes.items(), key=lambda item: -len(item[1])):
+        mean = sum(durations) / len(durations)
+        print(
+            f"  {key:<30} {len(durations):5} requests, "
+            f"mean {mean:8.1f}ms, max {max(durations):8.1f}ms"
+        )
+    print()
+    stats = pstats.Stats(*[path for path, _ in profiles])
+    stats.strip_dirs().sort_stats(args.sort).print_stats(args.top)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
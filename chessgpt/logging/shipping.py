@@ -0,0 +1,213 @@
+"""
+Ships log records from a background thread so requests never wait on the network.
+
+Records are filtered and put on a bounded queue by the request thread. A listener
+thread takes them off in batches and hands them to the real handler (the Papertrail
+syslog handler, or MemorySink in tests). If the queue is full the record is dropped
+rather than making the request wait.
+
+Busy INFO and DEBUG messages can be thinned out, warnings and errors always get
+through:
+
+    LOG_SAMPLE_RATES - share of each logger's records to keep, "name=0.1,other=0.5"
+    LOG_RATE_LIMIT   - records per second from each line of code, 0 for no limit
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler
+
+from cachetools import LRUCache
+from flask import has_request_context, request
+
+# records waiting to be shipped before new ones are dropped
+QUEUE_SIZE = 10000
+# most records handed to the handler at once
+BATCH_SIZE = 100
+# how long the first record of a batch waits for others to join it
+BATCH_WAIT = 0.2
+
+# put on the queue to stop the listener
+_STOP = object()
+
+
+def parse_sample_rates(text):
+    """Parses "name=rate,name=rate" into a dict of logger names to rates"""
+    rates = {}
+    for pair in (text or "").split(","):
+        if "=" in pair:
+            name, rate = pair.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class SampleFilter(logging.Filter):
+    """Keeps a share of each logger's INFO and DEBUG records"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets each line of code log up to `per_second` INFO and DEBUG records a second on
+    average, in bursts of up to `burst`, and drops the rest.
+    """
+
+    def __init__(self, per_second, burst=None):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or per_second
+        self.dropped = 0
+        # token buckets of the lines we've seen recently, (tokens, last refill)
+        self._buckets = LRUCache(maxsize=1024)
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        # where the record was logged from, f-strings make every message different
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.dropped += 1
+            self._buckets[key] = (tokens, now)
+        return allowed
+
+
+class RequestPathFilter(logging.Filter):
+    """Adds the request's path as request_path, it's gone by the time we format it"""
+
+    def filter(self, record):
+        record.request_path = request.path if has_request_context() else "-"
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """A QueueHandler that drops records when the queue is full instead of erroring"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    """Takes records off the queue in a background thread and handles them in batches"""
+
+    def __init__(
+        self, log_queue, handler, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT
+    ):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="log-shipping", daemon=True
+        )
+        self._thread.start()
+
+    def flush(self, timeout=2.0):
+        """Waits until everything logged so far has been handled"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def stop(self):
+        """Handles everything logged so far and stops the thread"""
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _next_batch(self):
+        """Returns the next batch of records and the flush or stop that ended it"""
+        batch = []
+        item = self.queue.get()
+        deadline = time.monotonic() + self.batch_wait
+        while isinstance(item, logging.LogRecord):
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, None
+            try:
+                item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return batch, None
+        return batch, item
+
+    def _run(self):
+        while True:
+            batch, control = self._next_batch()
+            for record in batch:
+                self.handler.handle(record)
+            if batch:
+                self.handler.flush()
+            if control is _STOP:
+                return
+            if control is not None:
+                control.set()
+
+
+class MemorySink(logging.Handler):
+    """A stand-in for the syslog handler that keeps the formatted records"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.batches = 0
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+    def flush(self):
+        self.batches += 1
+
+
+def ship_logs(logger, handler):
+    """
+    Sends the logger's records to the handler from a background thread, sampled and
+    rate limited as configured, and returns the listener so it can be flushed
+    """
+    log_queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setLevel(handler.level)
+    queue_handler.addFilter(
+        SampleFilter(parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES")))
+    )
+    rate_limit = float(os.environ.get("LOG_RATE_LIMIT", "20"))
+    if rate_limit > 0:
+        queue_handler.addFilter(RateLimitFilter(rate_limit))
+    queue_handler.addFilter(RequestPathFilter())
+    listener = BatchingQueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
+    return listener
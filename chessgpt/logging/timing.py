@@ -0,0 +1,101 @@
+"""
+Times the stages of a request, loading the game, waiting for the engine and so on,
+with spans that add up how long each stage took:
+
+    with span("db-load"):
+        result = client.get_item(...)
+
+A sample of requests, TIMING_SAMPLE_RATE of them, are traced. Traced requests get a
+Server-Timing header, which browser dev tools show, and a JSON log line with the
+timings. Spans outside a traced request (background threads, scripts) do nothing.
+"""
+import json
+import os
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import g, has_app_context, request
+
+# handed out for every span when the request isn't traced, so they cost next to nothing
+_NOT_TRACED = nullcontext()
+
+
+class Trace:
+    """The time spent in each stage of a request and how many times it ran"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration, count = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (duration + time.perf_counter() - start, count + 1)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def get_trace():
+    """Returns the current request's trace, or None if it isn't being traced"""
+    if not has_app_context():
+        return None
+    return g.get("trace")
+
+
+def span(name):
+    """Times the block as a stage of the current request if it's being traced"""
+    trace = get_trace()
+    if trace is None:
+        return _NOT_TRACED
+    return trace.span(name)
+
+
+def server_timing(trace):
+    # stages in the order they first ran, durations in milliseconds
+    metrics = [
+        f"{name};dur={duration * 1000:.2f}"
+        + (f';desc="x{count}"' if count > 1 else "")
+        for name, (duration, count) in trace.stages.items()
+    ]
+    metrics.append(f"total;dur={trace.elapsed() * 1000:.2f}")
+    return ", ".join(metrics)
+
+
+def setup_timing(app):
+    sample_rate = float(os.environ.get("TIMING_SAMPLE_RATE", "0"))
+    if sample_rate <= 0:
+        return
+
+    @app.before_request
+    def start_trace():
+        if sample_rate >= 1 or random.random() < sample_rate:
+            g.trace = Trace()
+
+    @app.after_request
+    def finish_trace(response):
+        trace = g.pop("trace", None)
+        if trace is None:
+            return response
+        response.headers["Server-Timing"] = server_timing(trace)
+        app.logger.info(
+            "Timing: %s",
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "total_ms": round(trace.elapsed() * 1000, 2),
+                    "stages": {
+                        name: {"ms": round(duration * 1000, 2), "count": count}
+                        for name, (duration, count) in trace.stages.items()
+                    },
+                }
+            ),
+        )
+        return response
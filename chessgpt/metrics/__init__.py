@@ -0,0 +1,3 @@
+from .registry import Counter, Gauge, Histogram, Registry, get_registry
+
+__all__ = ["Counter", "Gauge", "Histogram", "Registry", "get_registry"]
@@ -0,0 +1,46 @@
+from .registry import get_registry
+
+_registry = get_registry()
+
+REQUESTS = _registry.counter(
+    "chessgpt_requests_total",
+    "Requests served by route and status",
+    ["method", "route", "status"],
+)
+REQUEST_SECONDS = _registry.histogram(
+    "chessgpt_request_duration_seconds",
+    "Time taken to serve a request by route",
+    ["method", "route"],
+)
+ENGINE_SEARCH_SECONDS = _registry.histogram(
+    "chessgpt_engine_search_duration_seconds",
+    "Time taken by engine searches",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+ENGINE_SEARCH_NODES = _registry.histogram(
+    "chessgpt_engine_search_nodes",
+    "Nodes searched by engine searches that report them",
+    buckets=(1000, 10000, 50000, 100000, 250000, 500000, 1000000, 5000000),
+)
+DYNAMODB_SECONDS = _registry.histogram(
+    "chessgpt_dynamodb_duration_seconds",
+    "Time taken by DynamoDB calls by operation",
+    ["operation"],
+)
+DYNAMODB_CONFLICTS = _registry.counter(
+    "chessgpt_dynamodb_conflicts_total",
+    "Saves rejected because another request saved the game first, which are retried",
+)
+SVG_RENDERS = _registry.counter(
+    "chessgpt_svg_renders_total", "Boards rendered to SVG, cache hits aren't rendered"
+)
+SVG_CACHE_EVENTS = _registry.counter(
+    "chessgpt_svg_cache_events_total",
+    "Rendered board cache hits, misses, evictions and 304 responses",
+    ["event"],
+)
+GAME_LENGTH = _registry.histogram(
+    "chessgpt_game_length_plies",
+    "Moves played in games that have finished",
+    buckets=(10, 20, 40, 60, 80, 100, 120, 160, 200, 300),
+)
@@ -0,0 +1,241 @@
+"""
+An in-process metrics registry that renders the Prometheus text format.
+
+Counters and histograms are split into shards picked by the recording thread, each
+with its own lock, so threads serving requests at the same time rarely wait on each
+other. The shards are only added up when the metrics are collected. Gauges are
+callbacks that are read at collection time, so components can report what they
+already keep track of.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# enough that the threads of a busy worker rarely share a shard
+SHARDS = 16
+
+# seconds, the Prometheus client's defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class _Shard:
+    __slots__ = ["lock", "values"]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+
+def format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labelnames, labels, extra=""):
+    pairs = [
+        f'{name}="{escape_label(str(value))}"'
+        for name, value in zip(labelnames, labels)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = [_Shard() for _ in range(SHARDS)]
+
+    def _shard(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} has labels {', '.join(self.labelnames)}")
+        # native ids are handed out in sequence, so busy threads spread evenly
+        return self._shards[threading.get_native_id() % SHARDS]
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard(labels)
+        with shard.lock:
+            shard.values[labels] = shard.values.get(labels, 0) + amount
+
+    def collect(self):
+        """Returns the count for each set of labels"""
+        totals = {}
+        for shard in self._shards:
+            with shard.lock:
+                values = list(shard.values.items())
+            for labels, value in values:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self):
+        lines = self.header()
+        for labels, value in sorted(self.collect().items()):
+            lines.append(
+                f"{self.name}{format_labels(self.labelnames, labels)} "
+                + format_value(value)
+            )
+        return lines
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        shard = self._shard(labels)
+        # the last bucket is everything over the largest bound
+        index = bisect.bisect_left(self.buckets, value)
+        with shard.lock:
+            counts = shard.values.get(labels)
+            if counts is None:
+                # a count for each bucket then the sum of the values
+                counts = shard.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observes how many seconds the block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def collect(self):
+        """Returns the bucket counts, not cumulative, and sum of each set of labels"""
+        totals = {}
+        for shard in self._shards:
+            with shard.lock:
+                values = [
+                    (labels, list(counts)) for labels, counts in shard.values.items()
+                ]
+            for labels, counts in values:
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = counts
+                else:
+                    totals[labels] = [a + b for a, b in zip(total, counts)]
+        return totals
+
+    def render(self):
+        lines = self.header()
+        for labels, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    A value read from a callback when the metrics are collected. The callback
+    returns a number, or a dict of label values to numbers if the gauge has labels.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def collect(self):
+        value = self.callback()
+        if not self.labelnames:
+            return {(): value}
+        return {
+            labels if isinstance(labels, tuple) else (labels,): value
+            for labels, value in value.items()
+        }
+
+    def render(self):
+        lines = self.header()
+        for labels, value in sorted(self.collect().items()):
+            lines.append(
+                f"{self.name}{format_labels(self.labelnames, labels)} "
+                + format_value(value)
+            )
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric, replace=False):
+        with self._lock:
+            if metric.name in self._metrics and not replace:
+                raise ValueError(f"{metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()) -> Gauge:
+        """Registers a gauge, replacing any gauge with the same name"""
+        return self._add(Gauge(name, documentation, callback, labelnames), replace=True)
+
+    def render(self):
+        """Returns every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # a broken gauge shouldn't take the rest of the metrics with it
+                continue
+        return "\n".join(lines) + "\n"
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = Registry()
+        return _registry
@@ -0,0 +1,12 @@
+from .cache import get_svg_cache, render_key
+
+__all__ = ["get_svg_cache", "render_key", "render_svg"]
+
+
+def __getattr__(name):
+    # chess.svg and the piece templates are only loaded when a board is first drawn
+    if name == "render_svg":
+        from .svg import render_svg
+
+        return render_svg
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
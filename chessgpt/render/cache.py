@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+import chess
+from cachetools import LRUCache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, we only serve gzip without it
+    brotli = None
+
+_svg_cache = None
+_svg_cache_lock = threading.Lock()
+
+# a rendered board, etag is the strong validator of the uncompressed body and
+# variants maps each content encoding ("identity", "gzip", "br") to the body
+RenderedBoard = namedtuple("RenderedBoard", ["etag", "variants"])
+
+# each encoding is a different representation, so it needs a validator of its own
+ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+def render_key(board, orientation, lastmove, size):
+    """Everything that changes the picture, a board with the same key looks the same"""
+    check = board.king(board.turn) if board.is_check() else None
+    return " ".join(
+        [
+            board.board_fen(),
+            "w" if orientation == chess.WHITE else "b",
+            lastmove.uci() if lastmove else "-",
+            chess.square_name(check) if check is not None else "-",
+            str(size),
+        ]
+    )
+
+
+def variant_etag(rendered, encoding):
+    """Returns the strong ETag of the body served with the content encoding"""
+    return rendered.etag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+
+
+def compress_variants(svg):
+    data = svg.encode()
+    # mtime=0 so the same board always compresses to the same bytes
+    variants = {"identity": data, "gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data)
+    return variants
+
+
+class _LRUCache(LRUCache):
+    def __init__(self, maxsize, getsizeof, on_evict):
+        super().__init__(maxsize=maxsize, getsizeof=getsizeof)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_evict()
+        return item
+
+
+class SvgCache:
+    """
+    LRU cache of rendered boards and their compressed variants, capped by size in bytes.
+
+    Listeners are called with the name of each event - "hit", "miss", "eviction"
+    and "not_modified" - so the numbers can be sent on to metrics.
+    """
+
+    def __init__(self, max_bytes):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+        self._listeners = []
+        # evictions happen while we hold the lock and are reported to the listeners,
+        # which may want the stats
+        self._lock = threading.RLock()
+        self._cache = _LRUCache(
+            max_bytes,
+            lambda rendered: sum(len(body) for body in rendered.variants.values()),
+            lambda: self._record("eviction"),
+        )
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def get(self, key, render):
+        """Returns the rendered board for the key, calling render() to draw it on a miss"""
+        with self._lock:
+            rendered = self._cache.get(key)
+        if rendered is not None:
+            self._record("hit")
+            return rendered
+        self._record("miss")
+        rendered = RenderedBoard(
+            '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"',
+            compress_variants(render()),
+        )
+        with self._lock:
+            try:
+                self._cache[key] = rendered
+            except ValueError:
+                # bigger than the whole cache
+                pass
+        return rendered
+
+    def record_not_modified(self):
+        self._record("not_modified")
+
+    def _record(self, event):
+        # the counters are only approximate under concurrent requests
+        if event == "hit":
+            self.hits += 1
+        elif event == "miss":
+            self.misses += 1
+        elif event == "eviction":
+            self.evictions += 1
+        elif event == "not_modified":
+            self.not_modified += 1
+        for listener in self._listeners:
+            listener(event)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+            currsize = self._cache.currsize
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "not_modified": self.not_modified,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "bytes": currsize,
+        }
+
+
+def get_svg_cache():
+    global _svg_cache
+    with _svg_cache_lock:
+        if _svg_cache is None:
+            _svg_cache = SvgCache(
+                int(os.environ.get("SVG_CACHE_BYTES", str(16 * 1024 * 1024)))
+            )
+        return _svg_cache
@@ -0,0 +1,163 @@
+import chess
+import chess.svg
+
+# Draws the same picture as chess.svg.board with its default colors, borders off
+# and coordinates on, but from strings built once at import. Every piece and
+# coordinate glyph is defined once in <defs> and placed with <use>, so a board is
+# a header, the defs of the pieces on it, 64 squares and a <use> per piece.
+SQUARE_SIZE = chess.svg.SQUARE_SIZE
+# the width of the coordinate margin chess.svg.board uses
+MARGIN = 15
+FULL_SIZE = 2 * MARGIN + 8 * SQUARE_SIZE
+COLORS = chess.svg.DEFAULT_COLORS
+
+HEADER = (
+    '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+    f' viewBox="0 0 {FULL_SIZE} {FULL_SIZE}" width="{{size}}" height="{{size}}">'
+)
+
+
+def _use(href, transform, extra=""):
+    return (
+        f'<use href="#{href}" xlink:href="#{href}" transform="{transform}"{extra} />'
+    )
+
+
+def _square_offset(square, orientation):
+    file_index = chess.square_file(square)
+    rank_index = chess.square_rank(square)
+    x = (file_index if orientation else 7 - file_index) * SQUARE_SIZE + MARGIN
+    y = (7 - rank_index if orientation else rank_index) * SQUARE_SIZE + MARGIN
+    return x, y
+
+
+def _piece_def(piece):
+    return chess.svg.PIECES[piece.symbol()]
+
+
+def _coord_def(name):
+    return chess.svg.COORDS[name].replace("<path ", f'<path id="coord-{name}" ', 1)
+
+
+# the glyphs are drawn at 3/4 size and centred along the edge, like chess.svg._coord
+COORD_SCALE = MARGIN / chess.svg.MARGIN
+COORD_SHIFT = int(SQUARE_SIZE - COORD_SCALE * SQUARE_SIZE) // 2
+
+
+def _coord(name, x, y):
+    return _use(
+        f"coord-{name}",
+        f"translate({x}, {y}) scale({COORD_SCALE}, {COORD_SCALE})",
+        f' fill="{COLORS["coord"]}" stroke="{COLORS["coord"]}"',
+    )
+
+
+def _frame(orientation):
+    """The margin and coordinates around the board"""
+    parts = [
+        f'<rect x="{MARGIN / 2}" y="{MARGIN / 2}" width="{FULL_SIZE - MARGIN}"'
+        f' height="{FULL_SIZE - MARGIN}" fill="none" stroke="{COLORS["margin"]}"'
+        f' stroke-width="{MARGIN}" />'
+    ]
+    for file_index, file_name in enumerate(chess.FILE_NAMES):
+        x = (file_index if orientation else 7 - file_index) * SQUARE_SIZE + MARGIN
+        parts.append(_coord(file_name, x + COORD_SHIFT, 1))
+        parts.append(_coord(file_name, x + COORD_SHIFT, FULL_SIZE - MARGIN))
+    for rank_index, rank_name in enumerate(chess.RANK_NAMES):
+        y = (7 - rank_index if orientation else rank_index) * SQUARE_SIZE + MARGIN
+        parts.append(_coord(rank_name, 0, y + COORD_SHIFT))
+        parts.append(_coord(rank_name, FULL_SIZE - MARGIN, y + COORD_SHIFT))
+    return "".join(parts)
+
+
+def _square(square, orientation, lastmove):
+    x, y = _square_offset(square, orientation)
+    light = chess.BB_LIGHT_SQUARES & chess.BB_SQUARES[square]
+    cls = "square light" if light else "square dark"
+    if lastmove:
+        cls += " lastmove"
+    return (
+        f'<rect x="{x}" y="{y}" width="{SQUARE_SIZE}" height="{SQUARE_SIZE}"'
+        f' class="{cls} {chess.SQUARE_NAMES[square]}" stroke="none"'
+        f' fill="{COLORS[cls]}" />'
+    )
+
+
+ORIENTATIONS = [chess.BLACK, chess.WHITE]
+
+# everything below is indexed by [orientation] first, then by square
+FRAMES = [_frame(orientation) for orientation in ORIENTATIONS]
+SQUARES = [
+    [_square(square, orientation, False) for square in chess.SQUARES]
+    for orientation in ORIENTATIONS
+]
+LASTMOVE_SQUARES = [
+    [_square(square, orientation, True) for square in chess.SQUARES]
+    for orientation in ORIENTATIONS
+]
+CHECKS = [
+    [
+        '<rect x="{}" y="{}" width="{size}" height="{size}" class="check"'
+        ' fill="url(#check_gradient)" />'.format(
+            *_square_offset(square, orientation), size=SQUARE_SIZE
+        )
+        for square in chess.SQUARES
+    ]
+    for orientation in ORIENTATIONS
+]
+
+# (definition, [orientation][square] placements, color, piece type) of each piece
+PIECE_TEMPLATES = [
+    (
+        _piece_def(chess.Piece(piece_type, color)),
+        [
+            [
+                _use(
+                    f"{chess.COLOR_NAMES[color]}-{chess.PIECE_NAMES[piece_type]}",
+                    "translate({}, {})".format(*_square_offset(square, orientation)),
+                )
+                for square in chess.SQUARES
+            ]
+            for orientation in ORIENTATIONS
+        ],
+        color,
+        piece_type,
+    )
+    for color in chess.COLORS
+    for piece_type in chess.PIECE_TYPES
+]
+
+COORD_DEFS = "".join(_coord_def(name) for name in chess.FILE_NAMES + chess.RANK_NAMES)
+
+
+def render_svg(board, orientation=chess.WHITE, lastmove=None, check=None, size=400):
+    """Returns the board as an SVG, check is the square to highlight if there is one"""
+    squares = SQUARES[orientation]
+    if lastmove:
+        squares = list(squares)
+        lastmove_squares = LASTMOVE_SQUARES[orientation]
+        squares[lastmove.from_square] = lastmove_squares[lastmove.from_square]
+        squares[lastmove.to_square] = lastmove_squares[lastmove.to_square]
+    defs = [COORD_DEFS]
+    pieces = []
+    for definition, placements, color, piece_type in PIECE_TEMPLATES:
+        mask = board.pieces_mask(piece_type, color)
+        if mask:
+            defs.append(definition)
+            placements = placements[orientation]
+            pieces.extend(placements[square] for square in chess.scan_forward(mask))
+    if check is not None:
+        defs.append(chess.svg.CHECK_GRADIENT)
+    return "".join(
+        [
+            HEADER.format(size=size),
+            "<defs>",
+            *defs,
+            "</defs>",
+            FRAMES[orientation],
+            *squares,
+            CHECKS[orientation][check] if check is not None else "",
+            *pieces,
+            "</svg>",
+        ]
+    )
@@ -0,0 +1,30 @@
+from flask import jsonify, request
+from chessgpt.authentication.authentication import check_auth
+
+from chessgpt.stockfish.review import CLASSIFICATIONS, review_game
+from chessgpt.utils.openai import get_conversation_id_hash
+
+
+def get_analysis_routes(app):
+    @app.route("/api/analysis", methods=["GET"])
+    @check_auth
+    def get_analysis():
+        conversation_id = request.headers.get("Openai-Conversation-Id")
+        conversation_id_hash = get_conversation_id_hash(conversation_id)
+        game_state = app.database.load_game_state(conversation_id_hash)
+
+        if not game_state:
+            app.logger.error(f"No game found for conversation ID: {conversation_id}")
+            return jsonify({"success": False, "message": "No game found"}), 404
+        moves = []
+        summary = {
+            color: {classification: 0 for _, classification in CLASSIFICATIONS}
+            for color in ["white", "black"]
+        }
+        for reviewed_move in review_game(game_state.move_history):
+            moves.append(reviewed_move._asdict())
+            if reviewed_move.classification:
+                color = "white" if reviewed_move.ply % 2 else "black"
+                summary[color][reviewed_move.classification] += 1
+        app.logger.info(f"Reviewed {len(moves)} moves")
+        return jsonify({"moves": moves, "summary": summary})
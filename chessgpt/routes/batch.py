@@ -0,0 +1,175 @@
+from flask import jsonify, request
+from chessgpt.authentication.authentication import check_auth
+from chessgpt.database.dynamodb import GameStateConflictError
+
+from chessgpt.game_state.game_state import format_moves, get_board_state
+from chessgpt.metrics.metrics import GAME_LENGTH
+from chessgpt.stockfish.ponder import discard_stale_ponders
+from chessgpt.utils.openai import get_conversation_id_hash
+from .move import get_illegal_move_state, try_make_move
+from .new_game import make_new_game
+
+# enough for a new game and a few moves, each move runs a search
+MAX_BATCH_OPERATIONS = 10
+
+OPERATIONS = ["new_game", "move", "fen", "move_history"]
+
+
+def operation_result(op, status, body):
+    return {"op": op, "status": status, "result": body}
+
+
+def run_operations(app, conversation_id_hash, operations):
+    """
+    Runs the operations in order on one copy of the game, stopping at the first one
+    that fails. The game is loaded at most once and isn't saved.
+
+    Returns the results of the operations that ran, the game state, whether it's a
+    new game and whether any moves were made.
+    """
+    results = []
+    game_state = None
+    created = False
+    moved = False
+    for operation in operations:
+        op = operation.get("op") if isinstance(operation, dict) else None
+        if op not in OPERATIONS:
+            results.append(
+                operation_result(
+                    op, 400, {"success": False, "message": f"Unknown operation: {op}"}
+                )
+            )
+            break
+        if op == "new_game":
+            new_game_state, error = make_new_game(app, operation)
+            if error:
+                results.append(operation_result(op, 400, error))
+                break
+            game_state = new_game_state
+            created = True
+            results.append(
+                operation_result(
+                    op,
+                    200,
+                    get_board_state(
+                        app.logger,
+                        conversation_id_hash,
+                        game_state,
+                        request.scheme,
+                        request.host,
+                    ),
+                )
+            )
+            continue
+        if game_state is None:
+            game_state = app.database.load_game_state(conversation_id_hash)
+            if not game_state:
+                app.logger.error("No game found")
+                results.append(
+                    operation_result(
+                        op, 404, {"success": False, "message": "No game found"}
+                    )
+                )
+                break
+        if op == "move":
+            if "move" not in operation:
+                results.append(
+                    operation_result(
+                        op,
+                        400,
+                        {"success": False, "message": "Missing move in operation"},
+                    )
+                )
+                break
+            move = operation["move"]
+            if not try_make_move(app, game_state, move):
+                results.append(
+                    operation_result(
+                        op,
+                        400,
+                        get_illegal_move_state(
+                            app, conversation_id_hash, game_state, move
+                        ),
+                    )
+                )
+                break
+            moved = True
+            results.append(
+                operation_result(
+                    op,
+                    200,
+                    get_board_state(
+                        app.logger,
+                        conversation_id_hash,
+                        game_state,
+                        request.scheme,
+                        request.host,
+                    ),
+                )
+            )
+        elif op == "fen":
+            results.append(operation_result(op, 200, {"FEN": game_state.board.fen()}))
+        elif op == "move_history":
+            moves = format_moves(app.logger, game_state.move_history)
+            results.append(operation_result(op, 200, {"move_history": moves}))
+    return results, game_state, created, moved
+
+
+def batch_routes(app):
+    @app.route("/api/batch", methods=["POST"])
+    @check_auth
+    def batch():
+        conversation_id = request.headers.get("Openai-Conversation-Id")
+        conversation_id_hash = get_conversation_id_hash(conversation_id)
+        data = request.get_json()
+
+        operations = data.get("operations") if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            app.logger.error("Missing operations in request data")
+            return (
+                jsonify(
+                    {"success": False, "message": "Missing operations in request data"}
+                ),
+                400,
+            )
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "message": f"Too many operations, the most is {MAX_BATCH_OPERATIONS}",
+                    }
+                ),
+                400,
+            )
+
+        results, game_state, created, moved = run_operations(
+            app, conversation_id_hash, operations
+        )
+        # save everything the operations did in one write
+        if created:
+            app.database.create_game_state(conversation_id_hash, game_state)
+        elif moved:
+            try:
+                app.database.save_game_state(conversation_id_hash, game_state)
+            except GameStateConflictError:
+                app.logger.error("Game changed while running the batch")
+                return (
+                    jsonify(
+                        {
+                            "success": False,
+                            "message": "The game was changed by another request, please try again",
+                        }
+                    ),
+                    409,
+                )
+        if moved:
+            discard_stale_ponders(conversation_id_hash, game_state.board)
+            if game_state.board.is_game_over():
+                GAME_LENGTH.observe(len(game_state.move_history))
+        return jsonify(
+            {
+                "success": all(result["status"] == 200 for result in results),
+                "results": results,
+            }
+        )
@@ -1,7 +1,46 @@
-import chess.svg
+import chess
 from flask import jsonify, request, Response
 
 from chessgpt.compression.huffman import decode_board
+from chessgpt.compression.position import decode_position, is_position
+from chessgpt.metrics.metrics import SVG_RENDERS
+from chessgpt.render.cache import get_svg_cache, render_key, variant_etag
+
+SIZE = 400
+
+
+def render_board(board, orientation=chess.WHITE, lastmove=None):
+    # imported on the first render so it's not part of every cold start
+    from chessgpt.render.svg import render_svg
+
+    SVG_RENDERS.inc()
+    check = board.king(board.turn) if board.is_check() else None
+    return render_svg(board, orientation, lastmove, check, SIZE)
+
+
+def svg_response(board, orientation=chess.WHITE, lastmove=None):
+    cache = get_svg_cache()
+    rendered = cache.get(
+        render_key(board, orientation, lastmove, SIZE),
+        lambda: render_board(board, orientation, lastmove),
+    )
+    encoding = request.accept_encodings.best_match(
+        [encoding for encoding in ["br", "gzip"] if encoding in rendered.variants],
+        default="identity",
+    )
+    # only a match for the body we'd send now, not another encoding of it
+    etag = variant_etag(rendered, encoding)
+    if etag.strip('"') in request.if_none_match:
+        cache.record_not_modified()
+        response = Response(status=304)
+    else:
+        response = Response(rendered.variants[encoding], mimetype="image/svg+xml")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "public, max-age=31536000"
+    return response
 
 
 def board_routes(app):
@@ -20,10 +59,6 @@ def board_routes(app):
                     # replace any + with ' '
                     fen = fen.replace("+", " ")
                     board = chess.Board(fen)
-                    svg_data = chess.svg.board(board=board, size=400)
-                    response = Response(svg_data, mimetype="image/svg+xml")
-                    response.headers["Cache-Control"] = "public, max-age=31536000"
-                    return response
                 except ValueError:
                     app.logger.error("Invalid fen query parameter")
                     return (
@@ -32,6 +67,7 @@ def board_routes(app):
                         ),
                         400,
                     )
+                return svg_response(board)
             app.logger.error("Missing b query parameter")
             return (
                 jsonify({"success": False, "message": "Missing b query parameter"}),
@@ -39,14 +75,15 @@ def board_routes(app):
             )
         app.logger.info(f"Decoding board from query param {b}")
         try:
-            board = decode_board(b)
-            svg_data = chess.svg.board(board=board, size=400)
-            response = Response(svg_data, mimetype="image/svg+xml")
-            response.headers["Cache-Control"] = "public, max-age=31536000"
-            return response
+            if is_position(b):
+                position = decode_position(b)
+            else:
+                # version 1 boards only have the pieces
+                position = (decode_board(b), chess.WHITE, None)
         except ValueError:
             app.logger.error("Invalid b query parameter")
             return (
                 jsonify({"success": False, "message": "Invalid b query parameter"}),
                 400,
             )
+        return svg_response(*position)
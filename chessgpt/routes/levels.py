@@ -1,32 +1,38 @@
 from flask.json import jsonify
 
 from chessgpt.authentication.authentication import check_auth
+from chessgpt.stockfish.budgets import LEVEL_BUDGETS
 
 
 LEVELS = [
     {
         "name": "Beginner",
         "elo": 1350,
+        "search": LEVEL_BUDGETS[1350]._asdict(),
         "description": "The assistant will play at an Elo rating of 1350. This is a good level for beginners.",
     },
     {
         "name": "Intermediate",
         "elo": 1500,
+        "search": LEVEL_BUDGETS[1500]._asdict(),
         "description": "The assistant will play at an Elo rating of 1500. This is a good level for intermediate players.",  # noqa
     },
     {
         "name": "Advanced",
         "elo": 2000,
+        "search": LEVEL_BUDGETS[2000]._asdict(),
         "description": "The assistant will play at an Elo rating of 2000. This is a good level for advanced players.",
     },
     {
         "name": "Expert",
         "elo": 2500,
+        "search": LEVEL_BUDGETS[2500]._asdict(),
         "description": "The assistant will play at an Elo rating of 2500. This is a good level for expert players.",
     },
     {
         "name": "Grandmaster",
         "elo": 2850,
+        "search": LEVEL_BUDGETS[2850]._asdict(),
         "description": "The assistant will play at an Elo rating of 2850. This is a good level for grandmasters.",
     },
 ]
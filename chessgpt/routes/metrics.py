@@ -0,0 +1,85 @@
+import time
+
+from flask import Response, g, request
+
+from chessgpt.authentication.authentication import check_auth
+from chessgpt.logging.logging import exclude_from_log
+from chessgpt.metrics.metrics import REQUEST_SECONDS, REQUESTS, SVG_CACHE_EVENTS
+from chessgpt.metrics.registry import get_registry
+from chessgpt.render.cache import get_svg_cache
+from chessgpt.stockfish.cache import get_analysis_cache
+from chessgpt.stockfish.stockfish import get_engine_pool
+
+# the SVG cache is shared by every app in the process, so only count its events once
+_svg_cache_listening = False
+
+
+def register_gauges(app):
+    """Reports the caches and the engine pool, which keep their own counts"""
+    registry = get_registry()
+
+    def cache_stats():
+        stats = {
+            "analysis": get_analysis_cache().stats(),
+            "svg": get_svg_cache().stats(),
+        }
+        game_state_cache = getattr(app.database, "game_state_cache", None)
+        if game_state_cache is not None:
+            stats["game"] = game_state_cache.stats()
+        return stats
+
+    registry.gauge(
+        "chessgpt_cache_entries",
+        "Entries in each of this worker's caches",
+        lambda: {name: stats["size"] for name, stats in cache_stats().items()},
+        ["cache"],
+    )
+    registry.gauge(
+        "chessgpt_cache_hit_rate",
+        "Share of lookups served from each of this worker's caches",
+        lambda: {name: stats["hit_rate"] for name, stats in cache_stats().items()},
+        ["cache"],
+    )
+    registry.gauge(
+        "chessgpt_engine_pool_idle",
+        "Engine processes waiting for a search",
+        lambda: get_engine_pool().idle_count(),
+    )
+    registry.gauge(
+        "chessgpt_engine_pool_spawned",
+        "Engine processes started by this worker",
+        lambda: get_engine_pool().spawned,
+    )
+
+
+def get_metrics_routes(app):
+    global _svg_cache_listening
+    if not _svg_cache_listening:
+        get_svg_cache().add_listener(SVG_CACHE_EVENTS.inc)
+        _svg_cache_listening = True
+    register_gauges(app)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            # the rule, not the path, so query strings and unknown paths don't
+            # make a new series each
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUESTS.inc(request.method, route, response.status_code)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, request.method, route
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    @exclude_from_log
+    @check_auth
+    def metrics():
+        return Response(
+            get_registry().render(), mimetype="text/plain; version=0.0.4"
+        )
@@ -1,29 +1,75 @@
-import chess
 from flask import jsonify, request
 from chessgpt.authentication.authentication import check_auth
+from chessgpt.database.dynamodb import GameStateConflictError
 
 from chessgpt.game_state.game_state import get_board_state, get_legal_move_list
+from chessgpt.game_state.legal_moves import get_move_index, resolve_move
+from chessgpt.metrics.metrics import GAME_LENGTH
+from chessgpt.stockfish.ponder import discard_stale_ponders
 from chessgpt.utils.openai import get_conversation_id_hash
 
 
 def try_make_move(app, game_state, move):
+    # accepts SAN, UCI, LAN and the usual sloppy ways of writing them
+    legal_move = resolve_move(game_state.board, move)
+    if legal_move is None:
+        return False
+    # record the move in SAN whatever it came in as
+    game_state.move_history.append(get_move_index(game_state.board).sans[legal_move])
+    game_state.board.push(legal_move)
+    return True
+
+
+def get_illegal_move_state(app, conversation_id_hash, game_state, move):
+    """The board state to send back for an illegal move, with the legal moves"""
     legal_moves = get_legal_move_list(app.logger, game_state.board)
-    # check the move is legal
-    if move not in legal_moves:
-        # maybe the move is not in SAN format? Let's try and convert it to SAN
+    app.logger.error(
+        f"Illegal move: {move}, board: {game_state.board.fen()}, valiid moves: {legal_moves}"
+    )
+    board_state = get_board_state(
+        app.logger,
+        conversation_id_hash,
+        game_state,
+        request.scheme,
+        request.host,
+    )
+    board_state["error_message"] = (
+        "Illegal move - make sure you use SAN. Legal moves: " + ", ".join(legal_moves)
+    )
+    return board_state
+
+
+# how many times we'll try a move on a game other requests keep changing
+MAX_MOVE_ATTEMPTS = 3
+
+
+def make_and_save_move(app, conversation_id_hash, game_state, move):
+    """
+    Makes the move and saves it. If another request saved the game first we load it
+    again and make the move on the new position, unless that request made the same move.
+
+    Returns the game state and True if the move was saved, False if it's illegal, or
+    None if we gave up because the game kept changing.
+    """
+    for attempt in range(MAX_MOVE_ATTEMPTS):
+        if not try_make_move(app, game_state, move):
+            # the move might only be illegal because the position changed under us
+            return game_state, (False if attempt == 0 else None)
         try:
-            move_uci = chess.Move.from_uci(move)
-            move = game_state.board.san(move_uci)
-        except ValueError:
-            # not a valid uci move either!
-            return False
-    # try again with the new SAN move
-    if move in legal_moves:
-        # make the move
-        game_state.board.push_san(move)
-        game_state.move_history.append(move)
-        return True
-    return False
+            app.database.save_game_state(conversation_id_hash, game_state)
+            if game_state.board.is_game_over():
+                GAME_LENGTH.observe(len(game_state.move_history))
+            return game_state, True
+        except GameStateConflictError:
+            app.logger.warning(f"Game changed while making move {move}, retrying")
+            expected_moves = game_state.move_history
+            game_state = app.database.load_game_state(conversation_id_hash)
+            if not game_state:
+                return None, None
+            if game_state.move_history == expected_moves:
+                # a duplicate of this request got there first
+                return game_state, True
+    return game_state, None
 
 
 def make_move_routes(app):
@@ -48,8 +94,22 @@ def make_move_routes(app):
             )
 
         move = data["move"]
-        if try_make_move(app, game_state, move):
-            app.database.save_game_state(conversation_id_hash, game_state)
+        game_state, saved = make_and_save_move(
+            app, conversation_id_hash, game_state, move
+        )
+        if saved is None:
+            app.logger.error(f"Gave up making move {move}, the game keeps changing")
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "message": "The game was changed by another request, please try again",
+                    }
+                ),
+                409,
+            )
+        if saved:
+            discard_stale_ponders(conversation_id_hash, game_state.board)
             return jsonify(
                 get_board_state(
                     app.logger,
@@ -60,19 +120,9 @@ def make_move_routes(app):
                 )
             )
         else:
-            legal_moves = get_legal_move_list(app.logger, game_state.board)
-            app.logger.error(
-                f"Illegal move: {move}, board: {game_state.board.fen()}, valiid moves: {legal_moves}"
-            )
-            board_state = get_board_state(
-                app.logger,
-                conversation_id_hash,
-                game_state,
-                request.scheme,
-                request.host,
-            )
-            board_state["error_message"] = "Illegal move - make sure you use SAN"
             return (
-                jsonify(board_state),
+                jsonify(
+                    get_illegal_move_state(app, conversation_id_hash, game_state, move)
+                ),
                 400,
             )
@@ -1,3 +1,3 @@
-from .stockfish import get_stockfish, get_best_moves, get_best_move
+from .stockfish import get_stockfish, get_best_moves, get_best_move, get_engine_pool
 
-__all__ = ["get_stockfish", "get_best_moves", "get_best_move"]
\ No newline at end of file
+__all__ = ["get_stockfish", "get_best_moves", "get_best_move", "get_engine_pool"]
@@ -0,0 +1,82 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+
+import chess
+
+from .book import get_book_moves, get_opening_book
+from .cache import analysis_key, get_analysis_cache
+from .stockfish import get_best_move, get_best_moves, get_stockfish
+from .tablebase import get_tablebase, get_tablebase_moves
+
+# the best moves for a position, and where they came from ("book", "tablebase" or "engine")
+Analysis = namedtuple("Analysis", ["moves", "source"])
+
+# searches that are currently running, so a second request for the same
+# analysis waits for the first one instead of starting another search
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def get_search_limit(budget):
+    # everything that decides where the search stops, hash and threads only change how fast
+    return f"depth{budget.depth}:nodes{budget.nodes}:movetime{budget.movetime}"
+
+
+def search_position(board, elo, budget):
+    with get_stockfish(elo, board.fen(), budget) as stockfish:
+        if budget.multipv == 1:
+            best_move = get_best_move(stockfish, budget.movetime)
+            return [best_move] if best_move else []
+        return [
+            move["Move"]
+            for move in get_best_moves(stockfish, budget.multipv, budget.nodes)
+        ]
+
+
+def search_once(key, board, elo, budget):
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = _in_flight[key] = Future()
+    if not is_owner:
+        return future.result()
+    try:
+        moves = search_position(board, elo, budget)
+        get_analysis_cache().set(key, moves)
+        future.set_result(moves)
+        return moves
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def analyse_position(board, elo, budget) -> Analysis:
+    """
+    Returns up to `budget.multipv` best moves for the position. The opening book is used while
+    the position is in book and the tablebase once there are few enough pieces,
+    otherwise the analysis cache, then an engine search.
+
+    A single move is searched at the given elo, several moves are the engine's top moves.
+    The budget limits how much work the engine does.
+    """
+    num = budget.multipv
+    book = get_opening_book()
+    if book is not None:
+        book_moves = get_book_moves(book, board, elo, num)
+        if book_moves:
+            return Analysis(book_moves, "book")
+    tablebase = get_tablebase()
+    if tablebase is not None:
+        tablebase_moves = get_tablebase_moves(tablebase, board, num)
+        if tablebase_moves:
+            return Analysis(tablebase_moves, "tablebase")
+    key = analysis_key(board, elo, num, get_search_limit(budget))
+    moves = get_analysis_cache().get(key)
+    if moves is None:
+        moves = search_once(key, board, elo, budget)
+    return Analysis([chess.Move.from_uci(move) for move in moves], "engine")
@@ -0,0 +1,48 @@
+import os
+import random
+import threading
+
+import chess.polyglot
+
+_opening_book = None
+_opening_book_lock = threading.Lock()
+
+
+def get_opening_book():
+    """Returns the memory mapped polyglot book from OPENING_BOOK_PATH, or None if there isn't one"""
+    global _opening_book
+    path = os.environ.get("OPENING_BOOK_PATH")
+    if not path or not os.path.exists(path):
+        return None
+    with _opening_book_lock:
+        if _opening_book is None:
+            _opening_book = chess.polyglot.open_reader(path)
+        return _opening_book
+
+
+def get_weight_exponent(elo):
+    # flatten the book weights for weaker levels so they play a wider range of
+    # openings, and sharpen them for stronger levels so they stick to main lines
+    elo = max(1350, min(2850, elo))
+    return 0.25 + 1.75 * (elo - 1350) / 1500
+
+
+def get_book_moves(book, board, elo, num=1):
+    """
+    Returns up to `num` book moves for the position, or an empty list if we're out of book.
+
+    Several moves are the most popular book moves, a single move is picked at random
+    using the book weights adjusted for the elo.
+    """
+    entries = sorted(
+        (entry for entry in book.find_all(board) if entry.weight > 0),
+        key=lambda entry: entry.weight,
+        reverse=True,
+    )
+    if not entries:
+        return []
+    if num == 1:
+        exponent = get_weight_exponent(elo)
+        weights = [entry.weight**exponent for entry in entries]
+        return [random.choices(entries, weights=weights)[0].move]
+    return [entry.move for entry in entries[:num]]
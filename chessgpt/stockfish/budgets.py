@@ -0,0 +1,49 @@
+from collections import namedtuple
+
+# How much work the engine may do for one search. The assistant's move stops at
+# `movetime` milliseconds if set, otherwise at `depth`; hints (several top moves)
+# stop at `nodes` if set, otherwise at `depth`. `multipv` is the number of moves
+# we ask for, `hash` (MB) and `threads` are engine options.
+SearchBudget = namedtuple(
+    "SearchBudget", ["depth", "nodes", "movetime", "multipv", "hash", "threads"]
+)
+
+# weak levels only look a few plies ahead before stockfish picks its deliberately
+# weaker move, so searching any deeper is wasted CPU
+LEVEL_BUDGETS = {
+    1350: SearchBudget(depth=4, nodes=None, movetime=None, multipv=1, hash=16, threads=1),
+    1500: SearchBudget(depth=6, nodes=None, movetime=None, multipv=1, hash=16, threads=1),
+    2000: SearchBudget(depth=10, nodes=None, movetime=None, multipv=1, hash=16, threads=1),
+    2500: SearchBudget(depth=13, nodes=None, movetime=None, multipv=1, hash=32, threads=1),
+    2850: SearchBudget(depth=15, nodes=None, movetime=None, multipv=1, hash=64, threads=2),
+}
+
+# hints for the user, a fixed node count keeps them cheap whatever the position
+HINT_BUDGET = SearchBudget(
+    depth=15, nodes=300000, movetime=None, multipv=5, hash=16, threads=1
+)
+
+# post-game review searches every position of the game at full strength, each one
+# gets an equal share of REVIEW_GAME_NODES, capped by the budget's nodes so short
+# games don't search for longer than they need
+REVIEW_BUDGET = SearchBudget(
+    depth=18, nodes=500000, movetime=None, multipv=1, hash=16, threads=1
+)
+REVIEW_GAME_NODES = 20000000
+REVIEW_MIN_NODES = 20000
+
+
+def get_search_budget(elo):
+    """Returns the budget for the strongest level at or below the elo"""
+    level = max(
+        (level for level in LEVEL_BUDGETS if level <= elo), default=min(LEVEL_BUDGETS)
+    )
+    return LEVEL_BUDGETS[level]
+
+
+def get_review_budget(positions):
+    """Returns the budget for each position when reviewing this many positions"""
+    nodes = REVIEW_GAME_NODES // max(positions, 1)
+    return REVIEW_BUDGET._replace(
+        nodes=max(REVIEW_MIN_NODES, min(REVIEW_BUDGET.nodes, nodes))
+    )
@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import chess.polyglot
+from cachetools import LRUCache
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def analysis_key(board, elo, num, limit):
+    # the zobrist hash covers pieces, side to move, castling and en passant
+    return f"{chess.polyglot.zobrist_hash(board):016x}:{elo}:{num}:{limit}"
+
+
+class MemoryStore:
+    """In-process LRU store, lost when the worker is recycled"""
+
+    def __init__(self, maxsize):
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+
+class SqliteStore:
+    """
+    On-disk LRU store that survives restarts of the worker, and can be shared by
+    several processes.
+
+    Reads don't write: when each entry was last used is kept in memory and written
+    with the next set, or once USED_BATCH reads have piled up, so eviction order is
+    only approximately least recently used.
+    """
+
+    # reads to remember before writing when they were used
+    USED_BATCH = 100
+    # seconds to wait for another process to finish writing
+    TIMEOUT = 30
+
+    def __init__(self, path, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._used = {}
+        self._db = sqlite3.connect(path, timeout=self.TIMEOUT, check_same_thread=False)
+        # readers don't block the writer, or each other
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used)")
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM analysis WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._used[key] = time.time()
+            if len(self._used) >= self.USED_BATCH:
+                self._write_used()
+                self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        with self._lock:
+            self._write_used()
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis (key, value, used) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            # evict the least recently used entries once we're over the limit
+            self._db.execute(
+                "DELETE FROM analysis WHERE key IN "
+                "(SELECT key FROM analysis ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._db.commit()
+
+    def _write_used(self):
+        # call with the lock held, the caller commits
+        if self._used:
+            used, self._used = self._used, {}
+            self._db.executemany(
+                "UPDATE analysis SET used = ? WHERE key = ?",
+                [(when, key) for key, when in used.items()],
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+
+
+class AnalysisCache:
+    """Caches engine analysis in front of a pluggable store and counts hits and misses"""
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.store.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.store.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.store),
+        }
+
+
+def get_analysis_cache():
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            maxsize = int(os.environ.get("ANALYSIS_CACHE_SIZE", "10000"))
+            path = os.environ.get("ANALYSIS_CACHE_PATH")
+            if path:
+                store = SqliteStore(path, maxsize)
+            else:
+                store = MemoryStore(maxsize)
+            _analysis_cache = AnalysisCache(store)
+        return _analysis_cache
@@ -0,0 +1,100 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import chess.polyglot
+
+from .analysis import analyse_position
+
+PonderJob = namedtuple("PonderJob", ["position", "elo", "budget", "future"])
+
+_ponderer = None
+_ponderer_lock = threading.Lock()
+
+
+class Ponderer:
+    """
+    Analyses the position each game is most likely to reach next in the background.
+
+    Each game has at most one job. Results land in the analysis cache, and a request
+    for a position that is still being analysed waits for the running search.
+    """
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ponder"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def ponder(self, conversation_id_hash, board, elo, budget):
+        position = chess.polyglot.zobrist_hash(board)
+        with self._lock:
+            job = self._jobs.get(conversation_id_hash)
+            if job and (job.position, job.elo, job.budget) == (position, elo, budget):
+                return job.future
+            future = self._executor.submit(analyse_position, board.copy(), elo, budget)
+            self._jobs[conversation_id_hash] = PonderJob(position, elo, budget, future)
+        # cancelling runs the done callbacks, which take the lock
+        if job:
+            job.future.cancel()
+        future.add_done_callback(
+            lambda done: self._forget(conversation_id_hash, done)
+        )
+        return future
+
+    def discard_stale(self, conversation_id_hash, board):
+        # a move has been made, anything not analysing the new position is wasted work
+        position = chess.polyglot.zobrist_hash(board)
+        with self._lock:
+            job = self._jobs.get(conversation_id_hash)
+            if job is None or job.position == position:
+                return
+            del self._jobs[conversation_id_hash]
+        job.future.cancel()
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, conversation_id_hash, future):
+        with self._lock:
+            job = self._jobs.get(conversation_id_hash)
+            if job and job.future is future:
+                del self._jobs[conversation_id_hash]
+
+
+def get_ponderer():
+    """Returns the shared ponderer, or None if pondering is switched off"""
+    global _ponderer
+    # Lambda freezes background threads once the response is sent, so a ponder would
+    # only carry on during the next request, holding one of its engines
+    default = "0" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "1"
+    workers = int(os.environ.get("PONDER_THREADS", default))
+    if workers <= 0:
+        return None
+    with _ponderer_lock:
+        if _ponderer is None:
+            _ponderer = Ponderer(workers)
+        return _ponderer
+
+
+def ponder_after_move(conversation_id_hash, board, move, elo, budget):
+    """Starts analysing the position after `move`, the move we expect to be played next"""
+    ponderer = get_ponderer()
+    if ponderer is None:
+        return
+    next_board = board.copy(stack=False)
+    next_board.push(move)
+    if not next_board.is_game_over():
+        ponderer.ponder(conversation_id_hash, next_board, elo, budget)
+
+
+def discard_stale_ponders(conversation_id_hash, board):
+    ponderer = get_ponderer()
+    if ponderer is not None:
+        ponderer.discard_stale(conversation_id_hash, board)
@@ -0,0 +1,124 @@
+import threading
+from contextlib import contextmanager
+
+# changing these reallocates inside the engine, so they're left as the last search
+# set them rather than reset, every search sets the ones it needs
+STICKY_OPTIONS = frozenset(["Hash", "Threads"])
+
+
+def is_engine_alive(engine):
+    # the wrapper doesn't expose the process, but a dead engine is useless to us
+    return engine._stockfish.poll() is None
+
+
+class EnginePool:
+    """
+    A pool of long-lived engine processes shared by every request in this worker.
+
+    Engines are spawned lazily up to `size`, handed out one at a time and reset
+    (ucinewgame plus any changed options except STICKY_OPTIONS) when they are
+    returned. Engines that have crashed are discarded and a fresh one is spawned on
+    the next checkout.
+    """
+
+    def __init__(self, factory, size=1, timeout=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.spawned = 0
+        self.discarded = 0
+        self._idle = []
+        self._defaults = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def engine(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for a free chess engine")
+        try:
+            engine = self._checkout()
+            try:
+                yield engine
+            finally:
+                self._checkin(engine)
+        finally:
+            self._slots.release()
+
+    def prewarm(self, count=None):
+        """
+        Starts engines until `count` (or the pool's size) are idle or in use, so the
+        first requests don't wait for them. Returns how many were started.
+        """
+        count = self.size if count is None else min(count, self.size)
+        started = 0
+        while True:
+            with self._lock:
+                if self.spawned - self.discarded >= count:
+                    return started
+            engine = self._spawn()
+            started += 1
+            with self._lock:
+                self._idle.append(engine)
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for engine in idle:
+            self._discard(engine)
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                engine = self._idle.pop() if self._idle else None
+            if engine is None:
+                return self._spawn()
+            if is_engine_alive(engine):
+                return engine
+            self._discard(engine)
+
+    def _checkin(self, engine):
+        try:
+            if not is_engine_alive(engine):
+                raise RuntimeError("Engine process has exited")
+            self._reset(engine)
+        except Exception:
+            self._discard(engine)
+            return
+        with self._lock:
+            self._idle.append(engine)
+
+    def _spawn(self):
+        engine = self.factory()
+        with self._lock:
+            self.spawned += 1
+            self._defaults[engine] = (
+                engine.get_engine_parameters(),
+                engine.get_depth(),
+            )
+        return engine
+
+    def _reset(self, engine):
+        parameters, depth = self._defaults[engine]
+        current = engine.get_engine_parameters()
+        changed = {
+            name: value
+            for name, value in parameters.items()
+            if current[name] != value and name not in STICKY_OPTIONS
+        }
+        engine.send_ucinewgame_command()
+        engine.update_engine_parameters(changed)
+        engine.set_depth(depth)
+
+    def _discard(self, engine):
+        with self._lock:
+            self.discarded += 1
+            self._defaults.pop(engine, None)
+        try:
+            engine.send_quit_command()
+        except Exception:
+            pass
@@ -0,0 +1,145 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import chess
+
+from .analysis import get_search_limit
+from .budgets import get_review_budget
+from .cache import analysis_key, get_analysis_cache
+from .stockfish import get_best_moves, get_review_pool, get_stockfish
+
+# reviews are searched at full strength
+REVIEW_ELO = 2850
+
+# scores are centipawns from white's side, a mate in n scores MATE_SCORE - n so
+# quicker mates score higher
+MATE_SCORE = 100000
+
+# the least a move can lose, in centipawns, to get each flag
+CLASSIFICATIONS = [(300, "blunder"), (100, "mistake"), (50, "inaccuracy")]
+
+# the engine's view of a position, mate is the moves to mate from white's side
+Evaluation = namedtuple("Evaluation", ["best_move", "score", "mate"])
+
+# one move of a reviewed game, score and mate are for the position after the move,
+# loss is how much worse it is than the best move for the side that played it
+ReviewedMove = namedtuple(
+    "ReviewedMove",
+    ["ply", "move", "score", "mate", "best_move", "loss", "classification"],
+)
+
+
+def get_score(centipawn, mate):
+    if mate is None:
+        return centipawn
+    return MATE_SCORE - mate if mate > 0 else -MATE_SCORE - mate
+
+
+def search_evaluation(board, budget, pool):
+    with get_stockfish(REVIEW_ELO, board.fen(), budget, pool) as stockfish:
+        top_moves = get_best_moves(stockfish, 1, budget.nodes)
+        # the wrapper scores from the side to move's point of view by default
+        flip = board.turn == chess.BLACK and stockfish.get_turn_perspective()
+    sign = -1 if flip else 1
+    if not top_moves:
+        return [None, 0, None]
+    top_move = top_moves[0]
+    mate = top_move["Mate"]
+    return [
+        top_move["Move"],
+        sign * (top_move["Centipawn"] or 0),
+        sign * mate if mate is not None else None,
+    ]
+
+
+def evaluate_position(board, budget, pool=None, cache=None) -> Evaluation:
+    """Returns the best move and score of the position, from the cache if we have it"""
+    if board.is_checkmate():
+        # the side to move has been mated
+        return Evaluation(None, -MATE_SCORE if board.turn else MATE_SCORE, 0)
+    if board.is_stalemate():
+        return Evaluation(None, 0, None)
+    cache = cache or get_analysis_cache()
+    key = analysis_key(board, REVIEW_ELO, 1, "review:" + get_search_limit(budget))
+    evaluation = cache.get(key)
+    if evaluation is None:
+        evaluation = search_evaluation(board, budget, pool)
+        cache.set(key, evaluation)
+    best_move, centipawn, mate = evaluation
+    return Evaluation(
+        chess.Move.from_uci(best_move) if best_move else None,
+        get_score(centipawn, mate),
+        mate,
+    )
+
+
+def classify(loss):
+    for threshold, classification in CLASSIFICATIONS:
+        if loss >= threshold:
+            return classification
+    return None
+
+
+def replay(move_history):
+    """
+    Returns the positions of a game in SAN, from the start to after the last move,
+    and its moves
+    """
+    board = chess.Board()
+    positions = [board.copy(stack=False)]
+    moves = []
+    for san in move_history:
+        moves.append(board.push_san(san))
+        positions.append(board.copy(stack=False))
+    return positions, moves
+
+
+def review_moves(positions, moves, evaluations):
+    """
+    Yields a ReviewedMove for each move, from the evaluations of the positions
+    in order, which can be an iterator of searches still running
+    """
+    evaluations = iter(evaluations)
+    before = next(evaluations, None)
+    for ply, (position, move, after) in enumerate(
+        zip(positions, moves, evaluations), start=1
+    ):
+        sign = 1 if position.turn == chess.WHITE else -1
+        if move == before.best_move:
+            loss = 0
+        else:
+            loss = max(0, sign * (before.score - after.score))
+        yield ReviewedMove(
+            ply,
+            position.san(move),
+            after.score,
+            after.mate,
+            position.san(before.best_move) if before.best_move else None,
+            loss,
+            classify(loss),
+        )
+        before = after
+
+
+def review_game(move_history, budget=None, pool=None, cache=None):
+    """
+    Yields a ReviewedMove for each move of the game in SAN, in order.
+
+    Every position is searched once, spread over the review pool, and the budget
+    defaults to an equal share of the game's nodes for each position.
+    """
+    positions, moves = replay(move_history)
+    budget = budget or get_review_budget(len(positions))
+    pool = pool or get_review_pool()
+    with ThreadPoolExecutor(
+        max_workers=pool.size, thread_name_prefix="review"
+    ) as executor:
+        # map hands the evaluations back in order as they finish
+        yield from review_moves(
+            positions,
+            moves,
+            executor.map(
+                lambda position: evaluate_position(position, budget, pool, cache),
+                positions,
+            ),
+        )
@@ -1,25 +1,120 @@
+import atexit
 import os
 import shutil
+import threading
+from contextlib import ExitStack, contextmanager
+
 from stockfish import Stockfish
 
+from chessgpt.logging.timing import span
+from chessgpt.metrics.metrics import ENGINE_SEARCH_NODES, ENGINE_SEARCH_SECONDS
+
+from .pool import EnginePool
+
+_engine_pool = None
+_engine_pool_lock = threading.Lock()
+_review_pool = None
+_review_pool_lock = threading.Lock()
+
+
 def get_stockfish_path():
-    result = shutil.which("stockfish")
+    result = os.environ.get("STOCKFISH_PATH") or shutil.which("stockfish")
     if result is None:
         # locate the binary from ./stockfish
         result = os.path.join(os.path.dirname(__file__), "stockfish/stockfish")
     return result
 
 
-def get_stockfish(elo, fen):
-    stockfish = Stockfish(get_stockfish_path())
-    stockfish.set_elo_rating(elo)
-    stockfish.set_fen_position(fen)
-    return stockfish
+def start_stockfish():
+    with span("engine-spawn"):
+        return Stockfish(get_stockfish_path())
+
+
+def get_engine_pool():
+    # one pool per process so warm lambdas and gunicorn workers reuse their engines
+    global _engine_pool
+    with _engine_pool_lock:
+        if _engine_pool is None:
+            _engine_pool = EnginePool(
+                start_stockfish,
+                size=int(os.environ.get("STOCKFISH_POOL_SIZE", "2")),
+                timeout=float(os.environ.get("STOCKFISH_POOL_TIMEOUT", "30")),
+            )
+            atexit.register(_engine_pool.close)
+        return _engine_pool
+
+
+def get_review_pool():
+    # game reviews search a position per engine, so they get engines of their own
+    # rather than holding up every move and hint in the worker
+    global _review_pool
+    with _review_pool_lock:
+        if _review_pool is None:
+            _review_pool = EnginePool(
+                start_stockfish,
+                size=int(os.environ.get("REVIEW_POOL_SIZE") or os.cpu_count() or 1),
+                timeout=float(os.environ.get("STOCKFISH_POOL_TIMEOUT", "30")),
+            )
+            atexit.register(_review_pool.close)
+        return _review_pool
+
+
+def apply_search_budget(stockfish, budget):
+    # changing hash or threads reallocates inside the engine, so only send changes
+    current = stockfish.get_engine_parameters()
+    options = {"Threads": budget.threads, "Hash": budget.hash}
+    changed = {name: value for name, value in options.items() if current[name] != value}
+    if changed:
+        stockfish.update_engine_parameters(changed)
+    stockfish.set_depth(budget.depth)
+
+
+@contextmanager
+def get_stockfish(elo, fen, budget=None, pool=None):
+    with ExitStack() as stack:
+        # the wait for a free engine, and starting one if the pool isn't full yet
+        with span("engine-wait"):
+            stockfish = stack.enter_context((pool or get_engine_pool()).engine())
+        if budget is not None:
+            apply_search_budget(stockfish, budget)
+        stockfish.set_elo_rating(elo)
+        stockfish.set_fen_position(fen)
+        yield stockfish
+
+
+def get_search_nodes(stockfish):
+    """
+    Returns the nodes searched by the last get_top_moves, read from the output the
+    wrapper kept, or None if it didn't keep any. Verbose results would tell us too,
+    but they cost a `uci` round trip for every line.
+    """
+    raw_output = getattr(stockfish, "raw_stockfish_output", None)
+    if raw_output is None:
+        return None
+    try:
+        lines = raw_output(stockfish.get_top_moves)
+    except Exception:
+        return None
+    for line in reversed(lines):
+        fields = line.split()
+        if fields and fields[0] == "info" and "nodes" in fields:
+            index = fields.index("nodes") + 1
+            if index < len(fields) and fields[index].isdigit():
+                return int(fields[index])
+    return None
 
 
-def get_best_moves(stockfish, num=5):
-    return stockfish.get_top_moves(num)
+def get_best_moves(stockfish, num=5, nodes=None):
+    with span("engine-search"), ENGINE_SEARCH_SECONDS.time():
+        top_moves = stockfish.get_top_moves(num, num_nodes=nodes or 0)
+    searched = get_search_nodes(stockfish)
+    if searched:
+        ENGINE_SEARCH_NODES.observe(searched)
+    return top_moves
 
 
-def get_best_move(stockfish):
-    return stockfish.get_best_move()
+def get_best_move(stockfish, movetime=None):
+    with span("engine-search"), ENGINE_SEARCH_SECONDS.time():
+        if movetime:
+            return stockfish.get_best_move_time(movetime)
+        return stockfish.get_best_move()
@@ -0,0 +1,59 @@
+import os
+import threading
+
+_tablebase = None
+_tablebase_lock = threading.Lock()
+
+
+def get_tablebase():
+    """
+    Returns the syzygy tablebase from SYZYGY_PATH, or None if there isn't one.
+
+    The tablebase keeps its table files open, so it's shared by every request in this worker.
+    """
+    global _tablebase
+    path = os.environ.get("SYZYGY_PATH")
+    if not path:
+        return None
+    with _tablebase_lock:
+        if _tablebase is None:
+            # only loaded when there are tables to probe
+            import chess.syzygy
+
+            _tablebase = chess.syzygy.Tablebase()
+            for directory in path.split(os.pathsep):
+                if os.path.isdir(directory):
+                    _tablebase.add_directory(directory)
+        return _tablebase
+
+
+def get_tablebase_moves(tablebase, board, num=1):
+    """
+    Returns up to `num` moves ranked by the tablebase, best first, or an empty list if
+    the position isn't covered.
+
+    Winning moves come first, fastest to zero the 50 move counter first; losing moves
+    are ranked by how long they hold out.
+    """
+    import chess.syzygy
+
+    if chess.popcount(board.occupied) > chess.syzygy.TBPIECES or board.castling_rights:
+        return []
+    # probing is only thread safe with a board nobody else is using
+    board = board.copy(stack=False)
+    ranked = []
+    try:
+        for move in list(board.legal_moves):
+            board.push(move)
+            try:
+                # the probes are from the opponent's point of view after our move
+                wdl = tablebase.probe_wdl(board)
+                dtz = tablebase.probe_dtz(board)
+            finally:
+                board.pop()
+            ranked.append(((wdl, -dtz), move))
+    except KeyError:
+        # chess.syzygy.MissingTableError, we don't have the tables for this ending
+        return []
+    ranked.sort(key=lambda item: item[0])
+    return [move for _, move in ranked[:num]]
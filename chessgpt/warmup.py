@@ -0,0 +1,58 @@
+"""
+Gets a worker ready to serve before its first request.
+
+On Lambda, anything done while the handler module is imported runs in the init phase,
+which is quicker (the full CPU allowance) and not billed against the first request.
+Scheduled warm-up pings then keep the worker alive without doing any game work.
+
+    WARMUP_ENGINES - engines to start up front, the pool size by default
+"""
+import os
+import time
+
+from chessgpt.authentication.authentication import get_auth_secret
+from chessgpt.render.cache import get_svg_cache
+from chessgpt.stockfish.book import get_opening_book
+from chessgpt.stockfish.cache import get_analysis_cache
+from chessgpt.stockfish.stockfish import get_engine_pool
+from chessgpt.stockfish.tablebase import get_tablebase
+
+# sources of the events serverless-plugin-warmup and EventBridge schedules send
+WARM_UP_SOURCES = ("serverless-plugin-warmup", "aws.events")
+
+
+def is_warm_up_event(event):
+    return isinstance(event, dict) and event.get("source") in WARM_UP_SOURCES
+
+
+def warm_up(app):
+    """
+    Starts the engines, fetches the auth secret and loads the caches, books and
+    tablebases, and returns what was done. Failures are logged, the first request
+    will just have to do the work itself.
+    """
+    start = time.perf_counter()
+    primed = {}
+    try:
+        engines = os.environ.get("WARMUP_ENGINES")
+        primed["engines"] = get_engine_pool().prewarm(
+            int(engines) if engines else None
+        )
+    except Exception as e:
+        app.logger.warning(f"Could not start the engines: {e}")
+        primed["engines"] = 0
+    try:
+        primed["auth"] = get_auth_secret() is not None
+    except Exception as e:
+        app.logger.warning(f"Could not fetch the auth secret: {e}")
+        primed["auth"] = False
+    get_analysis_cache()
+    get_svg_cache()
+    # the board renderer is imported lazily, load it now while it's free
+    from chessgpt.render.svg import render_svg  # noqa: F401
+
+    primed["opening_book"] = get_opening_book() is not None
+    primed["tablebase"] = get_tablebase() is not None
+    primed["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    app.logger.info(f"Warmed up: {primed}")
+    return primed
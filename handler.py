@@ -0,0 +1,17 @@
+"""
+The Lambda entry point. Importing the app and warming it up happens here, in the
+init phase, so the first request finds the engines running and the secret fetched.
+Warm-up pings are answered without touching the app.
+"""
+import serverless_wsgi
+
+from app import app
+from chessgpt.warmup import is_warm_up_event, warm_up
+
+warm_up(app)
+
+
+def handler(event, context):
+    if is_warm_up_event(event):
+        return {"warm": True}
+    return serverless_wsgi.handle_request(app, event, context)
@@ -38,3 +38,37 @@ def test_decode_invalid_input():
     # Act & Assert
     with pytest.raises(Exception):
         decode_board(invalid_encoded)
+
+
+@pytest.mark.parametrize(
+    "fen, encoded",
+    [
+        (chess.STARTING_FEN, "aEbD4wtJJJJ_____0kkknAEy8IDg"),
+        (
+            "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+            "bGw-MLSSZJw_8_1_g0kqScATLwrg",
+        ),
+        ("8/8/8/8/8/8/8/8 w - - 0 1", "__________8"),
+        ("4k3/1P6/8/8/8/8/6p1/4K2R w K - 0 1", "9_1_______n724A"),
+    ],
+)
+def test_encoding_is_compatible_with_existing_urls(fen, encoded):
+    # these were produced by the original string based codec
+    board = chess.Board(fen)
+
+    assert encode_board(board) == encoded
+    assert decode_board(encoded).board_fen() == board.board_fen()
+
+
+@pytest.mark.parametrize("encoded", ["", "AAAA", "bGw-MLSSZJw"])
+def test_decode_truncated_input(encoded):
+    with pytest.raises(ValueError):
+        decode_board(encoded)
+
+
+def test_decode_ignores_trailing_bytes():
+    board = chess.Board()
+
+    decoded = decode_board(encode_board(board) + "AAAAAAAA")
+
+    assert decoded.board_fen() == board.board_fen()
@@ -0,0 +1,65 @@
+import random
+
+import chess
+import pytest
+
+from chessgpt.compression.moves import (
+    decode_san_moves,
+    decode_uci_moves,
+    encode_san_moves,
+    encode_uci_moves,
+)
+
+
+def random_games(count, seed=0):
+    # random play reaches all the awkward moves - promotions, disambiguation, mates
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = chess.Board()
+        sans = []
+        legal_moves = list(board.legal_moves)
+        while legal_moves and len(sans) < 400:
+            move = rng.choice(legal_moves)
+            sans.append(board.san(move))
+            board.push(move)
+            legal_moves = list(board.legal_moves)
+        yield board, sans
+
+
+def test_san_round_trip_random_games():
+    for _, sans in random_games(30):
+        assert decode_san_moves(encode_san_moves(sans)) == sans
+
+
+def test_uci_round_trip_random_games():
+    for board, _ in random_games(30):
+        assert decode_uci_moves(encode_uci_moves(board.move_stack)) == board.move_stack
+
+
+@pytest.mark.parametrize(
+    "moves",
+    [
+        [],
+        ["O-O", "O-O-O+", "O-O#"],
+        ["Nbd7", "R1a3", "Qh4xe1#", "Kxf2"],
+        ["exd8=Q+", "axb1=N", "h8=R", "gxh1=B#", "hxg3"],
+    ],
+)
+def test_san_round_trip(moves):
+    assert decode_san_moves(encode_san_moves(moves)) == moves
+
+
+def test_two_bytes_per_move():
+    # plus one version byte
+    assert len(encode_san_moves(["e4", "e5", "Nf3", "Nc6", "Bb5"])) == 11
+
+
+@pytest.mark.parametrize("move", ["e2e4", "Nf3!", "axc3", "Ra2=Q", "--"])
+def test_invalid_moves_are_rejected(move):
+    with pytest.raises(ValueError):
+        encode_san_moves([move])
+
+
+def test_wrong_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_san_moves(encode_uci_moves([chess.Move.from_uci("e2e4")]))
@@ -0,0 +1,72 @@
+import random
+
+import chess
+import pytest
+
+from chessgpt.compression.huffman import encode_board
+from chessgpt.compression.position import decode_position, encode_position, is_position
+
+
+def test_encode_and_decode_start():
+    position = decode_position(encode_position(chess.Board()))
+
+    assert position.board.fen() == chess.STARTING_FEN
+    assert position.orientation == chess.WHITE
+    assert position.lastmove is None
+
+
+def test_encode_and_decode_random_positions():
+    rng = random.Random(0)
+    for _ in range(100):
+        board = chess.Board()
+        for _ in range(rng.randrange(120)):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            board.push(rng.choice(legal_moves))
+        orientation = rng.choice(chess.COLORS)
+
+        position = decode_position(encode_position(board, orientation))
+
+        # everything but the move counters
+        assert position.board.fen().split()[:4] == board.fen().split()[:4]
+        assert position.board.ep_square == board.ep_square
+        assert position.orientation == orientation
+        if board.move_stack:
+            last = board.peek()
+            assert position.lastmove == chess.Move(last.from_square, last.to_square)
+
+
+def test_en_passant_and_castling():
+    board = chess.Board()
+    for move in ["e4", "Nf6", "e5", "d5"]:
+        board.push_san(move)
+
+    position = decode_position(encode_position(board, chess.BLACK))
+
+    assert position.board.ep_square == chess.D6
+    assert position.board.has_legal_en_passant()
+    assert position.board.castling_rights == chess.BB_CORNERS
+    assert position.orientation == chess.BLACK
+    assert position.lastmove == chess.Move.from_uci("d7d5")
+
+
+def test_versions_are_distinguishable():
+    board = chess.Board()
+    assert is_position(encode_position(board))
+    assert not is_position(encode_board(board))
+
+
+@pytest.mark.parametrize("encoded", ["2.", "2.gA", "2.QAAA", "aEbD4wtJJJJ"])
+def test_decode_invalid_input(encoded):
+    with pytest.raises(ValueError):
+        decode_position(encoded)
+
+
+def test_decode_ignores_trailing_bytes():
+    board = chess.Board()
+    board.push_san("e4")
+
+    position = decode_position(encode_position(board) + "AAAAAAAA")
+
+    assert position.board.board_fen() == board.board_fen()
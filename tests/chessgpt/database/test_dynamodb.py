@@ -0,0 +1,205 @@
+from logging import getLogger
+from unittest.mock import MagicMock, patch
+
+import chess
+import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import ANY, Stubber
+
+from chessgpt.compression.moves import (
+    decode_san_moves,
+    decode_uci_moves,
+    encode_san_moves,
+    encode_uci_moves,
+)
+from chessgpt.database.dynamodb import (
+    Database,
+    GameStateConflictError,
+    get_checkpoint,
+    load_board,
+)
+from chessgpt.game_state.game_state import GameState
+
+# a knight shuffle that repeats the starting position, then a pawn move
+MOVES = ["Nf3", "Nf6", "Ng1", "Ng8", "Nf3", "Nf6", "Ng1", "Ng8", "e4", "e5", "Nf3"]
+
+
+def play(moves):
+    board = chess.Board()
+    for move in moves:
+        board.push_san(move)
+    return board
+
+
+def make_database(item=None):
+    with patch("chessgpt.database.dynamodb.get_dynamodb_client") as mock_get_client:
+        mock_get_client.return_value = MagicMock()
+        with patch.dict("os.environ", {"GAMES_TABLE": "games"}):
+            database = Database(getLogger())
+    database.dynamodb_client.get_item.return_value = {"Item": item} if item else {}
+    return database
+
+
+def test_checkpoint_starts_at_last_irreversible_move():
+    checkpoint, tail = get_checkpoint(play(MOVES))
+
+    assert checkpoint == play(MOVES[:9]).fen()
+    assert [move.uci() for move in tail] == ["e7e5", "g1f3"]
+
+
+def test_checkpoint_without_irreversible_moves():
+    checkpoint, tail = get_checkpoint(play(MOVES[:4]))
+
+    assert checkpoint == chess.STARTING_FEN
+    assert [move.uci() for move in tail] == ["g1f3", "g8f6", "f3g1", "f6g8"]
+
+
+def test_create_then_load_restores_position():
+    database = make_database()
+    board = play(MOVES)
+    database.create_game_state("hash", GameState(board, MOVES, "white", 1500, 1, 2))
+    item = database.dynamodb_client.put_item.call_args.kwargs["Item"]
+
+    database.dynamodb_client.get_item.return_value = {"Item": item}
+    game_state = database.load_game_state("hash")
+
+    # nothing reads the fen, the board is rebuilt from the checkpoint
+    assert "fen" not in item
+    assert game_state.board.fen() == board.fen()
+    assert game_state.board.peek() == board.peek()
+    assert game_state.move_history == MOVES
+
+
+def test_repetitions_survive_a_round_trip():
+    database = make_database()
+    moves = MOVES[:8]
+    database.create_game_state(
+        "hash", GameState(play(moves), moves, "white", 1500, 1, 2)
+    )
+    item = database.dynamodb_client.put_item.call_args.kwargs["Item"]
+
+    board = load_board(item, moves)
+
+    assert board.is_repetition(3)
+    assert board.can_claim_threefold_repetition()
+
+
+def test_loads_games_saved_without_checkpoints():
+    database = make_database({"conversationId": "hash", "moves": ",".join(MOVES)})
+
+    game_state = database.load_game_state("hash")
+
+    assert game_state.board.fen() == play(MOVES).fen()
+    assert len(game_state.board.move_stack) == len(MOVES)
+
+
+def test_migrate_game_states():
+    database = make_database({"conversationId": "hash", "moves": "e4,e5"})
+    database.dynamodb_client.scan.side_effect = [
+        {"Items": [{"conversationId": "hash"}], "LastEvaluatedKey": "hash"},
+        {"Items": []},
+    ]
+
+    assert database.migrate_game_states() == 1
+    update = database.dynamodb_client.update_item.call_args.kwargs
+    values = update["ExpressionAttributeValues"]
+    assert update["ConditionExpression"] == "attribute_not_exists(#version)"
+    assert values[":checkpoint"] == play(["e4"]).fen()
+    assert decode_uci_moves(values[":tail"]) == [chess.Move.from_uci("e7e5")]
+    assert decode_san_moves(values[":moves"]) == ["e4", "e5"]
+    assert database.dynamodb_client.scan.call_args.kwargs["ExclusiveStartKey"] == "hash"
+
+
+def test_loads_games_saved_with_text_moves():
+    item = {
+        "conversationId": "hash",
+        "moves": ",".join(MOVES),
+        "checkpoint": play(MOVES[:9]).fen(),
+        "tail": "e7e5,g1f3",
+    }
+    database = make_database(item)
+
+    game_state = database.load_game_state("hash")
+
+    assert game_state.board.fen() == play(MOVES).fen()
+    assert game_state.move_history == MOVES
+
+
+def test_save_checks_the_version():
+    database = make_database()
+    game_state = GameState(play(["e4"]), ["e4"], "white", 1500, 1, 2, 3)
+
+    saved = database.save_game_state("hash", game_state)
+
+    update = database.dynamodb_client.update_item.call_args.kwargs
+    assert "#version = :expected" in update["ConditionExpression"]
+    assert update["ExpressionAttributeValues"][":expected"] == 3
+    assert update["ExpressionAttributeValues"][":version"] == 4
+    assert saved.version == 4
+
+
+def test_save_conflict():
+    database = make_database()
+    database.dynamodb_client.update_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+    )
+    game_state = GameState(play(["e4"]), ["e4"], "white", 1500, 1, 2, 3)
+
+    with pytest.raises(GameStateConflictError):
+        database.save_game_state("hash", game_state)
+
+
+def test_real_client_accepts_plain_values(monkeypatch):
+    monkeypatch.delenv("IS_OFFLINE", raising=False)
+    monkeypatch.setenv("GAMES_TABLE", "games")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "DUMMY")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "DUMMY")
+    monkeypatch.setenv("GAME_CACHE_SIZE", "0")
+    database = Database(getLogger())
+    board = play(MOVES)
+    checkpoint, tail = get_checkpoint(board)
+    moves = encode_san_moves(MOVES)
+
+    # the stub checks the plain values we pass, then the client has to turn them into
+    # typed AttributeValues to pass validation
+    with Stubber(database.dynamodb_client) as stubber:
+        stubber.add_response("put_item", {})
+        stubber.add_response(
+            "update_item",
+            {},
+            {
+                "TableName": "games",
+                "Key": {"conversationId": "hash"},
+                "UpdateExpression": ANY,
+                "ConditionExpression": ANY,
+                "ExpressionAttributeNames": ANY,
+                "ExpressionAttributeValues": ANY,
+            },
+        )
+        stubber.add_response(
+            "get_item",
+            {
+                "Item": {
+                    "conversationId": {"S": "hash"},
+                    "moves": {"B": moves},
+                    "checkpoint": {"S": checkpoint},
+                    "tail": {"B": encode_uci_moves(tail)},
+                    "assistant_color": {"S": "white"},
+                    "elo": {"S": "1500"},
+                    "created": {"S": "1"},
+                    "updated": {"S": "2"},
+                    "version": {"N": "2"},
+                }
+            },
+            {"TableName": "games", "Key": {"conversationId": "hash"}},
+        )
+        game_state = GameState(board, MOVES, "white", 1500, 1, 2)
+        game_state = database.create_game_state("hash", game_state)
+        database.save_game_state("hash", game_state)
+        loaded = database.load_game_state("hash")
+        stubber.assert_no_pending_responses()
+
+    assert loaded.board.fen() == board.fen()
+    assert loaded.move_history == MOVES
+    assert loaded.version == 2
@@ -0,0 +1,108 @@
+from logging import getLogger
+from unittest.mock import MagicMock, patch
+
+import chess
+import pytest
+from botocore.exceptions import ClientError
+
+from chessgpt.database.cache import GameStateCache, estimate_size
+from chessgpt.database.dynamodb import Database, GameStateConflictError
+from chessgpt.game_state.game_state import GameState
+
+
+def make_game_state(moves, version=1, created=100):
+    board = chess.Board()
+    for move in moves:
+        board.push_san(move)
+    return GameState(board, list(moves), "white", 1500, created, created, version)
+
+
+def make_database():
+    with patch("chessgpt.database.dynamodb.get_dynamodb_client") as mock_get_client:
+        mock_get_client.return_value = MagicMock()
+        with patch.dict("os.environ", {"GAMES_TABLE": "games"}):
+            return Database(getLogger())
+
+
+def test_cache_returns_copies():
+    cache = GameStateCache(10, 1_000_000, 60)
+    cache.set("game", make_game_state(["e4"]))
+
+    game_state, fresh = cache.get("game")
+    game_state.board.push_san("e5")
+    game_state.move_history.append("e5")
+
+    again, _ = cache.get("game")
+    assert fresh
+    assert again.move_history == ["e4"]
+    assert len(again.board.move_stack) == 1
+
+
+def test_cache_evicts_by_count_and_size():
+    cache = GameStateCache(2, 1_000_000, 60)
+    for game in ["a", "b", "c"]:
+        cache.set(game, make_game_state([]))
+    assert cache.get("a") == (None, False)
+    assert cache.stats()["size"] == 2
+
+    size = estimate_size(make_game_state(["e4", "e5"]))
+    cache = GameStateCache(10, size * 2, 60)
+    for game in ["a", "b", "c"]:
+        cache.set(game, make_game_state(["e4", "e5"]))
+    assert cache.get("a") == (None, False)
+    assert cache.stats()["bytes"] == size * 2
+
+
+def test_stale_entries_need_revalidating():
+    cache = GameStateCache(10, 1_000_000, 0)
+    cache.set("game", make_game_state(["e4"], version=3))
+
+    game_state, fresh = cache.get("game")
+    assert game_state is not None and not fresh
+    assert not cache.revalidate("game", 4, 100)
+    assert not cache.revalidate("game", 3, 200)
+    assert cache.revalidate("game", 3, 100)
+    assert cache.stats()["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_database_serves_repeat_loads_from_cache():
+    database = make_database()
+    database.create_game_state("game", make_game_state([]))
+
+    first = database.load_game_state("game")
+    first.board.push_san("e4")
+    first.move_history.append("e4")
+    database.save_game_state("game", first)
+    second = database.load_game_state("game")
+
+    database.dynamodb_client.get_item.assert_not_called()
+    assert second.move_history == ["e4"]
+    assert second.version == 2
+
+
+def test_database_revalidates_stale_games():
+    database = make_database()
+    database.game_state_cache.ttl = 0
+    database.create_game_state("game", make_game_state([]))
+    database.dynamodb_client.get_item.return_value = {
+        "Item": {"version": 1, "created": "100"}
+    }
+
+    game_state = database.load_game_state("game")
+
+    assert game_state.version == 1
+    get_item = database.dynamodb_client.get_item.call_args.kwargs
+    assert get_item["ProjectionExpression"] == "#version, #created"
+
+
+def test_database_conflict_invalidates_cache():
+    database = make_database()
+    database.create_game_state("game", make_game_state([]))
+    database.dynamodb_client.update_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+    )
+
+    with pytest.raises(GameStateConflictError):
+        database.save_game_state("game", make_game_state(["e4"]))
+
+    assert database.game_state_cache.get("game") == (None, False)
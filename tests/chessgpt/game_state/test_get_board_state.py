@@ -1,6 +1,8 @@
 import chess
 from logging import getLogger
 from unittest.mock import patch, Mock
+from chessgpt.stockfish.analysis import Analysis
+from chessgpt.stockfish.budgets import HINT_BUDGET, get_search_budget
 from chessgpt.game_state.game_state import (
     get_board_state_for_assistant,
     get_board_state_for_user,
@@ -12,14 +14,13 @@ from chessgpt.game_state.game_state import (
 logger = getLogger()
 
 
-@patch("chessgpt.game_state.game_state.get_stockfish")
-@patch("chessgpt.game_state.game_state.get_best_move")
+@patch("chessgpt.game_state.game_state.ponder_after_move")
+@patch("chessgpt.game_state.game_state.analyse_position")
 @patch("chessgpt.game_state.game_state.get_markdown")
 def test_get_board_state_for_assistant(
-    mock_get_markdown, mock_get_best_move, mock_get_stockfish
+    mock_get_markdown, mock_analyse_position, mock_ponder_after_move
 ):
-    mock_get_stockfish.return_value = "stockfish"
-    mock_get_best_move.return_value = "e2e4"
+    mock_analyse_position.return_value = Analysis([chess.Move.from_uci("e2e4")], "book")
     mock_get_markdown.return_value = "markdown"
 
     game_state = GameState(chess.Board(), [], "", 1200, "", "")
@@ -32,21 +33,24 @@ def test_get_board_state_for_assistant(
         "game_over": False,
         "display": "markdown",
         "best_moves": "e4",
+        "move_source": "book",
         "EXTRA_INFORMATION_TO_ASSISTANT": "It's the assistant's turn. The assistant is playing white. Pick a move from the following best moves for white: e4. Use the make move API to make the move for the assistant and the show the board to the user using the markdown from the display field.",
     }
+    mock_ponder_after_move.assert_called_once_with(
+        "hash", game_state.board, chess.Move.from_uci("e2e4"), 2850, HINT_BUDGET
+    )
 
 
-@patch("chessgpt.game_state.game_state.get_stockfish")
-@patch("chessgpt.game_state.game_state.get_best_moves")
+@patch("chessgpt.game_state.game_state.ponder_after_move")
+@patch("chessgpt.game_state.game_state.analyse_position")
 @patch("chessgpt.game_state.game_state.get_markdown")
 def test_get_board_state_for_user(
-    mock_get_markdown, mock_get_best_moves, mock_get_stockfish
+    mock_get_markdown, mock_analyse_position, mock_ponder_after_move
 ):
-    # Define a dummy move to return from the mocked get_best_moves function
-    dummy_move = [{"Move": "e2e4", "Score": 0.2}, {"Move": "e7e5", "Score": 0.1}]
+    # Define dummy moves to return from the mocked analyse_position function
+    dummy_moves = [chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5")]
 
-    mock_get_stockfish.return_value = "stockfish"
-    mock_get_best_moves.return_value = dummy_move
+    mock_analyse_position.return_value = Analysis(dummy_moves, "engine")
     mock_get_markdown.return_value = "markdown"
 
     game_state = GameState(chess.Board(), [], "", 1200, "", "")
@@ -59,8 +63,17 @@ def test_get_board_state_for_user(
         "game_over": False,
         "display": "markdown",
         "best_moves": "e4, exe5",
+        "move_source": "engine",
         "EXTRA_INFORMATION_TO_ASSISTANT": "It's the user's turn to move. The user is playing white. Show the board to the user using the markdown from the display field. Prompt the user to make their move using SAN notation (e.g. e4, Nf3, etc). Use the make move API to make the move for the user.",
     }
+    mock_analyse_position.assert_called_once_with(game_state.board, 2850, HINT_BUDGET)
+    mock_ponder_after_move.assert_called_once_with(
+        "hash",
+        game_state.board,
+        chess.Move.from_uci("e2e4"),
+        1200,
+        get_search_budget(1200),
+    )
 
 
 def test_get_board_state():
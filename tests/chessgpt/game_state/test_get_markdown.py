@@ -0,0 +1,21 @@
+import chess
+from logging import getLogger
+
+from chessgpt.compression.position import decode_position
+from chessgpt.game_state.game_state import GameState, get_markdown
+
+
+def test_markdown_links_to_v2_board():
+    board = chess.Board()
+    board.push_san("e4")
+    game_state = GameState(board, ["e4"], "white", 1500, 1, 1)
+
+    markdown = get_markdown(getLogger(), "hash", game_state, "https", "example.com")
+
+    prefix = "![Board](https://example.com/board.svg?b="
+    assert markdown.startswith(prefix)
+    position = decode_position(markdown[len(prefix):-1])
+    assert position.board.fen() == board.fen()
+    # the user is playing black
+    assert position.orientation == chess.BLACK
+    assert position.lastmove == chess.Move.from_uci("e2e4")
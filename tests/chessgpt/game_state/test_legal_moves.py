@@ -0,0 +1,86 @@
+import chess
+import pytest
+
+from chessgpt.game_state.legal_moves import (
+    build_move_index,
+    get_move_index,
+    resolve_move,
+)
+
+
+def board_after(moves):
+    board = chess.Board()
+    for move in moves:
+        board.push_san(move)
+    return board
+
+
+@pytest.mark.parametrize(
+    "text, uci",
+    [
+        ("e4", "e2e4"),
+        ("e2e4", "e2e4"),
+        ("e2-e4", "e2e4"),
+        ("Nf3", "g1f3"),
+        ("nf3", "g1f3"),
+        ("Ng1f3", "g1f3"),
+        ("Ng1-f3", "g1f3"),
+        ("Nf3!", "g1f3"),
+        (" Nf3 ", "g1f3"),
+    ],
+)
+def test_resolves_opening_moves(text, uci):
+    assert resolve_move(chess.Board(), text) == chess.Move.from_uci(uci)
+
+
+@pytest.mark.parametrize("text", ["O-O", "0-0", "o-o", "e1g1", "O-O+"])
+def test_resolves_castling(text):
+    board = board_after(["e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5"])
+
+    assert resolve_move(board, text) == chess.Move.from_uci("e1g1")
+
+
+def test_check_suffix_is_optional():
+    board = board_after(["f3", "e5", "g4"])
+
+    assert resolve_move(board, "Qh4#") == chess.Move.from_uci("d8h4")
+    assert resolve_move(board, "Qh4") == chess.Move.from_uci("d8h4")
+    assert resolve_move(board, "Qh4+") == chess.Move.from_uci("d8h4")
+
+
+def test_lowercase_b_is_a_pawn_capture_first():
+    board = chess.Board("4k3/8/8/8/8/2p5/1P6/2B1K3 w - - 0 1")
+
+    assert resolve_move(board, "bxc3") == chess.Move.from_uci("b2c3")
+    assert resolve_move(board, "bd2") == chess.Move.from_uci("c1d2")
+
+
+def test_promotions():
+    board = chess.Board("8/4P3/8/8/8/8/k7/4K3 w - - 0 1")
+
+    assert resolve_move(board, "e8=Q") == chess.Move.from_uci("e7e8q")
+    assert resolve_move(board, "e8=q") == chess.Move.from_uci("e7e8q")
+    assert resolve_move(board, "e7e8n") == chess.Move.from_uci("e7e8n")
+    assert resolve_move(board, "e8") is None
+
+
+@pytest.mark.parametrize("text", ["e5", "Nf6", "wibble", "", "e2e5", "O-O"])
+def test_illegal_moves(text):
+    assert resolve_move(chess.Board(), text) is None
+
+
+def test_san_lists_the_legal_moves():
+    board = board_after(["e4", "e5"])
+
+    move_index = build_move_index(board)
+
+    assert move_index.san == [board.san(move) for move in board.legal_moves]
+    assert all(move_index.sans[move] == board.san(move) for move in board.legal_moves)
+
+
+def test_index_is_cached_by_position():
+    # the same position reached by different move orders
+    first = board_after(["Nf3", "Nf6", "Nc3"])
+    second = board_after(["Nc3", "Nf6", "Nf3"])
+
+    assert get_move_index(first) is get_move_index(second)
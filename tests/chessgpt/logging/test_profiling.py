@@ -0,0 +1,86 @@
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from chessgpt.logging.profiling import main, read_profiles, setup_profiling
+from chessgpt.utils.openai import get_conversation_id_hash
+
+
+def make_app(environ):
+    app = Flask(__name__)
+    app.logger = MagicMock()
+
+    @app.route("/api/move", methods=["POST"])
+    def make_move():
+        return "ok"
+
+    with patch.dict("os.environ", environ, clear=False):
+        setup_profiling(app)
+    return app
+
+
+@pytest.fixture
+def spool(tmp_path):
+    yield str(tmp_path / "profiles")
+
+
+def test_profiling_is_off_without_a_directory():
+    app = make_app({"PROFILE_TOKEN": "secret"})
+
+    assert app.before_request_funcs == {}
+    assert app.teardown_request_funcs == {}
+
+
+def test_request_with_the_token_is_profiled(spool):
+    app = make_app({"PROFILE_DIR": spool, "PROFILE_TOKEN": "secret"})
+
+    app.test_client().post(
+        "/api/move",
+        headers={"X-Profile": "secret", "Openai-Conversation-Id": "testcid"},
+    )
+
+    [(path, metadata)] = read_profiles(spool)
+    assert os.path.exists(path)
+    assert metadata["route"] == "/api/move"
+    assert metadata["method"] == "POST"
+    assert metadata["status"] == 200
+    assert metadata["conversation_id_hash"] == get_conversation_id_hash("testcid")
+
+
+def test_request_with_the_wrong_token_is_not_profiled(spool):
+    app = make_app({"PROFILE_DIR": spool, "PROFILE_TOKEN": "secret"})
+
+    app.test_client().post("/api/move", headers={"X-Profile": "guess"})
+    app.test_client().post("/api/move")
+
+    assert read_profiles(spool) == []
+
+
+def test_sampled_requests_are_profiled_until_the_spool_is_full(spool):
+    app = make_app(
+        {"PROFILE_DIR": spool, "PROFILE_SAMPLE_RATE": "1", "PROFILE_MAX_FILES": "2"}
+    )
+
+    for _ in range(3):
+        app.test_client().post("/api/move")
+
+    assert len(read_profiles(spool)) == 2
+    app.logger.warning.assert_called_once()
+
+
+def test_report_adds_up_the_profiles(spool, capsys):
+    app = make_app({"PROFILE_DIR": spool, "PROFILE_SAMPLE_RATE": "1"})
+    for _ in range(2):
+        app.test_client().post("/api/move")
+
+    stats = main([spool, "--top", "5", "--route", "/api/move"])
+
+    output = capsys.readouterr().out
+    assert "2 profiles" in output
+    assert "POST /api/move" in output
+    assert any(name == "make_move" for _, _, name in stats.stats)
+    with open(read_profiles(spool)[0][0][: -len(".prof")] + ".json") as f:
+        assert json.load(f)["duration_ms"] >= 0
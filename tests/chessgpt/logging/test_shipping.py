@@ -0,0 +1,117 @@
+import logging
+import queue
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from chessgpt.logging.logging import setup_logging
+from chessgpt.logging.shipping import (
+    BatchingQueueListener,
+    DroppingQueueHandler,
+    MemorySink,
+    RateLimitFilter,
+    SampleFilter,
+    parse_sample_rates,
+    ship_logs,
+)
+
+
+@pytest.fixture
+def logger(request):
+    logger = logging.getLogger("test_shipping." + request.node.name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    yield logger
+    logger.handlers.clear()
+
+
+def make_record(level=logging.INFO, lineno=1):
+    return logging.LogRecord("chess", level, "board_svg.py", lineno, "msg", None, None)
+
+
+def test_records_are_shipped_in_the_background(logger, monkeypatch):
+    monkeypatch.setenv("LOG_RATE_LIMIT", "0")
+    sink = MemorySink()
+    sink.setFormatter(logging.Formatter("%(request_path)s %(message)s"))
+    listener = ship_logs(logger, sink)
+    app = Flask(__name__)
+
+    with app.test_request_context("/board.svg"):
+        for i in range(3):
+            logger.info("Referrer: %s", i)
+    logger.info("No request")
+    listener.flush()
+
+    assert sink.lines == [
+        "/board.svg Referrer: 0",
+        "/board.svg Referrer: 1",
+        "/board.svg Referrer: 2",
+        "- No request",
+    ]
+    listener.stop()
+
+
+def test_listener_batches_records():
+    log_queue = queue.Queue()
+    sink = MemorySink()
+    listener = BatchingQueueListener(log_queue, sink, batch_size=2, batch_wait=60)
+    for _ in range(5):
+        log_queue.put(make_record())
+
+    listener.start()
+    listener.stop()
+
+    assert len(sink.lines) == 5
+    # two full batches then the one ended by the stop
+    assert sink.batches == 3
+
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(1))
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.dropped == 1
+
+
+def test_rate_limit_is_per_line():
+    rate_limit = RateLimitFilter(per_second=0.001, burst=2)
+
+    assert [rate_limit.filter(make_record(lineno=1)) for _ in range(3)] == [
+        True,
+        True,
+        False,
+    ]
+    assert rate_limit.filter(make_record(lineno=2))
+    assert rate_limit.filter(make_record(logging.ERROR, lineno=1))
+    assert rate_limit.dropped == 1
+
+
+def test_sampling_keeps_warnings():
+    sample = SampleFilter(parse_sample_rates("chess=0, other=1"))
+
+    assert not sample.filter(make_record())
+    assert sample.filter(make_record(logging.WARNING))
+
+
+def test_lambda_flushes_at_the_end_of_each_request(monkeypatch):
+    monkeypatch.delenv("IS_OFFLINE", raising=False)
+    monkeypatch.setenv("PAPERTRAIL_APP_NAME", "chess-test")
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "api")
+    sink = MemorySink()
+    app = Flask(__name__)
+
+    @app.route("/api/fen")
+    def fen():
+        return "ok"
+
+    with patch("chessgpt.logging.logging.SysLogHandler", return_value=sink):
+        setup_logging(app)
+    app.test_client().get("/api/fen")
+
+    assert sink.lines == [
+        "chess-test: chess INFO /api/fen Request: http://localhost/api/fen"
+    ]
+    app.logger.handlers.clear()
@@ -0,0 +1,71 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from chessgpt.logging.timing import Trace, server_timing, setup_timing, span
+
+
+def make_client(sample_rate):
+    app = Flask(__name__)
+    app.logger = MagicMock()
+
+    @app.route("/api/slow")
+    def slow():
+        with span("db-load"):
+            pass
+        for _ in range(2):
+            with span("engine-search"):
+                pass
+        return "ok"
+
+    with patch.dict("os.environ", {"TIMING_SAMPLE_RATE": sample_rate}):
+        setup_timing(app)
+    return app, app.test_client()
+
+
+def test_traced_request_has_server_timing():
+    app, client = make_client("1")
+
+    response = client.get("/api/slow")
+
+    metrics = [
+        metric.split(";") for metric in response.headers["Server-Timing"].split(", ")
+    ]
+    assert [metric[0] for metric in metrics] == ["db-load", "engine-search", "total"]
+    assert metrics[1][2] == 'desc="x2"'
+    message, line = app.logger.info.call_args.args
+    assert message == "Timing: %s"
+    timing = json.loads(line)
+    assert timing["path"] == "/api/slow"
+    assert timing["status"] == 200
+    assert timing["stages"]["engine-search"]["count"] == 2
+
+
+@pytest.mark.parametrize("sample_rate", ["0", "0.5"])
+def test_untraced_request_has_no_server_timing(sample_rate):
+    app, client = make_client(sample_rate)
+
+    with patch("chessgpt.logging.timing.random.random", return_value=0.9):
+        response = client.get("/api/slow")
+
+    assert "Server-Timing" not in response.headers
+    app.logger.info.assert_not_called()
+
+
+def test_span_outside_a_request_does_nothing():
+    with span("engine-search"):
+        pass
+
+
+def test_server_timing_adds_up_repeated_stages():
+    trace = Trace()
+    with trace.span("db-load"):
+        pass
+    with trace.span("db-load"):
+        pass
+
+    assert trace.stages["db-load"][1] == 2
+    assert server_timing(trace).startswith("db-load;dur=")
+    assert server_timing(trace).split(", ")[-1].startswith("total;dur=")
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from chessgpt.metrics.registry import Registry
+
+
+def test_counter_adds_up_every_thread():
+    counter = Registry().counter("moves_total", "Moves", ["color"])
+
+    def record():
+        for _ in range(1000):
+            counter.inc("white")
+        counter.inc("black", amount=2)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.collect() == {("white",): 8000, ("black",): 16}
+
+
+def test_counter_checks_labels():
+    counter = Registry().counter("moves_total", "Moves", ["color"])
+
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram(
+        "search_seconds", "Searches", ["elo"], buckets=(0.1, 1)
+    )
+    histogram.observe(0.05, 1500)
+    histogram.observe(0.5, 1500)
+    histogram.observe(5, 1500)
+
+    assert registry.render().splitlines() == [
+        "# HELP search_seconds Searches",
+        "# TYPE search_seconds histogram",
+        'search_seconds_bucket{elo="1500",le="0.1"} 1',
+        'search_seconds_bucket{elo="1500",le="1"} 2',
+        'search_seconds_bucket{elo="1500",le="+Inf"} 3',
+        'search_seconds_sum{elo="1500"} 5.55',
+        'search_seconds_count{elo="1500"} 3',
+    ]
+
+
+def test_histogram_times_a_block():
+    histogram = Registry().histogram("search_seconds", "Searches")
+
+    with histogram.time():
+        pass
+
+    counts = histogram.collect()[()]
+    assert sum(counts[:-1]) == 1
+
+
+def test_gauges_are_read_when_rendered():
+    registry = Registry()
+    sizes = {"game": 3}
+    registry.gauge("cache_entries", "Entries", lambda: sizes, ["cache"])
+    sizes["svg"] = 5
+
+    assert 'cache_entries{cache="game"} 3' in registry.render()
+    assert 'cache_entries{cache="svg"} 5' in registry.render()
+
+
+def test_broken_gauge_is_left_out():
+    registry = Registry()
+    registry.gauge("broken", "Broken", lambda: 1 / 0)
+    registry.counter("moves_total", "Moves").inc()
+
+    text = registry.render()
+
+    assert "broken" not in text
+    assert "moves_total 1" in text
+
+
+def test_metric_names_are_unique():
+    registry = Registry()
+    registry.counter("moves_total", "Moves")
+
+    with pytest.raises(ValueError):
+        registry.histogram("moves_total", "Moves")
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("requests_total", "Requests", ["route"]).inc('/a"b\\')
+
+    assert 'requests_total{route="/a\\"b\\\\"} 1' in registry.render()
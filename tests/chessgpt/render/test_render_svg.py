@@ -0,0 +1,85 @@
+import re
+import xml.etree.ElementTree as ET
+
+import chess
+import chess.svg
+import pytest
+
+from chessgpt.render.svg import render_svg
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def drawing(svg):
+    """
+    What an SVG draws, with every <use> replaced by what it points at and each
+    glyph by its path data, so the two renderers can be compared
+    """
+    root = ET.fromstring(svg)
+    defs = {
+        element.get("id"): element
+        for element in root.iter()
+        if element.get("id") is not None
+    }
+    shapes = []
+    for element in root:
+        if element.tag in [SVG + "defs", SVG + "desc"]:
+            continue
+        if element.tag == SVG + "use":
+            glyph = ET.tostring(defs[element.get("href")[1:]]).decode()
+        elif element.tag == SVG + "g":
+            # chess.svg draws the coordinates inline
+            glyph = "".join(ET.tostring(child).decode() for child in element)
+        else:
+            shapes.append(tuple(sorted(element.attrib.items())))
+            continue
+        shapes.append(
+            (
+                element.get("transform"),
+                element.get("fill"),
+                element.get("stroke"),
+                re.sub(r' id="[^"]*"', "", glyph),
+            )
+        )
+    return root.attrib, sorted(map(str, shapes))
+
+
+@pytest.mark.parametrize("orientation", [chess.WHITE, chess.BLACK])
+@pytest.mark.parametrize(
+    "moves",
+    [
+        [],
+        ["e4", "e5", "Nf3", "Nc6", "Bb5"],
+        ["f3", "e5", "g4", "Qh4"],
+        ["e4", "d5", "exd5", "Qxd5", "Nc3", "Qa5", "d4", "c6", "Nf3", "Bg4"],
+    ],
+)
+def test_draws_the_same_board_as_chess_svg(moves, orientation):
+    board = chess.Board()
+    for move in moves:
+        board.push_san(move)
+    lastmove = board.peek() if board.move_stack else None
+    check = board.king(board.turn) if board.is_check() else None
+
+    expected = chess.svg.board(
+        board, orientation=orientation, lastmove=lastmove, check=check, size=300
+    )
+    actual = render_svg(board, orientation, lastmove, check, 300)
+
+    assert drawing(actual) == drawing(expected)
+
+
+def test_defines_each_piece_once():
+    svg = render_svg(chess.Board())
+
+    assert svg.count('id="white-pawn"') == 1
+    assert svg.count(' href="#white-pawn"') == 8
+    assert 'id="check_gradient"' not in svg
+
+
+def test_only_defines_pieces_on_the_board():
+    svg = render_svg(chess.Board("8/5k2/8/3K4/8/8/4P3/8 w - - 0 1"))
+
+    assert 'id="white-pawn"' in svg
+    assert 'id="black-pawn"' not in svg
+    assert 'id="white-queen"' not in svg
@@ -0,0 +1,75 @@
+import gzip
+
+import chess
+
+from chessgpt.render.cache import SvgCache, render_key
+
+
+def test_render_key_ignores_counters():
+    board = chess.Board()
+    other = chess.Board()
+    other.fullmove_number = 20
+
+    assert render_key(board, chess.WHITE, None, 400) == render_key(
+        other, chess.WHITE, None, 400
+    )
+    assert render_key(board, chess.WHITE, None, 400) != render_key(
+        board, chess.BLACK, None, 400
+    )
+
+
+def test_render_key_includes_check():
+    board = chess.Board()
+    for move in ["f3", "e5", "g4"]:
+        board.push_san(move)
+    key = render_key(board, chess.WHITE, board.peek(), 400)
+    board.push_san("Qh4")
+
+    assert render_key(board, chess.WHITE, board.peek(), 400).split()[3] == "e1"
+    assert key.split()[3] == "-"
+
+
+def test_get_renders_once():
+    cache = SvgCache(1024 * 1024)
+    calls = []
+
+    def render():
+        calls.append(1)
+        return "<svg/>"
+
+    first = cache.get("key", render)
+    second = cache.get("key", render)
+
+    assert len(calls) == 1
+    assert first.etag == second.etag
+    assert first.variants["identity"] == b"<svg/>"
+    assert gzip.decompress(first.variants["gzip"]) == b"<svg/>"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_by_size():
+    svg = "<svg>" + "x" * 1000 + "</svg>"
+    cache = SvgCache(3000)
+    events = []
+    cache.add_listener(events.append)
+
+    for i in range(5):
+        cache.get(f"key{i}", lambda: svg)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 3000
+    assert stats["evictions"] > 0
+    assert events.count("eviction") == stats["evictions"]
+    # the oldest boards went first
+    cache.get("key4", lambda: svg)
+    assert cache.stats()["hits"] == 1
+
+
+def test_too_big_is_not_cached():
+    cache = SvgCache(10)
+
+    rendered = cache.get("key", lambda: "<svg>too big</svg>")
+
+    assert rendered.variants["identity"] == b"<svg>too big</svg>"
+    assert cache.stats()["size"] == 0
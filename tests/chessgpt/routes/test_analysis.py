@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from chessgpt.routes.analysis import get_analysis_routes
+from chessgpt.stockfish.review import ReviewedMove
+
+
+@pytest.fixture
+def database():
+    db = MagicMock()
+    db.load_game_state = MagicMock()
+    yield db
+
+
+@pytest.fixture
+def client(database):
+    app = Flask(__name__)
+    app.logger = MagicMock()
+    app.database = database
+    get_analysis_routes(app)
+    with app.test_client() as client:
+        yield client
+
+
+def test_no_game(database, client):
+    database.load_game_state.return_value = None
+
+    response = client.get("/api/analysis", headers={"Openai-Conversation-Id": "cid"})
+
+    assert response.status_code == 404
+
+
+@patch("chessgpt.routes.analysis.review_game")
+def test_analysis(mock_review_game, database, client):
+    database.load_game_state.return_value = MagicMock(move_history=["f3", "e5", "g4"])
+    mock_review_game.return_value = iter(
+        [
+            ReviewedMove(1, "f3", -40, None, "e4", 70, "inaccuracy"),
+            ReviewedMove(2, "e5", -30, None, "e5", 0, None),
+            ReviewedMove(3, "g4", -99997, -3, "d4", 99967, "blunder"),
+        ]
+    )
+
+    response = client.get("/api/analysis", headers={"Openai-Conversation-Id": "cid"})
+
+    assert response.status_code == 200
+    mock_review_game.assert_called_once_with(["f3", "e5", "g4"])
+    assert [move["move"] for move in response.json["moves"]] == ["f3", "e5", "g4"]
+    assert response.json["moves"][2]["mate"] == -3
+    assert response.json["summary"] == {
+        "white": {"blunder": 1, "mistake": 0, "inaccuracy": 1},
+        "black": {"blunder": 0, "mistake": 0, "inaccuracy": 0},
+    }
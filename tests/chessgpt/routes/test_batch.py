@@ -0,0 +1,167 @@
+from unittest.mock import MagicMock, patch
+
+import chess
+import pytest
+from flask import Flask
+
+from chessgpt.database.dynamodb import GameStateConflictError
+from chessgpt.game_state.game_state import GameState
+from chessgpt.routes.batch import batch_routes
+
+
+@pytest.fixture
+def database():
+    db = MagicMock()
+    db.load_game_state = MagicMock()
+    db.save_game_state = MagicMock()
+    db.create_game_state = MagicMock()
+    yield db
+
+
+@pytest.fixture
+def client(database):
+    app = Flask(__name__)
+    app.logger = MagicMock()
+    app.database = database
+    batch_routes(app)
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def board_state():
+    # the board state needs the engine, the other route tests cover it
+    def fake_board_state(logger, conversation_id_hash, game_state, scheme, host):
+        return {"game_over": False, "fen": game_state.board.fen()}
+
+    with patch(
+        "chessgpt.routes.batch.get_board_state", side_effect=fake_board_state
+    ), patch("chessgpt.routes.move.get_board_state", side_effect=fake_board_state):
+        yield
+
+
+def make_game_state(moves):
+    board = chess.Board()
+    for move in moves:
+        board.push_san(move)
+    return GameState(board, list(moves), "black", 1500, 1, 1, 3)
+
+
+def post(client, operations):
+    return client.post(
+        "/api/batch",
+        headers={"Openai-Conversation-Id": "testcid"},
+        json={"operations": operations},
+    )
+
+
+def test_new_game_and_move_are_created_in_one_write(database, client):
+    response = post(
+        client,
+        [
+            {"op": "new_game", "assistant_color": "black", "elo": 1500},
+            {"op": "move", "move": "e4"},
+            {"op": "fen"},
+            {"op": "move_history"},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert response.json["success"]
+    assert [result["status"] for result in response.json["results"]] == [200] * 4
+    assert response.json["results"][3]["result"] == {"move_history": ["1. e4"]}
+    database.load_game_state.assert_not_called()
+    database.save_game_state.assert_not_called()
+    database.create_game_state.assert_called_once()
+    game_state = database.create_game_state.call_args.args[1]
+    assert game_state.move_history == ["e4"]
+
+
+def test_moves_are_loaded_and_saved_once(database, client):
+    database.load_game_state.return_value = make_game_state(["e4", "e5"])
+
+    response = post(
+        client,
+        [{"op": "move", "move": "Nf3"}, {"op": "move", "move": "Nc6"}, {"op": "fen"}],
+    )
+
+    assert response.status_code == 200
+    assert response.json["success"]
+    database.load_game_state.assert_called_once()
+    database.save_game_state.assert_called_once()
+    game_state = database.save_game_state.call_args.args[1]
+    assert game_state.move_history == ["e4", "e5", "Nf3", "Nc6"]
+    assert response.json["results"][2]["result"]["FEN"] == game_state.board.fen()
+
+
+def test_reads_dont_save(database, client):
+    database.load_game_state.return_value = make_game_state(["e4"])
+
+    response = post(client, [{"op": "fen"}, {"op": "move_history"}])
+
+    assert response.status_code == 200
+    assert response.json["results"][1]["result"] == {"move_history": ["1. e4"]}
+    database.save_game_state.assert_not_called()
+    database.create_game_state.assert_not_called()
+
+
+def test_stops_at_an_illegal_move_and_saves_the_moves_before_it(database, client):
+    database.load_game_state.return_value = make_game_state([])
+
+    response = post(
+        client,
+        [
+            {"op": "move", "move": "e4"},
+            {"op": "move", "move": "e4"},
+            {"op": "fen"},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert not response.json["success"]
+    results = response.json["results"]
+    assert [result["status"] for result in results] == [200, 400]
+    assert "Illegal move" in results[1]["result"]["error_message"]
+    game_state = database.save_game_state.call_args.args[1]
+    assert game_state.move_history == ["e4"]
+
+
+def test_no_game_found(database, client):
+    database.load_game_state.return_value = None
+
+    response = post(client, [{"op": "fen"}])
+
+    assert response.json["results"] == [
+        {
+            "op": "fen",
+            "status": 404,
+            "result": {"success": False, "message": "No game found"},
+        }
+    ]
+
+
+def test_unknown_operation(database, client):
+    database.load_game_state.return_value = make_game_state([])
+
+    response = post(client, [{"op": "resign"}, {"op": "fen"}])
+
+    assert not response.json["success"]
+    assert len(response.json["results"]) == 1
+    assert response.json["results"][0]["status"] == 400
+
+
+@pytest.mark.parametrize("operations", [None, [], "fen", [{"op": "fen"}] * 11])
+def test_rejects_bad_operation_lists(client, operations):
+    response = post(client, operations)
+
+    assert response.status_code == 400
+    assert not response.json["success"]
+
+
+def test_conflict(database, client):
+    database.load_game_state.return_value = make_game_state([])
+    database.save_game_state.side_effect = GameStateConflictError("hash")
+
+    response = post(client, [{"op": "move", "move": "e4"}])
+
+    assert response.status_code == 409
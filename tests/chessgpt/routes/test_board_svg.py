@@ -1,9 +1,15 @@
+import gzip
+
 import pytest
 from unittest.mock import MagicMock, patch
 from unittest.mock import ANY
 from flask import Flask
 
+import chess
+
 # import your register_routes function
+from chessgpt.compression.huffman import encode_board
+from chessgpt.compression.position import encode_position
 from chessgpt.routes.board_svg import board_routes
 
 
@@ -44,7 +50,7 @@ def test_invalid_b(client):
     }
 
 
-@patch("chessgpt.routes.board_svg.decode_board", return_value=MagicMock())
+@patch("chessgpt.routes.board_svg.decode_board", return_value=chess.Board())
 def test_b_query_param(mock_decode_board, client):
     response = client.get("/board.svg?b=testb")
 
@@ -53,3 +59,82 @@ def test_b_query_param(mock_decode_board, client):
 
     assert response.status_code == 200
     assert response.mimetype == "image/svg+xml"
+
+
+def test_v2_b_query_param(client):
+    board = chess.Board()
+    for move in ["f3", "e5", "g4", "Qh4"]:
+        board.push_san(move)
+
+    response = client.get(f"/board.svg?b={encode_position(board, chess.BLACK)}")
+
+    assert response.status_code == 200
+    svg = response.get_data(as_text=True)
+    # white is in check and the last move is highlighted
+    assert "check" in svg
+    assert "lastmove" in svg
+
+
+def test_v1_b_query_param(client):
+    response = client.get(f"/board.svg?b={encode_board(chess.Board())}")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/svg+xml"
+
+
+def test_etag_and_not_modified(client):
+    url = f"/board.svg?fen={chess.Board().fen()}"
+    response = client.get(url)
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, max-age=31536000"
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.get_data() == b""
+
+
+def test_same_picture_same_etag(client):
+    # the move counters don't change the picture
+    board = chess.Board()
+    first = client.get(f"/board.svg?fen={board.fen()}")
+    board.fullmove_number = 10
+    second = client.get(f"/board.svg?fen={board.fen()}")
+    flipped = client.get(f"/board.svg?b={encode_position(board, chess.BLACK)}")
+
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["ETag"] != flipped.headers["ETag"]
+
+
+def test_gzip_encoding(client):
+    url = f"/board.svg?b={encode_board(chess.Board())}"
+    plain = client.get(url)
+    response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+
+def test_etag_only_matches_the_same_encoding(client):
+    url = f"/board.svg?b={encode_board(chess.Board())}"
+    plain_etag = client.get(url).headers["ETag"]
+    gzip_etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    # a cached plain body doesn't validate a gzipped one
+    response = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": plain_etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    response = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == gzip_etag
@@ -23,8 +23,9 @@ def test_levels(client: FlaskClient):
     assert response.status_code == 200
     # check that we got an array of levels
     assert isinstance(response.json, list)
-    # check that each level has a name, description and elo
+    # check that each level has a name, description, elo and search budget
     for level in response.json:
         assert "name" in level
         assert "description" in level
         assert "elo" in level
+        assert level["search"]["depth"] > 0
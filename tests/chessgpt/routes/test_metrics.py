@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from chessgpt.logging.logging import setup_logging
+from chessgpt.routes.metrics import get_metrics_routes
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.delenv("IS_OFFLINE", raising=False)
+    monkeypatch.delenv("PAPERTRAIL_APP_NAME", raising=False)
+    monkeypatch.delenv("OPENAI_CHESS_SECRET", raising=False)
+    app = Flask(__name__)
+    app.logger = MagicMock()
+    app.database = MagicMock()
+    app.database.game_state_cache = None
+    setup_logging(app)
+    get_metrics_routes(app)
+
+    @app.route("/api/fen")
+    def fen():
+        return "ok"
+
+    yield app
+
+
+def test_metrics_counts_requests_by_route(app):
+    client = app.test_client()
+    client.get("/api/fen")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "# TYPE chessgpt_requests_total counter" in text
+    assert 'chessgpt_requests_total{method="GET",route="/api/fen",status="200"}' in text
+    assert (
+        'chessgpt_request_duration_seconds_count{method="GET",route="/api/fen"}' in text
+    )
+    assert 'chessgpt_cache_entries{cache="analysis"}' in text
+
+
+def test_metrics_requests_are_not_logged(app):
+    client = app.test_client()
+
+    client.get("/metrics")
+    client.get("/api/fen")
+
+    logged = [
+        call.args[1] for call in app.logger.info.call_args_list if len(call.args) > 1
+    ]
+    assert logged == ["http://localhost/api/fen"]
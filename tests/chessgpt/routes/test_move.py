@@ -2,7 +2,7 @@ import pytest
 from flask import Flask
 from flask.testing import FlaskClient
 from unittest.mock import MagicMock, Mock, patch
-from chessgpt.database.dynamodb import Database
+from chessgpt.database.dynamodb import Database, GameStateConflictError
 from chessgpt.routes.move import try_make_move, make_move_routes
 import chess
 
@@ -53,6 +53,7 @@ def test_make_san_move_success(database: Database, client: FlaskClient):
     mock_game_state = Mock()
     mock_game_state.board = chess.Board()
     mock_game_state.move_history = []
+    mock_game_state.elo = 1500
     database.load_game_state.return_value = mock_game_state
 
     response = client.post(
@@ -67,6 +68,7 @@ def test_make_uci_move_success(database: Database, client: FlaskClient):
     mock_game_state = Mock()
     mock_game_state.board = chess.Board()
     mock_game_state.move_history = []
+    mock_game_state.elo = 1500
     database.load_game_state.return_value = mock_game_state
 
     response = client.post(
@@ -83,6 +85,7 @@ def test_make_invalid_move_fails(database: Database, client: FlaskClient):
     mock_game_state = Mock()
     mock_game_state.board = chess.Board()
     mock_game_state.move_history = []
+    mock_game_state.elo = 1500
     database.load_game_state.return_value = mock_game_state
 
     response = client.post(
@@ -99,6 +102,7 @@ def test_make_garbage_move_fails(database: Database, client: FlaskClient):
     mock_game_state = Mock()
     mock_game_state.board = chess.Board()
     mock_game_state.move_history = []
+    mock_game_state.elo = 1500
     database.load_game_state.return_value = mock_game_state
 
     response = client.post(
@@ -108,3 +112,75 @@ def test_make_garbage_move_fails(database: Database, client: FlaskClient):
     )
 
     assert response.status_code == 400
+
+
+def make_game_state(moves):
+    game_state = Mock()
+    game_state.board = chess.Board()
+    for move in moves:
+        game_state.board.push_san(move)
+    game_state.move_history = list(moves)
+    game_state.elo = 1500
+    return game_state
+
+
+def test_move_is_retried_on_the_new_position(database: Database, client: FlaskClient):
+    # other requests play e4 e5 between us loading the game and saving it
+    database.load_game_state.side_effect = [
+        make_game_state([]),
+        make_game_state(["e4", "e5"]),
+    ]
+    database.save_game_state.side_effect = [GameStateConflictError("testcid"), None]
+
+    response = client.post(
+        "/api/move", headers={"Openai-Conversation-Id": "testcid"}, json={"move": "Nf3"}
+    )
+
+    assert response.status_code == 200
+    assert database.save_game_state.call_count == 2
+    saved = database.save_game_state.call_args.args[1]
+    assert saved.move_history == ["e4", "e5", "Nf3"]
+
+
+def test_duplicate_move_is_not_made_twice(database: Database, client: FlaskClient):
+    database.load_game_state.side_effect = [
+        make_game_state([]),
+        make_game_state(["e4"]),
+    ]
+    database.save_game_state.side_effect = GameStateConflictError("testcid")
+
+    response = client.post(
+        "/api/move", headers={"Openai-Conversation-Id": "testcid"}, json={"move": "e4"}
+    )
+
+    assert response.status_code == 200
+    assert database.save_game_state.call_count == 1
+
+
+def test_move_gives_up_when_game_keeps_changing(
+    database: Database, client: FlaskClient
+):
+    database.load_game_state.side_effect = lambda _: make_game_state([])
+    database.save_game_state.side_effect = GameStateConflictError("testcid")
+
+    response = client.post(
+        "/api/move", headers={"Openai-Conversation-Id": "testcid"}, json={"move": "e4"}
+    )
+
+    assert response.status_code == 409
+
+
+def test_move_that_became_illegal_is_a_conflict(
+    database: Database, client: FlaskClient
+):
+    database.load_game_state.side_effect = [
+        make_game_state([]),
+        make_game_state(["e4"]),
+    ]
+    database.save_game_state.side_effect = GameStateConflictError("testcid")
+
+    response = client.post(
+        "/api/move", headers={"Openai-Conversation-Id": "testcid"}, json={"move": "Nf3"}
+    )
+
+    assert response.status_code == 409
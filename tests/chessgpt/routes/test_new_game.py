@@ -10,7 +10,7 @@ from chessgpt.routes.new_game import new_game_routes
 def database():
     db = MagicMock()
     db.load_game_state = MagicMock()
-    db.save_game_state = MagicMock()
+    db.create_game_state = MagicMock()
     yield db
 
 
@@ -78,4 +78,4 @@ def test_new_game_happy_path(database, client: FlaskClient):
     assert response.status_code == 200
 
     # check that the board was saved
-    assert database.save_game_state.call_count == 1
+    assert database.create_game_state.call_count == 1
@@ -0,0 +1,77 @@
+import struct
+from unittest.mock import patch
+
+import chess
+import chess.polyglot
+import pytest
+
+from chessgpt.stockfish.analysis import analyse_position
+from chessgpt.stockfish.budgets import HINT_BUDGET
+from chessgpt.stockfish.book import get_book_moves, get_weight_exponent
+
+
+def write_book(path, entries):
+    # polyglot books are sorted 16 byte records of key, move, weight and learn
+    records = []
+    for board, uci, weight in entries:
+        move = chess.Move.from_uci(uci)
+        raw_move = move.to_square | move.from_square << 6
+        records.append(
+            struct.pack(">QHHI", chess.polyglot.zobrist_hash(board), raw_move, weight, 0)
+        )
+    with open(path, "wb") as f:
+        f.write(b"".join(sorted(records)))
+
+
+@pytest.fixture
+def book(tmp_path):
+    start = chess.Board()
+    after_e4 = chess.Board()
+    after_e4.push_san("e4")
+    path = str(tmp_path / "book.bin")
+    write_book(
+        path,
+        [
+            (start, "e2e4", 100),
+            (start, "d2d4", 80),
+            (start, "c2c4", 10),
+            (start, "a2a3", 0),
+            (after_e4, "c7c5", 50),
+        ],
+    )
+    with chess.polyglot.open_reader(path) as reader:
+        yield reader
+
+
+def test_hints_are_most_popular_book_moves(book):
+    moves = get_book_moves(book, chess.Board(), 2850, 5)
+
+    assert [move.uci() for move in moves] == ["e2e4", "d2d4", "c2c4"]
+
+
+def test_out_of_book_returns_nothing(book):
+    board = chess.Board()
+    board.push_san("a4")
+
+    assert get_book_moves(book, board, 1500) == []
+
+
+def test_weaker_levels_play_a_wider_range_of_moves(book):
+    def play(elo):
+        return {get_book_moves(book, chess.Board(), elo)[0].uci() for _ in range(300)}
+
+    assert play(1350) == {"e2e4", "d2d4", "c2c4"}
+    assert "a2a3" not in play(2850)
+    assert get_weight_exponent(1350) < get_weight_exponent(2850)
+
+
+@patch("chessgpt.stockfish.analysis.search_once")
+@patch("chessgpt.stockfish.analysis.get_opening_book")
+def test_book_moves_skip_the_engine(mock_get_opening_book, mock_search_once, book):
+    mock_get_opening_book.return_value = book
+
+    analysis = analyse_position(chess.Board(), 2850, HINT_BUDGET)
+
+    assert analysis.source == "book"
+    assert analysis.moves[0] == chess.Move.from_uci("e2e4")
+    mock_search_once.assert_not_called()
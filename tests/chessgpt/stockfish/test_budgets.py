@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+from chessgpt.stockfish.budgets import (
+    LEVEL_BUDGETS,
+    REVIEW_BUDGET,
+    REVIEW_GAME_NODES,
+    REVIEW_MIN_NODES,
+    get_review_budget,
+    get_search_budget,
+)
+from chessgpt.stockfish.stockfish import apply_search_budget
+
+
+def test_search_budget_for_each_level():
+    for elo, budget in LEVEL_BUDGETS.items():
+        assert get_search_budget(elo) is budget
+
+
+def test_search_budget_between_levels():
+    assert get_search_budget(1200) is LEVEL_BUDGETS[1350]
+    assert get_search_budget(1700) is LEVEL_BUDGETS[1500]
+    assert get_search_budget(3000) is LEVEL_BUDGETS[2850]
+
+
+def test_stronger_levels_search_deeper():
+    depths = [LEVEL_BUDGETS[elo].depth for elo in sorted(LEVEL_BUDGETS)]
+    assert depths == sorted(depths)
+
+
+def test_apply_search_budget_only_sends_changed_options():
+    stockfish = MagicMock()
+    stockfish.get_engine_parameters.return_value = {"Threads": 1, "Hash": 16}
+
+    apply_search_budget(stockfish, LEVEL_BUDGETS[1500])
+    stockfish.update_engine_parameters.assert_not_called()
+    stockfish.set_depth.assert_called_once_with(6)
+
+    apply_search_budget(stockfish, LEVEL_BUDGETS[2850])
+    stockfish.update_engine_parameters.assert_called_once_with(
+        {"Threads": 2, "Hash": 64}
+    )
+
+
+def test_review_budget_shares_the_game_nodes():
+    assert get_review_budget(1).nodes == REVIEW_BUDGET.nodes
+    assert get_review_budget(200).nodes == REVIEW_GAME_NODES // 200
+    assert get_review_budget(100000).nodes == REVIEW_MIN_NODES
@@ -0,0 +1,105 @@
+import sqlite3
+from unittest.mock import patch
+
+import chess
+
+from chessgpt.stockfish.analysis import Analysis, analyse_position
+from chessgpt.stockfish.budgets import LEVEL_BUDGETS
+from chessgpt.stockfish.cache import (
+    AnalysisCache,
+    MemoryStore,
+    SqliteStore,
+    analysis_key,
+)
+
+
+def test_transpositions_share_a_key():
+    board1 = chess.Board()
+    for move in ["Nf3", "Nf6", "d4"]:
+        board1.push_san(move)
+    board2 = chess.Board()
+    for move in ["d4", "Nf6", "Nf3"]:
+        board2.push_san(move)
+
+    assert analysis_key(board1, 1500, 1, "depth15") == analysis_key(
+        board2, 1500, 1, "depth15"
+    )
+
+
+def test_key_includes_elo_multipv_and_limit():
+    board = chess.Board()
+    keys = {
+        analysis_key(board, 1500, 1, "depth15"),
+        analysis_key(board, 2000, 1, "depth15"),
+        analysis_key(board, 1500, 5, "depth15"),
+        analysis_key(board, 1500, 1, "depth10"),
+    }
+    assert len(keys) == 4
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(maxsize=2)
+    store.set("a", ["e2e4"])
+    store.set("b", ["d2d4"])
+    store.get("a")
+    store.set("c", ["c2c4"])
+
+    assert store.get("a") == ["e2e4"]
+    assert store.get("b") is None
+    assert len(store) == 2
+
+
+def test_sqlite_store_survives_restarts_and_evicts(tmp_path):
+    path = str(tmp_path / "analysis.sqlite3")
+    store = SqliteStore(path, maxsize=2)
+    store.set("a", ["e2e4"])
+    store.set("b", ["d2d4"])
+    store.get("a")
+    store.set("c", ["c2c4"])
+
+    reopened = SqliteStore(path, maxsize=2)
+    assert reopened.get("a") == ["e2e4"]
+    assert reopened.get("b") is None
+    assert reopened.get("c") == ["c2c4"]
+
+
+def test_cache_counts_hits_and_misses():
+    cache = AnalysisCache(MemoryStore(maxsize=10))
+    cache.get("a")
+    cache.set("a", [])
+    cache.get("a")
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+@patch("chessgpt.stockfish.analysis.get_analysis_cache")
+@patch("chessgpt.stockfish.analysis.search_position")
+def test_analyse_position_only_searches_once(mock_search_position, mock_get_cache):
+    mock_get_cache.return_value = AnalysisCache(MemoryStore(maxsize=10))
+    mock_search_position.return_value = ["e2e4"]
+
+    first = analyse_position(chess.Board(), 1500, LEVEL_BUDGETS[1500])
+    second = analyse_position(chess.Board(), 1500, LEVEL_BUDGETS[1500])
+
+    assert first == second == Analysis([chess.Move.from_uci("e2e4")], "engine")
+    assert mock_search_position.call_count == 1
+
+
+def test_sqlite_store_reads_do_not_write(tmp_path):
+    path = str(tmp_path / "analysis.sqlite3")
+    store = SqliteStore(path, maxsize=10)
+    store.set("a", ["e2e4"])
+    # another worker sharing the file holds the write lock
+    writer = sqlite3.connect(path)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        for _ in range(SqliteStore.USED_BATCH - 1):
+            assert store.get("a") == ["e2e4"]
+    finally:
+        writer.rollback()
+        writer.close()
+
+    # the journal mode sticks to the file, so other workers read without blocking too
+    reader = sqlite3.connect(path)
+    assert reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reader.close()
@@ -0,0 +1,125 @@
+import threading
+from unittest.mock import patch
+
+import chess
+
+from chessgpt.stockfish.analysis import analyse_position
+from chessgpt.stockfish.budgets import LEVEL_BUDGETS
+from chessgpt.stockfish.cache import AnalysisCache, MemoryStore
+from chessgpt.stockfish.ponder import Ponderer, get_ponderer
+
+
+def blocking_search(release):
+    def search(board, elo, num):
+        release.wait(5)
+        return ["e2e4"]
+
+    return search
+
+
+@patch("chessgpt.stockfish.ponder.analyse_position")
+def test_same_position_is_only_pondered_once(mock_analyse_position):
+    release = threading.Event()
+    mock_analyse_position.side_effect = blocking_search(release)
+    ponderer = Ponderer(workers=1)
+
+    first = ponderer.ponder("game", chess.Board(), 1500, LEVEL_BUDGETS[1500])
+    second = ponderer.ponder("game", chess.Board(), 1500, LEVEL_BUDGETS[1500])
+    release.set()
+
+    assert first is second
+    assert first.result(5) == ["e2e4"]
+    assert mock_analyse_position.call_count == 1
+    ponderer.shutdown()
+
+
+@patch("chessgpt.stockfish.ponder.analyse_position")
+def test_new_position_cancels_queued_job(mock_analyse_position):
+    release = threading.Event()
+    mock_analyse_position.side_effect = blocking_search(release)
+    ponderer = Ponderer(workers=1)
+    after_e4 = chess.Board()
+    after_e4.push_san("e4")
+    after_d4 = chess.Board()
+    after_d4.push_san("d4")
+
+    # the other game's job occupies the only worker, so these stay queued
+    ponderer.ponder("other game", chess.Board(), 1500, LEVEL_BUDGETS[1500])
+    stale = ponderer.ponder("game", after_e4, 1500, LEVEL_BUDGETS[1500])
+    current = ponderer.ponder("game", after_d4, 1500, LEVEL_BUDGETS[1500])
+    release.set()
+
+    assert stale.cancelled()
+    assert current.result(5) == ["e2e4"]
+    ponderer.shutdown()
+
+
+@patch("chessgpt.stockfish.ponder.analyse_position")
+def test_discard_stale_keeps_job_for_the_played_move(mock_analyse_position):
+    release = threading.Event()
+    mock_analyse_position.side_effect = blocking_search(release)
+    ponderer = Ponderer(workers=1)
+    after_e4 = chess.Board()
+    after_e4.push_san("e4")
+    after_d4 = chess.Board()
+    after_d4.push_san("d4")
+
+    ponderer.ponder("other game", chess.Board(), 1500, LEVEL_BUDGETS[1500])
+    predicted = ponderer.ponder("game", after_e4, 1500, LEVEL_BUDGETS[1500])
+    ponderer.discard_stale("game", after_e4)
+    assert not predicted.cancelled()
+
+    ponderer.discard_stale("game", after_d4)
+    assert predicted.cancelled()
+    release.set()
+    ponderer.shutdown()
+
+
+@patch("chessgpt.stockfish.analysis.get_analysis_cache")
+@patch("chessgpt.stockfish.analysis.search_position")
+def test_request_waits_for_search_in_progress(mock_search_position, mock_get_cache):
+    mock_get_cache.return_value = AnalysisCache(MemoryStore(maxsize=10))
+    started = threading.Event()
+    release = threading.Event()
+
+    def search(board, elo, num):
+        started.set()
+        release.wait(5)
+        return ["e2e4"]
+
+    mock_search_position.side_effect = search
+    results = []
+    background = threading.Thread(
+        target=lambda: results.append(
+            analyse_position(chess.Board(), 1500, LEVEL_BUDGETS[1500])
+        )
+    )
+    background.start()
+    started.wait(5)
+    waiting = threading.Thread(
+        target=lambda: results.append(
+            analyse_position(chess.Board(), 1500, LEVEL_BUDGETS[1500])
+        )
+    )
+    waiting.start()
+    release.set()
+    background.join()
+    waiting.join()
+
+    assert [analysis.moves for analysis in results] == [
+        [chess.Move.from_uci("e2e4")]
+    ] * 2
+    assert mock_search_position.call_count == 1
+
+
+def test_pondering_is_off_by_default_on_lambda(monkeypatch):
+    monkeypatch.delenv("PONDER_THREADS", raising=False)
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "api")
+
+    assert get_ponderer() is None
+
+    monkeypatch.setenv("PONDER_THREADS", "1")
+    monkeypatch.setattr("chessgpt.stockfish.ponder._ponderer", None)
+    ponderer = get_ponderer()
+    assert ponderer is not None
+    ponderer.shutdown()
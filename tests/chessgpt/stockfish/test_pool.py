@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from stockfish import Stockfish
+
+from chessgpt.stockfish.pool import EnginePool
+
+FAKE_ENGINE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fakes", "fake_uci_engine.py"
+)
+
+
+@pytest.fixture
+def pool():
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=2, timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_engines_are_reused(pool):
+    with pool.engine() as first:
+        pass
+    with pool.engine() as second:
+        pass
+
+    assert first is second
+    assert pool.spawned == 1
+
+
+def test_options_are_reset_between_checkouts(pool):
+    with pool.engine() as engine:
+        engine.set_elo_rating(1500)
+        engine.set_depth(5)
+    with pool.engine() as engine:
+        assert engine.get_engine_parameters()["UCI_LimitStrength"] is False
+        assert engine.get_depth() == 15
+
+
+def test_hash_and_threads_are_kept_between_checkouts(pool):
+    with pool.engine() as engine:
+        engine.update_engine_parameters({"Hash": 64, "Threads": 2})
+    with patch.object(
+        engine, "update_engine_parameters", wraps=engine.update_engine_parameters
+    ) as update:
+        with pool.engine() as same:
+            assert same is engine
+            assert engine.get_engine_parameters()["Hash"] == 64
+            assert engine.get_engine_parameters()["Threads"] == 2
+
+    assert all("Hash" not in call.args[0] for call in update.call_args_list)
+
+
+def test_crashed_engine_is_respawned(pool):
+    with pool.engine() as engine:
+        pass
+    engine._stockfish.kill()
+    engine._stockfish.wait()
+
+    with pool.engine() as replacement:
+        assert replacement.get_best_move() is not None
+
+    assert replacement is not engine
+    assert pool.spawned == 2
+    assert pool.discarded == 1
+
+
+def test_engine_that_dies_during_checkout_is_not_returned(pool):
+    with pool.engine() as engine:
+        engine._stockfish.kill()
+        engine._stockfish.wait()
+
+    assert pool.idle_count() == 0
+    assert pool.discarded == 1
+
+
+def test_checkouts_are_limited_to_pool_size():
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=1, timeout=0.1)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold_engine():
+        with pool.engine():
+            entered.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_engine)
+    holder.start()
+    entered.wait()
+    try:
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            with pool.engine():
+                pass
+        assert time.perf_counter() - start >= 0.1
+    finally:
+        release.set()
+        holder.join()
+        pool.close()
+
+
+def test_prewarm_starts_engines_up_to_the_pool_size(pool):
+    assert pool.prewarm(5) == 2
+    assert pool.idle_count() == 2
+
+    assert pool.prewarm() == 0
+    with pool.engine():
+        pass
+    assert pool.spawned == 2
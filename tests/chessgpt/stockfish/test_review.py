@@ -0,0 +1,87 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from stockfish import Stockfish
+
+from chessgpt.stockfish.budgets import REVIEW_BUDGET
+from chessgpt.stockfish.cache import AnalysisCache, MemoryStore
+from chessgpt.stockfish.pool import EnginePool
+from chessgpt.stockfish.review import MATE_SCORE, classify, get_score, review_game
+
+FAKE_ENGINE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fakes", "fake_uci_engine.py"
+)
+
+SCHOLARS_MATE = ["e4", "e5", "Qh5", "Nc6", "Bc4", "Nf6", "Qxf7#"]
+
+
+@pytest.fixture
+def pool():
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=2, timeout=5)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def cache():
+    return AnalysisCache(MemoryStore(1000))
+
+
+def test_moves_are_reviewed_in_order(pool, cache):
+    reviewed = list(review_game(SCHOLARS_MATE, REVIEW_BUDGET, pool, cache))
+
+    assert [move.ply for move in reviewed] == list(range(1, 8))
+    assert [move.move for move in reviewed] == SCHOLARS_MATE
+    # the fake engine always scores 50 for the side to move
+    assert [move.score for move in reviewed[:6]] == [-50, 50] * 3
+    assert reviewed[-1].score == MATE_SCORE
+    assert reviewed[-1].mate == 0
+    # and its best move is a capture or check, which Qxf7# is
+    assert reviewed[4].best_move == "Qxf7+"
+    assert reviewed[-1].best_move == "Qxf7#"
+    assert reviewed[-1].loss == 0
+    assert reviewed[-1].classification is None
+
+
+def test_positions_are_searched_once(pool, cache):
+    list(review_game(SCHOLARS_MATE, REVIEW_BUDGET, pool, cache))
+    searched = cache.misses
+
+    list(review_game(SCHOLARS_MATE[:4], REVIEW_BUDGET, pool, cache))
+
+    # the checkmate doesn't need a search
+    assert searched == len(SCHOLARS_MATE)
+    assert cache.misses == searched
+    assert cache.hits == 5
+
+
+def test_empty_game(pool, cache):
+    assert list(review_game([], REVIEW_BUDGET, pool, cache)) == []
+
+
+def test_reviews_use_their_own_pool(pool, cache):
+    with patch("chessgpt.stockfish.review.get_review_pool", return_value=pool), patch(
+        "chessgpt.stockfish.stockfish.get_engine_pool"
+    ) as get_engine_pool:
+        reviewed = list(review_game(SCHOLARS_MATE, REVIEW_BUDGET, cache=cache))
+
+    assert len(reviewed) == len(SCHOLARS_MATE)
+    assert pool.spawned == 2
+    get_engine_pool.assert_not_called()
+
+
+def test_get_score():
+    assert get_score(35, None) == 35
+    assert get_score(None, 3) == MATE_SCORE - 3
+    assert get_score(None, -2) == -MATE_SCORE + 2
+    # a quicker mate is better
+    assert get_score(None, 1) > get_score(None, 5)
+
+
+@pytest.mark.parametrize(
+    "loss, classification",
+    [(0, None), (49, None), (50, "inaccuracy"), (150, "mistake"), (900, "blunder")],
+)
+def test_classify(loss, classification):
+    assert classify(loss) == classification
@@ -0,0 +1,35 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from stockfish import Stockfish
+
+from chessgpt.metrics.metrics import ENGINE_SEARCH_NODES
+from chessgpt.stockfish.stockfish import get_best_moves
+
+FAKE_ENGINE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fakes", "fake_uci_engine.py"
+)
+
+
+def searched_nodes():
+    # the sum of the observed values is the last entry
+    return sum(counts[-1] for counts in ENGINE_SEARCH_NODES.collect().values())
+
+
+@pytest.fixture
+def stockfish():
+    stockfish = Stockfish(FAKE_ENGINE)
+    yield stockfish
+    stockfish.send_quit_command()
+
+
+def test_best_moves_records_nodes_without_extra_engine_commands(stockfish):
+    before = searched_nodes()
+
+    with patch.object(stockfish, "_put", wraps=stockfish._put) as put:
+        top_moves = get_best_moves(stockfish, num=5, nodes=2000)
+
+    assert len(top_moves) == 5
+    assert [call.args[0] for call in put.call_args_list].count("uci") == 0
+    assert searched_nodes() - before == 2000
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import chess
+import chess.syzygy
+
+from chessgpt.stockfish.analysis import analyse_position
+from chessgpt.stockfish.budgets import LEVEL_BUDGETS
+from chessgpt.stockfish.tablebase import get_tablebase_moves
+
+
+class FakeTablebase:
+    """Knows KRK: the side with the rook wins, unless the rook has gone"""
+
+    def probe_wdl(self, board):
+        if board.is_checkmate():
+            return -2
+        if len(board.piece_map()) < 3:
+            return 0
+        has_rook = bool(board.pieces(chess.ROOK, board.turn))
+        return 2 if has_rook else -2
+
+    def probe_dtz(self, board):
+        wdl = self.probe_wdl(board)
+        if board.is_checkmate() or wdl == 0:
+            return 0
+        # pretend the losing king is closer to being mated near the corner
+        king = board.king(chess.BLACK)
+        distance = chess.square_distance(king, chess.A8)
+        return (distance + 1) * (1 if wdl > 0 else -1)
+
+
+def test_winning_moves_are_ranked_by_dtz():
+    board = chess.Board("k7/8/1K6/8/8/8/8/7R w - - 0 1")
+
+    moves = get_tablebase_moves(FakeTablebase(), board, 3)
+
+    assert moves[0] == chess.Move.from_uci("h1h8")
+    assert len(moves) == 3
+
+
+def test_positions_with_too_many_pieces_are_skipped():
+    tablebase = FakeTablebase()
+
+    assert get_tablebase_moves(tablebase, chess.Board(), 5) == []
+
+
+def test_missing_tables_are_skipped():
+    class MissingTablebase:
+        def probe_wdl(self, board):
+            raise chess.syzygy.MissingTableError()
+
+    board = chess.Board("k7/8/1K6/8/8/8/8/7R w - - 0 1")
+
+    assert get_tablebase_moves(MissingTablebase(), board) == []
+
+
+@patch("chessgpt.stockfish.analysis.search_once")
+@patch("chessgpt.stockfish.analysis.get_tablebase")
+def test_tablebase_moves_skip_the_engine(mock_get_tablebase, mock_search_once):
+    mock_get_tablebase.return_value = FakeTablebase()
+
+    analysis = analyse_position(
+        chess.Board("k7/8/1K6/8/8/8/8/7R w - - 0 1"), 2850, LEVEL_BUDGETS[2850]
+    )
+
+    assert analysis.source == "tablebase"
+    assert analysis.moves == [chess.Move.from_uci("h1h8")]
+    mock_search_once.assert_not_called()
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from chessgpt import analyze
+
+FAKE_ENGINE = os.path.join(os.path.dirname(__file__), "..", "fakes", "fake_uci_engine.py")
+
+PGN = """[Event "Scholar's mate"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+[Event "Queen's gambit"]
+[White "C"]
+[Black "D"]
+[Result "*"]
+
+1. d4 d5 2. c4 *
+
+[Event "From a position"]
+[SetUp "1"]
+[FEN "8/5k2/8/3K4/8/8/4P3/8 w - - 0 1"]
+[Result "*"]
+
+1. e4 Kf6 *
+"""
+
+
+@pytest.fixture
+def pgn(tmp_path, monkeypatch):
+    monkeypatch.setenv("STOCKFISH_PATH", FAKE_ENGINE)
+    # a checkpoint after every game
+    monkeypatch.setattr(analyze, "GAMES_PER_BATCH", 1)
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    return str(path)
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_games_skips(pgn):
+    games = list(analyze.read_games([pgn, pgn], skip=2))
+
+    assert [game.headers["Event"] for game in games] == [
+        "From a position",
+        "Scholar's mate",
+        "Queen's gambit",
+        "From a position",
+    ]
+
+
+def test_analyses_every_move(pgn, tmp_path):
+    output = str(tmp_path / "scores.jsonl")
+
+    checkpoint = analyze.main(
+        [pgn, "--output", output, "--levels", "1500", "--processes", "2"]
+    )
+
+    lines = read_lines(output)
+    assert checkpoint["games"] == 3
+    assert checkpoint["moves"] == len(lines) == 12
+    assert [(line["game"], line["ply"]) for line in lines[:8]] == [
+        (1, ply) for ply in range(1, 8)
+    ] + [(2, 1)]
+    assert lines[6]["move"] == "Qxf7#"
+    assert lines[6]["mate"] == 0
+    assert all(len(line["levels"]["1500"]) == 1 for line in lines)
+    assert lines[10]["fen"] == "8/5k2/8/3K4/8/8/4P3/8 w - - 0 1"
+
+
+def test_carries_on_from_the_checkpoint(pgn, tmp_path):
+    output = str(tmp_path / "scores.jsonl")
+    analyze.main([pgn, "--output", output, "--processes", "2"])
+    complete = read_lines(output)
+    # stop after the first game, part way through writing the second
+    first_game = [line for line in complete if line["game"] == 1]
+    with open(output, "w") as f:
+        for line in first_game:
+            f.write(json.dumps(line) + "\n")
+        offset = f.tell()
+        f.write('{"game": 2, "ply"')
+    analyze.write_checkpoint(
+        output + ".checkpoint", {"games": 1, "moves": len(first_game), "offset": offset}
+    )
+
+    checkpoint = analyze.main([pgn, "--output", output, "--processes", "2"])
+
+    assert read_lines(output) == complete
+    assert checkpoint["moves"] == len(complete)
+
+
+def test_rejects_unknown_levels(pgn, tmp_path):
+    with pytest.raises(SystemExit):
+        analyze.main([pgn, "--output", str(tmp_path / "x.jsonl"), "--levels", "1600"])
@@ -0,0 +1,70 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+from stockfish import Stockfish
+
+from chessgpt.stockfish.pool import EnginePool
+from chessgpt.warmup import is_warm_up_event, warm_up
+
+FAKE_ENGINE = os.path.join(os.path.dirname(__file__), "..", "fakes", "fake_uci_engine.py")
+
+
+@pytest.fixture
+def pool():
+    pool = EnginePool(lambda: Stockfish(FAKE_ENGINE), size=2)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        ({"source": "serverless-plugin-warmup"}, True),
+        ({"source": "aws.events", "detail-type": "Scheduled Event"}, True),
+        ({"rawPath": "/api/fen", "requestContext": {"http": {}}}, False),
+        (None, False),
+    ],
+)
+def test_is_warm_up_event(event, expected):
+    assert is_warm_up_event(event) == expected
+
+
+def test_warm_up_starts_the_engines(pool, monkeypatch):
+    monkeypatch.delenv("OPENAI_CHESS_SECRET", raising=False)
+    monkeypatch.setenv("WARMUP_ENGINES", "1")
+
+    with patch("chessgpt.warmup.get_engine_pool", return_value=pool):
+        primed = warm_up(Flask(__name__))
+
+    assert primed["engines"] == 1
+    assert primed["auth"] is False
+    assert pool.idle_count() == 1
+
+
+def test_warm_up_fetches_the_secret(pool, monkeypatch):
+    monkeypatch.setenv("OPENAI_CHESS_SECRET", "secret-arn")
+
+    with patch("chessgpt.warmup.get_engine_pool", return_value=pool), patch(
+        "chessgpt.authentication.authentication.get_secret", return_value="secret"
+    ) as get_secret:
+        primed = warm_up(Flask(__name__))
+
+    get_secret.assert_called_once_with("secret-arn", "us-east-1")
+    assert primed["auth"] is True
+    assert primed["engines"] == 2
+
+
+def test_warm_up_survives_a_missing_engine(monkeypatch):
+    monkeypatch.delenv("OPENAI_CHESS_SECRET", raising=False)
+
+    def missing_engine():
+        raise FileNotFoundError("stockfish")
+
+    pool = EnginePool(missing_engine, size=1)
+
+    with patch("chessgpt.warmup.get_engine_pool", return_value=pool):
+        primed = warm_up(Flask(__name__))
+
+    assert primed["engines"] == 0
@@ -0,0 +1,73 @@
+"""
+An in-memory stand-in for chessgpt.database.dynamodb.Database with the same
+interface the routes use, including the version checks that raise
+GameStateConflictError, so the app can run without DynamoDB.
+
+Latency can be simulated with an environment variable (in seconds):
+
+    FAKE_DYNAMODB_LATENCY - time taken by every call, a round trip to DynamoDB
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from chessgpt.database.dynamodb import GameStateConflictError
+
+
+def copy_game_state(game_state):
+    # requests change the board and moves they load, so never hand out ours
+    return game_state._replace(
+        board=game_state.board.copy(), move_history=list(game_state.move_history)
+    )
+
+
+class FakeDatabase:
+    def __init__(self, logger, latency=None):
+        self.logger = logger
+        if latency is None:
+            latency = float(os.environ.get("FAKE_DYNAMODB_LATENCY", "0"))
+        self.latency = latency
+        self.games = {}
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def load_game_state(self, conversation_id_hash):
+        self._round_trip()
+        with self._lock:
+            game_state = self.games.get(conversation_id_hash)
+        return copy_game_state(game_state) if game_state else None
+
+    def load_version(self, conversation_id_hash):
+        self._round_trip()
+        with self._lock:
+            game_state = self.games.get(conversation_id_hash)
+        if game_state is None:
+            return None, None
+        return game_state.version, game_state.created
+
+    def create_game_state(self, conversation_id_hash, game_state):
+        self._round_trip()
+        game_state = game_state._replace(version=1)
+        with self._lock:
+            self.games[conversation_id_hash] = copy_game_state(game_state)
+        return game_state
+
+    def save_game_state(self, conversation_id_hash, game_state):
+        self._round_trip()
+        game_state = game_state._replace(
+            updated=int(datetime.utcnow().timestamp()), version=game_state.version + 1
+        )
+        with self._lock:
+            stored = self.games.get(conversation_id_hash)
+            if (
+                stored is None
+                or stored.version != game_state.version - 1
+                or stored.created != game_state.created
+            ):
+                raise GameStateConflictError(conversation_id_hash)
+            self.games[conversation_id_hash] = copy_game_state(game_state)
+        return game_state
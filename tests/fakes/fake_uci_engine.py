@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+A scripted stand-in for the Stockfish binary that speaks just enough UCI for the
+stockfish wrapper. Moves are picked from python-chess's legal move list, so the
+answers are legal but not strong.
+
+Latency can be simulated with environment variables (all in seconds):
+
+    FAKE_UCI_STARTUP_DELAY - time taken to start (loading NNUE, allocating hash)
+    FAKE_UCI_SEARCH_DELAY  - time taken by every "go" command
+"""
+import os
+import sys
+import time
+
+import chess
+
+STARTUP_DELAY = float(os.environ.get("FAKE_UCI_STARTUP_DELAY", "0"))
+SEARCH_DELAY = float(os.environ.get("FAKE_UCI_SEARCH_DELAY", "0"))
+
+
+def send(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def set_position(args):
+    if args[0] == "startpos":
+        board = chess.Board()
+        rest = args[1:]
+    else:
+        # position fen <6 fields> [moves ...]
+        board = chess.Board(" ".join(args[1:7]))
+        rest = args[7:]
+    if rest and rest[0] == "moves":
+        for move in rest[1:]:
+            board.push_uci(move)
+    return board
+
+
+def ranked_moves(board):
+    # captures and checks first so the "best" move is at least plausible
+    def score(move):
+        return (board.is_capture(move), board.gives_check(move), move.uci())
+
+    return sorted(board.legal_moves, key=score, reverse=True)
+
+
+def go(board, args, multipv):
+    depth = 15
+    nodes = 1000
+    if "depth" in args:
+        depth = int(args[args.index("depth") + 1])
+    if "nodes" in args:
+        nodes = int(args[args.index("nodes") + 1])
+    if "movetime" in args:
+        time.sleep(int(args[args.index("movetime") + 1]) / 1000)
+    time.sleep(SEARCH_DELAY)
+    moves = ranked_moves(board)
+    if not moves:
+        send(f"info depth 0 score {'mate 0' if board.is_check() else 'cp 0'}")
+        send("bestmove (none)")
+        return
+    for i, move in enumerate(moves[:multipv]):
+        send(
+            f"info depth {depth} seldepth {depth} multipv {i + 1} score cp {50 - i * 10} "
+            f"nodes {nodes} nps {nodes * 10} time 1 pv {move.uci()}"
+        )
+    send(f"bestmove {moves[0].uci()}")
+
+
+def main():
+    time.sleep(STARTUP_DELAY)
+    send("Stockfish 16 by the Stockfish developers (see AUTHORS file)")
+    board = chess.Board()
+    multipv = 1
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        command, args = parts[0], parts[1:]
+        if command == "uci":
+            send("id name Stockfish 16")
+            send("id author the Stockfish developers (see AUTHORS file)")
+            send("option name MultiPV type spin default 1 min 1 max 500")
+            send("uciok")
+        elif command == "isready":
+            send("readyok")
+        elif command == "setoption":
+            if args[1] == "MultiPV":
+                multipv = int(args[-1])
+        elif command == "ucinewgame":
+            board = chess.Board()
+        elif command == "position":
+            board = set_position(args)
+        elif command == "d":
+            send(f"Fen: {board.fen()}")
+            send("Key: 0000000000000000")
+            send("Checkers: ")
+        elif command == "go":
+            go(board, args, multipv)
+        elif command == "quit":
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Checks what importing the app costs, the work every Lambda cold start does before it
+can serve a request. Run with -s to see the slowest imports.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# only needed by some requests, so they're imported when first used
+LAZY_MODULES = ["chess.syzygy", "chess.svg", "chessgpt.render.svg", "cProfile"]
+
+
+def import_times():
+    """Returns the cumulative import time in microseconds of every module app imports"""
+    env = dict(
+        os.environ,
+        GAMES_TABLE="games-table-test",
+        AWS_DEFAULT_REGION="us-east-1",
+        PYTHONPATH=ROOT,
+    )
+    for name in ["PROFILE_DIR", "PAPERTRAIL_APP_NAME", "TIMING_SAMPLE_RATE"]:
+        env.pop(name, None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    times = import_times()
+
+    assert "app" in times
+    print(f"\nimport app: {times['app'] / 1000:.1f}ms")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {cumulative / 1000:8.1f}ms {name}")
+    assert [name for name in LAZY_MODULES if name in times] == []